@@ -22,6 +22,7 @@ from gym.envs.registration import register
 from .spaces import DictSpace, ActionDictSpace
 from .strategy import BTgymBaseStrategy
 from .server import BTgymServer
+from .fastengine import BTgymFastEngine, BTgymFastStrategy
 from .datafeed import BTgymDataset, BTgymRandomDataDomain, BTgymSequentialDataDomain
 from .datafeed import DataSampleConfig, EnvResetConfig
 from .dataserver import BTgymDataFeedServer
@@ -29,6 +30,8 @@ from .rendering import BTgymRendering
 from .envs.base import BTgymEnv
 from btgym.envs.multidiscrete import MultiDiscreteEnv
 from btgym.envs.portfolio import PortfolioEnv
+from btgym.envs.vector import BTgymVecEnv
+from .pool import BTgymServerPool
 
 register(
     id='backtrader-v0000',
@@ -27,7 +27,7 @@ from logbook import Logger, StreamHandler
 
 from btgym.algorithms.memory import Memory
 from btgym.algorithms.rollout import make_data_getter
-from btgym.algorithms.runner import BaseEnvRunnerFn, RunnerThread
+from btgym.algorithms.runner import BaseEnvRunnerFn, RunnerThread, AsyncRunner
 from btgym.algorithms.math_utils import log_uniform
 from btgym.algorithms.nn.losses import value_fn_loss_def, rp_loss_def, pc_loss_def, aac_loss_def, ppo_loss_def
 from btgym.algorithms.utils import feed_dict_rnn_context, feed_dict_from_nested, batch_stack
@@ -492,7 +492,7 @@ class BaseAAC(object):
                     self.runners = self._make_runners(policy=pi)
 
                     # Make rollouts provider[s] for async runners:
-                    if self.runner_config['class_ref'] == RunnerThread:
+                    if self.runner_config['class_ref'] in [RunnerThread, AsyncRunner]:
                         # Make rollouts provider[s] for async threaded runners:
                         self.data_getter = [make_data_getter(runner.queue) for runner in self.runners]
                     else:
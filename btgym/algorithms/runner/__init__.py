@@ -1,2 +1,11 @@
+import sys
+
 from .base import BaseEnvRunnerFn
-from .threadrunner import RunnerThread
\ No newline at end of file
+from .threadrunner import RunnerThread
+
+if sys.version_info >= (3, 6):
+    # Asynchronous generators:
+    from .aio import AsyncEnvRunnerFn, AsyncRunner
+
+else:
+    AsyncEnvRunnerFn = AsyncRunner = None
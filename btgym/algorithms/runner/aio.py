@@ -0,0 +1,228 @@
+from logbook import Logger, StreamHandler, WARNING
+import sys
+import time
+
+import asyncio
+import six.moves.queue as queue
+import threading
+
+from btgym.algorithms.runner.base import EnvRunnerLogic, render
+
+
+async def AsyncEnvRunnerFn(
+    sess,
+    env,
+    policy,
+    task,
+    rollout_length,
+    summary_writer,
+    episode_summary_freq,
+    env_render_freq,
+    atari_test,
+    ep_summary,
+    memory_config,
+    log,
+    **kwargs
+):
+    """
+    Asyncio variant of BaseEnvRunnerFn: same runtime logic, but environment is called via
+    env.areset() and env.astep(), so event loop is free to serve other environments while
+    this one is waiting for server response. Blocking env.get_stat() and env.render() calls are run
+    in default executor to keep event loop free.
+
+    Args:
+        same as BaseEnvRunnerFn; env should support asyncio interface, e.g. BTgymEnv.
+
+    Yelds:
+        collected data as dictionary of on_policy, off_policy rollouts and episode statistics.
+    """
+    try:
+        runner = EnvRunnerLogic(
+            sess,
+            env,
+            policy,
+            task,
+            rollout_length,
+            summary_writer,
+            episode_summary_freq,
+            env_render_freq,
+            atari_test,
+            ep_summary,
+            memory_config,
+            log,
+            **kwargs
+        )
+        loop = asyncio.get_event_loop()
+        request, value = next(runner)
+        while True:
+            if request == 'step':
+                request, value = runner.send(await env.astep(value))
+
+            elif request == 'reset':
+                request, value = runner.send(await env.areset(**value))
+
+            elif request == 'get_stat':
+                request, value = runner.send(await loop.run_in_executor(None, env.get_stat))
+
+            elif request == 'render':
+                request, value = runner.send(await loop.run_in_executor(None, render, env, value))
+
+            else:
+                yield value
+                request, value = next(runner)
+
+    except Exception as e:
+        log.exception(e)
+        raise e
+
+
+class AsyncRunnerLoop(threading.Thread):
+    """
+    Single thread running asyncio event loop all AsyncRunner instances of the process share.
+    """
+    instance = None
+    lock = threading.Lock()
+
+    def __init__(self, sess):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.sess = sess
+        self.loop = asyncio.new_event_loop()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        with self.sess.as_default():
+            self.loop.run_forever()
+
+    @classmethod
+    def get_loop(cls, sess):
+        """
+        Returns running shared event loop, starts one if there is none.
+
+        Args:
+            sess:   tf.Session, set as default one for loop thread.
+        """
+        with cls.lock:
+            if cls.instance is None or not cls.instance.is_alive():
+                cls.instance = cls(sess)
+                cls.instance.start()
+
+        return cls.instance.loop
+
+
+class AsyncRunner:
+    """
+    Drop-in alternative to RunnerThread: instead of running thread per environment, runners of all
+    environments of the process are executed as coroutines of single shared event loop thread.
+    Policy inference of one environment overlaps with waiting for server responses of others,
+    without GIL contention between runner threads.
+
+    Usage: pass as trainer runner configuration::
+
+        runner_config={
+            'class_ref': AsyncRunner,
+            'kwargs': {'runner_fn_ref': AsyncEnvRunnerFn},
+        }
+
+    Environments should support asyncio interface (areset(), astep()), e.g. BTgymEnv.
+    Collected data is provided via `queue` attribute, same way as for RunnerThread.
+    """
+    def __init__(self,
+                 env,
+                 policy,
+                 task,
+                 rollout_length,
+                 episode_summary_freq,
+                 env_render_freq,
+                 test,
+                 ep_summary,
+                 runner_fn_ref=AsyncEnvRunnerFn,
+                 memory_config=None,
+                 log_level=WARNING,
+                 queue_timeout=600.0,
+                 **kwargs):
+        """
+
+        Args:
+            env:                    environment instance
+            policy:                 policy instance
+            task:                   int
+            rollout_length:         int
+            episode_summary_freq:   int
+            env_render_freq:        int
+            test:                   Atari or BTGyn
+            ep_summary:             tf.summary
+            runner_fn_ref:          async generator function defining runner execution logic
+            memory_config:          replay memory configuration dictionary
+            log_level:              int, logbook.level
+            queue_timeout:          seconds to wait for free space in data queue before giving up
+        """
+        self.queue = queue.Queue(5)
+        self.queue_timeout = queue_timeout
+        self.rollout_length = rollout_length
+        self.env = env
+        self.policy = policy
+        self.runner_fn_ref = runner_fn_ref
+        self.sess = None
+        self.summary_writer = None
+        self.episode_summary_freq = episode_summary_freq
+        self.env_render_freq = env_render_freq
+        self.task = task
+        self.test = test
+        self.ep_summary = ep_summary
+        self.memory_config = memory_config
+        self.log_level = log_level
+        self.future = None
+        StreamHandler(sys.stdout).push_application()
+        self.log = Logger('AsyncRunner_{}'.format(self.task), level=self.log_level)
+
+    def start_runner(self, sess, summary_writer, **kwargs):
+        try:
+            self.sess = sess
+            self.summary_writer = summary_writer
+            self.future = asyncio.run_coroutine_threadsafe(self._run(), AsyncRunnerLoop.get_loop(sess))
+            self.future.add_done_callback(self._on_done)
+
+        except:
+            msg = 'start() exception occurred.\n\nPress `Ctrl-C` or jupyter:[Kernel]->[Interrupt] for clean exit.\n'
+            self.log.exception(msg)
+            raise RuntimeError
+
+    def _on_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            msg = 'RunTime exception occurred.\n\nPress `Ctrl-C` or jupyter:[Kernel]->[Interrupt] for clean exit.\n'
+            self.log.error('{}{}'.format(msg, future.exception()))
+
+    def is_alive(self):
+        return self.future is not None and not self.future.done()
+
+    async def _put(self, data):
+        # Event loop should never block on full queue:
+        deadline = time.time() + self.queue_timeout
+        while True:
+            try:
+                self.queue.put_nowait(data)
+                return
+
+            except queue.Full:
+                if time.time() > deadline:
+                    raise
+                await asyncio.sleep(0.01)
+
+    async def _run(self):
+        rollout_provider = self.runner_fn_ref(
+            self.sess,
+            self.env,
+            self.policy,
+            self.task,
+            self.rollout_length,
+            self.summary_writer,
+            self.episode_summary_freq,
+            self.env_render_freq,
+            self.test,
+            self.ep_summary,
+            self.memory_config,
+            self.log
+        )
+        async for data in rollout_provider:
+            await self._put(data)
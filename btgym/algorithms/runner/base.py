@@ -41,275 +41,346 @@ def BaseEnvRunnerFn(
         collected data as dictionary of on_policy, off_policy rollouts and episode statistics.
     """
     try:
-        if memory_config is not None:
-            memory = memory_config['class_ref'](**memory_config['kwargs'])
+        runner = EnvRunnerLogic(
+            sess,
+            env,
+            policy,
+            task,
+            rollout_length,
+            summary_writer,
+            episode_summary_freq,
+            env_render_freq,
+            atari_test,
+            ep_summary,
+            memory_config,
+            log,
+            **kwargs
+        )
+        request, value = next(runner)
+        while True:
+            if request == 'step':
+                request, value = runner.send(env.step(value))
 
-        else:
-            memory = _DummyMemory()
+            elif request == 'reset':
+                request, value = runner.send(env.reset(**value))
 
-        if not atari_test:
-            # Pass sample config to environment:
-            last_state = env.reset(**policy.get_sample_config())
+            elif request == 'get_stat':
+                request, value = runner.send(env.get_stat())
 
-        else:
-            last_state = env.reset()
-
-        last_context = policy.get_initial_features(state=last_state)
-        length = 0
-        local_episode = 0
-        reward_sum = 0
-        last_action = env.action_space.encode(env.get_initial_action())
-        last_reward = np.asarray(0.0)
-
-        # Summary averages accumulators:
-        total_r = []
-        cpu_time = []
-        final_value = []
-        total_steps = []
-        total_steps_atari = []
-
-        ep_stat = None
-        test_ep_stat = None
-        render_stat = None
+            elif request == 'render':
+                request, value = runner.send(render(env, value))
 
-        while True:
-            terminal_end = False
-            rollout = Rollout()
-
-            action, _, value_, context = policy.act(
-                last_state,
-                last_context,
-                last_action[None, ...],
-                last_reward[None, ...]
-            )
-            # Make a step:
-            state, reward, terminal, info = env.step(action['environment'])
-
-            # Partially collect first experience of rollout:
-            last_experience = {
-                'position': {'episode': local_episode, 'step': length},
-                'state': last_state,
-                'action': action['one_hot'],
-                'reward': reward,
-                'value': value_,
-                'terminal': terminal,
-                'context': last_context,
-                'last_action': last_action,
-                'last_reward': last_reward,
-            }
-            # Execute user-defined callbacks to policy, if any:
-            for key, callback in policy.callback.items():
-                last_experience[key] = callback(**locals())
-
-            length += 1
-            reward_sum += reward
-            last_state = state
-            last_context = context
-            last_action = action['encoded']
-            last_reward = reward
-
-            for roll_step in range(1, rollout_length):
-                if not terminal:
-                    # Continue adding experiences to rollout:
-                    action, _, value_, context = policy.act(
-                        last_state,
-                        last_context,
-                        last_action[None, ...],
-                        last_reward[None, ...]
-                    )
+            else:
+                yield value
+                request, value = next(runner)
 
-                    state, reward, terminal, info = env.step(action['environment'])
-
-                    # print(
-                    #     'RUNNER: one_hot: {}, vec: {}, dict: {}'.format(
-                    #         action_one_hot,
-                    #         action,
-                    #         env.action_space._vec_to_action(action)
-                    #     )
-                    # )
-
-                    # Partially collect next experience:
-                    experience = {
-                        'position': {'episode': local_episode, 'step': length},
-                        'state': last_state,
-                        'action': action['one_hot'],
-                        'reward': reward,
-                        'value': value_,
-                        'terminal': terminal,
-                        'context': last_context,
-                        'last_action': last_action,
-                        'last_reward': last_reward,
-                        #'pixel_change': 0 #policy.get_pc_target(state, last_state),
-                    }
-                    for key, callback in policy.callback.items():
-                        experience[key] = callback(**locals())
-
-                    # Bootstrap to complete and push previous experience:
-                    last_experience['r'] = value_
-                    rollout.add(last_experience)
-                    memory.add(last_experience)
-
-                    # Housekeeping:
-                    length += 1
-                    reward_sum += reward
-                    last_state = state
-                    last_context = context
-                    last_action = action['encoded']
-                    last_reward = reward
-                    last_experience = experience
-
-                if terminal:
-                    # Finished episode within last taken step:
-                    terminal_end = True
-                    # All environment-specific summaries are here due to fact
-                    # only runner allowed to interact with environment:
-                    # Accumulate values for averaging:
-                    total_r += [reward_sum]
-                    total_steps_atari += [length]
-                    if not atari_test:
-                        episode_stat = env.get_stat()  # get episode statistic
-                        last_i = info[-1]  # pull most recent info
-                        cpu_time += [episode_stat['runtime'].total_seconds()]
-                        final_value += [last_i['broker_value']]
-                        total_steps += [episode_stat['length']]
-
-                    # Episode statistics:
-                    try:
-                        # Was it test episode ( `type` in metadata is not zero)?
-                        if not atari_test and state['metadata']['type']:
-                            is_test_episode = True
+    except Exception as e:
+        log.exception(e)
+        raise e
 
-                        else:
-                            is_test_episode = False
 
-                    except KeyError:
-                        is_test_episode = False
+def render(env, modes):
+    """
+    Returns:
+        dictionary of environment renderings for given modes, batch dimension added.
+    """
+    return {mode: env.render(mode)[None,:] for mode in modes}
+
+
+def EnvRunnerLogic(
+    sess,
+    env,
+    policy,
+    task,
+    rollout_length,
+    summary_writer,
+    episode_summary_freq,
+    env_render_freq,
+    atari_test,
+    ep_summary,
+    memory_config,
+    log,
+    **kwargs
+):
+    """
+    Runtime logic of BaseEnvRunnerFn, decoupled from the way environment gets called:
+    instead of calling environment methods itself, it yields requests and expects to be sent
+    environment response back. Lets synchronous and asyncio runners share same logic.
+
+    Args:
+        same as BaseEnvRunnerFn
+
+    Yields:
+        tuples (request, value), one of:
+            ('reset', dict of env.reset() kwargs) - expects initial observation to be sent;
+            ('step', action) - expects env.step() response to be sent;
+            ('get_stat', None) - expects env.get_stat() response to be sent;
+            ('render', list of modes) - expects render(env, modes) response to be sent;
+            ('data', collected data dictionary) - expects nothing.
+    """
+    if memory_config is not None:
+        memory = memory_config['class_ref'](**memory_config['kwargs'])
+
+    else:
+        memory = _DummyMemory()
+
+    if not atari_test:
+        # Pass sample config to environment:
+        last_state = yield 'reset', policy.get_sample_config()
+
+    else:
+        last_state = yield 'reset', {}
+
+    last_context = policy.get_initial_features(state=last_state)
+    length = 0
+    local_episode = 0
+    reward_sum = 0
+    last_action = env.action_space.encode(env.get_initial_action())
+    last_reward = np.asarray(0.0)
+
+    # Summary averages accumulators:
+    total_r = []
+    cpu_time = []
+    final_value = []
+    total_steps = []
+    total_steps_atari = []
+
+    ep_stat = None
+    test_ep_stat = None
+    render_stat = None
+
+    while True:
+        terminal_end = False
+        rollout = Rollout()
+
+        action, _, value_, context = policy.act(
+            last_state,
+            last_context,
+            last_action[None, ...],
+            last_reward[None, ...]
+        )
+        # Make a step:
+        state, reward, terminal, info = yield 'step', action['environment']
+
+        # Partially collect first experience of rollout:
+        last_experience = {
+            'position': {'episode': local_episode, 'step': length},
+            'state': last_state,
+            'action': action['one_hot'],
+            'reward': reward,
+            'value': value_,
+            'terminal': terminal,
+            'context': last_context,
+            'last_action': last_action,
+            'last_reward': last_reward,
+        }
+        # Execute user-defined callbacks to policy, if any:
+        for key, callback in policy.callback.items():
+            last_experience[key] = callback(**locals())
+
+        length += 1
+        reward_sum += reward
+        last_state = state
+        last_context = context
+        last_action = action['encoded']
+        last_reward = reward
+
+        for roll_step in range(1, rollout_length):
+            if not terminal:
+                # Continue adding experiences to rollout:
+                action, _, value_, context = policy.act(
+                    last_state,
+                    last_context,
+                    last_action[None, ...],
+                    last_reward[None, ...]
+                )
+
+                state, reward, terminal, info = yield 'step', action['environment']
+
+                # print(
+                #     'RUNNER: one_hot: {}, vec: {}, dict: {}'.format(
+                #         action_one_hot,
+                #         action,
+                #         env.action_space._vec_to_action(action)
+                #     )
+                # )
+
+                # Partially collect next experience:
+                experience = {
+                    'position': {'episode': local_episode, 'step': length},
+                    'state': last_state,
+                    'action': action['one_hot'],
+                    'reward': reward,
+                    'value': value_,
+                    'terminal': terminal,
+                    'context': last_context,
+                    'last_action': last_action,
+                    'last_reward': last_reward,
+                    #'pixel_change': 0 #policy.get_pc_target(state, last_state),
+                }
+                for key, callback in policy.callback.items():
+                    experience[key] = callback(**locals())
+
+                # Bootstrap to complete and push previous experience:
+                last_experience['r'] = value_
+                rollout.add(last_experience)
+                memory.add(last_experience)
+
+                # Housekeeping:
+                length += 1
+                reward_sum += reward
+                last_state = state
+                last_context = context
+                last_action = action['encoded']
+                last_reward = reward
+                last_experience = experience
+
+            if terminal:
+                # Finished episode within last taken step:
+                terminal_end = True
+                # All environment-specific summaries are here due to fact
+                # only runner allowed to interact with environment:
+                # Accumulate values for averaging:
+                total_r += [reward_sum]
+                total_steps_atari += [length]
+                if not atari_test:
+                    episode_stat = yield 'get_stat', None  # get episode statistic
+                    last_i = info[-1]  # pull most recent info
+                    cpu_time += [episode_stat['runtime'].total_seconds()]
+                    final_value += [last_i['broker_value']]
+                    total_steps += [episode_stat['length']]
+
+                # Episode statistics:
+                try:
+                    # Was it test episode ( `type` in metadata is not zero)?
+                    if not atari_test and state['metadata']['type']:
+                        is_test_episode = True
 
-                    if is_test_episode:
-                        test_ep_stat = dict(
-                            total_r=total_r[-1],
-                            final_value=final_value[-1],
-                            steps=total_steps[-1]
-                        )
                     else:
-                        if local_episode % episode_summary_freq == 0:
-                            if not atari_test:
-                                # BTgym:
-                                ep_stat = dict(
-                                    total_r=np.average(total_r),
-                                    cpu_time=np.average(cpu_time),
-                                    final_value=np.average(final_value),
-                                    steps=np.average(total_steps)
-                                )
-                            else:
-                                # Atari:
-                                ep_stat = dict(
-                                    total_r=np.average(total_r),
-                                    steps=np.average(total_steps_atari)
-                                )
-                            total_r = []
-                            cpu_time = []
-                            final_value = []
-                            total_steps = []
-                            total_steps_atari = []
-
-                    if task == 0 and local_episode % env_render_freq == 0 :
+                        is_test_episode = False
+
+                except KeyError:
+                    is_test_episode = False
+
+                if is_test_episode:
+                    test_ep_stat = dict(
+                        total_r=total_r[-1],
+                        final_value=final_value[-1],
+                        steps=total_steps[-1]
+                    )
+                else:
+                    if local_episode % episode_summary_freq == 0:
                         if not atari_test:
-                            # Render environment (chief worker only, and not in atari atari_test mode):
-                            render_stat = {
-                                mode: env.render(mode)[None,:] for mode in env.render_modes
-                            }
+                            # BTgym:
+                            ep_stat = dict(
+                                total_r=np.average(total_r),
+                                cpu_time=np.average(cpu_time),
+                                final_value=np.average(final_value),
+                                steps=np.average(total_steps)
+                            )
                         else:
                             # Atari:
-                            render_stat = dict(render_atari=state['external'][None,:] * 255)
-
-                    # New episode:
+                            ep_stat = dict(
+                                total_r=np.average(total_r),
+                                steps=np.average(total_steps_atari)
+                            )
+                        total_r = []
+                        cpu_time = []
+                        final_value = []
+                        total_steps = []
+                        total_steps_atari = []
+
+                if task == 0 and local_episode % env_render_freq == 0 :
                     if not atari_test:
-                        # Pass sample config to environment:
-                        last_state = env.reset(**policy.get_sample_config())
-
+                        # Render environment (chief worker only, and not in atari atari_test mode):
+                        render_stat = yield 'render', env.render_modes
                     else:
-                        last_state = env.reset()
-
-                    last_context = policy.get_initial_features(state=last_state, context=last_context)
-                    length = 0
-                    reward_sum = 0
-                    last_action = env.action_space.encode(env.get_initial_action())
-                    last_reward = np.asarray(0.0)
-
-                    # Increment global and local episode counts:
-                    sess.run(policy.inc_episode)
-                    local_episode += 1
-                    break
-
-            # After rolling `rollout_length` or less (if got `terminal`)
-            # complete final experience of the rollout:
-            if not terminal_end:
-                # Bootstrap:
-                last_experience['r'] = np.asarray(
-                    [policy.get_value(last_state, last_context, last_action[None, ...], last_reward[None, ...])]
-                )
-
-            else:
-                last_experience['r'] = np.asarray([0.0])
-
-            rollout.add(last_experience)
+                        # Atari:
+                        render_stat = dict(render_atari=state['external'][None,:] * 255)
 
-            # Only training rollouts are added to replay memory:
-            try:
-                # Was it test (`type` in metadata is not zero)?
-                if not atari_test and last_experience['state']['metadata']['type']:
-                    is_test = True
+                # New episode:
+                if not atari_test:
+                    # Pass sample config to environment:
+                    last_state = yield 'reset', policy.get_sample_config()
 
                 else:
-                    is_test = False
+                    last_state = yield 'reset', {}
+
+                last_context = policy.get_initial_features(state=last_state, context=last_context)
+                length = 0
+                reward_sum = 0
+                last_action = env.action_space.encode(env.get_initial_action())
+                last_reward = np.asarray(0.0)
+
+                # Increment global and local episode counts:
+                sess.run(policy.inc_episode)
+                local_episode += 1
+                break
+
+        # After rolling `rollout_length` or less (if got `terminal`)
+        # complete final experience of the rollout:
+        if not terminal_end:
+            # Bootstrap:
+            last_experience['r'] = np.asarray(
+                [policy.get_value(last_state, last_context, last_action[None, ...], last_reward[None, ...])]
+            )
 
-            except KeyError:
-                is_test = False
+        else:
+            last_experience['r'] = np.asarray([0.0])
 
-            if not is_test:
-                memory.add(last_experience)
+        rollout.add(last_experience)
 
-            #print('last_experience {}'.format(last_experience['position']))
-            #for k, v in last_experience.items():
-            #    try:
-            #        print(k, 'shape: ', v.shape)
-            #    except:
-            #        try:
-            #            print(k, 'type: ', type(v), 'len: ', len(v))
-            #        except:
-            #            print(k, 'type: ', type(v), 'value: ', v)
-
-            #print('rollout_step: {}, last_exp/frame_pos: {}\nr: {}, v: {}, v_next: {}, t: {}'.
-            #    format(
-            #        length,
-            #        last_experience['position'],
-            #        last_experience['reward'],
-            #        last_experience['value'],
-            #        last_experience['value_next'],
-            #        last_experience['terminal']
-            #    )
-            #)
-            #print('rollout size: {}, last r: {}'.format(len(rollout.position), rollout.r[-1]))
-            #print('last value_next: ', last_experience['value_next'], ', rollout flushed.')
-
-            # Once we have enough experience and memory can be sampled, yield it,
-            # and have the ThreadRunner place it on a queue:
-            if memory.is_full():
-                data = dict(
-                    on_policy=rollout,
-                    off_policy=memory.sample_uniform(sequence_size=rollout_length),
-                    off_policy_rp=memory.sample_priority(exact_size=True),
-                    ep_summary=ep_stat,
-                    test_ep_summary=test_ep_stat,
-                    render_summary=render_stat,
-                )
-                yield data
+        # Only training rollouts are added to replay memory:
+        try:
+            # Was it test (`type` in metadata is not zero)?
+            if not atari_test and last_experience['state']['metadata']['type']:
+                is_test = True
 
-                ep_stat = None
-                test_ep_stat = None
-                render_stat = None
+            else:
+                is_test = False
 
-    except Exception as e:
-        log.exception(e)
-        raise e
\ No newline at end of file
+        except KeyError:
+            is_test = False
+
+        if not is_test:
+            memory.add(last_experience)
+
+        #print('last_experience {}'.format(last_experience['position']))
+        #for k, v in last_experience.items():
+        #    try:
+        #        print(k, 'shape: ', v.shape)
+        #    except:
+        #        try:
+        #            print(k, 'type: ', type(v), 'len: ', len(v))
+        #        except:
+        #            print(k, 'type: ', type(v), 'value: ', v)
+
+        #print('rollout_step: {}, last_exp/frame_pos: {}\nr: {}, v: {}, v_next: {}, t: {}'.
+        #    format(
+        #        length,
+        #        last_experience['position'],
+        #        last_experience['reward'],
+        #        last_experience['value'],
+        #        last_experience['value_next'],
+        #        last_experience['terminal']
+        #    )
+        #)
+        #print('rollout size: {}, last r: {}'.format(len(rollout.position), rollout.r[-1]))
+        #print('last value_next: ', last_experience['value_next'], ', rollout flushed.')
+
+        # Once we have enough experience and memory can be sampled, yield it,
+        # and have the ThreadRunner place it on a queue:
+        if memory.is_full():
+            data = dict(
+                on_policy=rollout,
+                off_policy=memory.sample_uniform(sequence_size=rollout_length),
+                off_policy_rp=memory.sample_priority(exact_size=True),
+                ep_summary=ep_stat,
+                test_ep_summary=test_ep_stat,
+                render_summary=render_stat,
+            )
+            yield 'data', data
+
+            ep_stat = None
+            test_ep_stat = None
+            render_stat = None
@@ -20,16 +20,21 @@
 from logbook import Logger, StreamHandler, WARNING
 
 import datetime
-import random
-from numpy.random import beta as random_beta
+from numpy.random import random_sample
+import numpy as np
+from scipy.special import betainc
 import copy
 import os
 import sys
 
 from backtrader import TimeFrame
-import backtrader.feeds as btfeeds
 import pandas as pd
 
+from .cache import csv_cache_key, load_columns, load_dataframe, save_dataframe
+from .feed import BTgymArrayData
+from .lazy import LazyDataFrame
+from .stats import DataStat
+
 DataSampleConfig = dict(
     get_new=True,
     sample_type=0,
@@ -65,7 +70,22 @@ class BTgymBaseData:
 
         CSV[source data]-->pandas[for efficient sampling]-->bt.feeds
 
+    Parsed CSV files are cached on disk as columnar .npy sets under `csv_cache_dir`, keyed by file path,
+    modification time, size and parsing parameters; later loads of unchanged file skip parsing.
+    Set `csv_cache_dir` to None (class attribute or `parsing_params` key) to disable caching.
+
+    For source files larger than memory set `lazy_data` to True: data is then served from memory-mapped cache
+    entries by LazyDataFrame, holding only time index in memory and reading sampled rows on demand; up to
+    `lazy_cache_size` bytes of recently sampled data are kept. Requires caching to be enabled.
     """
+    # Parsed CSV files cache location, None disables caching:
+    csv_cache_dir = os.environ.get('BTGYM_CSV_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'btgym', 'csv'))
+
+    # Keep data on disk and read samples on demand:
+    lazy_data = False
+
+    # Lazy data sampled records cache size, bytes:
+    lazy_cache_size = 256 * 2 ** 20
 
     def __init__(
             self,
@@ -213,6 +233,9 @@ class BTgymBaseData:
         self.final_timestamp = 0
 
         self.data_stat = None  # Dataset descriptive statistic as pandas dataframe
+        self._data_stat_source = None  # data or file names `data_stat` has been computed for
+        self._stat = None  # (data, DataStat) pair, see get_stat()
+        self._parent_stat = None  # see _link_sample()
         self.data_range_delta = None  # Dataset total duration timedelta
         self.max_time_gap = None
         self.time_gap = None
@@ -224,6 +247,9 @@ class BTgymBaseData:
         self.expanding = False
 
         self.sample_instance = None
+        self._start_rows_cache = {}
+        self._start_mass_cache = {}
+        self._time_index = None  # (data, int64 timestamps, day start rows), see get_row()
 
         self.test_range_delta = None
         self.train_range_delta = None
@@ -331,7 +357,7 @@ class BTgymBaseData:
         self.final_timestamp = self.data.index[-1].timestamp()
 
         if self.frozen_time_split is not None:
-            frozen_index = self.data.index.get_loc(self.frozen_time_split, method='ffill')
+            frozen_index = self.get_row(self.frozen_time_split, method='ffill')
             self.frozen_split_timestamp = self.data.index[frozen_index].timestamp()
             self.set_global_timestamp(self.frozen_split_timestamp)
 
@@ -410,6 +436,10 @@ class BTgymBaseData:
                 )
                 raise AssertionError
 
+        # Valid sample starts are to be recomputed:
+        self._start_rows_cache = {}
+        self._start_mass_cache = {}
+
         self.sample_num = 0
         self.is_ready = True
 
@@ -432,39 +462,128 @@ class BTgymBaseData:
         if type(self.filename) == str:
             self.filename = [self.filename]
 
+        data = self._load_lazy_data() if self.lazy_data else None
+        if data is None:
+            data = self._load_data()
+
+        self.data = data
+
+        data_range = pd.to_datetime(self.data.index)
+        self.total_num_records = self.data.shape[0]
+        self.data_range_delta = (data_range[-1] - data_range[0]).to_pytimedelta()
+
+    def _load_data(self):
+        """
+        Returns:
+            pd.DataFrame, all files data concatenated.
+        """
         dataframes = []
         for filename in self.filename:
             try:
                 assert filename and os.path.isfile(filename)
-                current_dataframe = pd.read_csv(
-                    filename,
-                    sep=self.sep,
-                    header=self.header,
-                    index_col=self.index_col,
-                    parse_dates=self.parse_dates,
-                    names=self.names,
-                )
+                dataframes += [self._load_csv_file(filename)]
+                self.log.info('Loaded {} records from <{}>.'.format(dataframes[-1].shape[0], filename))
 
-                # Check and remove duplicate datetime indexes:
-                duplicates = current_dataframe.index.duplicated(keep='first')
-                how_bad = duplicates.sum()
-                if how_bad > 0:
-                    current_dataframe = current_dataframe[~duplicates]
-                    self.log.warning('Found {} duplicated date_time records in <{}>.\
-                     Removed all but first occurrences.'.format(how_bad, filename))
+            except:
+                msg = 'Data file <{}> not specified / not found / parser error.'.format(str(filename))
+                self.log.error(msg)
+                raise FileNotFoundError(msg)
 
-                dataframes += [current_dataframe]
-                self.log.info('Loaded {} records from <{}>.'.format(dataframes[-1].shape[0], filename))
+        return pd.concat(dataframes)
+
+    def _load_lazy_data(self):
+        """
+        Makes sure every file has valid cache entry and opens them as single lazy dataframe.
+
+        Returns:
+            LazyDataFrame instance or None if data can not be served lazily (caching disabled or data
+            not supported by cache).
+        """
+        if self.csv_cache_dir is None:
+            self.log.warning('Lazy data requires `csv_cache_dir` to be set, loading data into memory.')
+            return None
+
+        paths = []
+        for filename in self.filename:
+            try:
+                assert filename and os.path.isfile(filename)
+                cache_path = self._csv_cache_path(filename)
+                if load_columns(cache_path) is None:
+                    # Parse and cache, parsed dataframe gets released right away:
+                    self._load_csv_file(filename)
+
+                paths.append(cache_path)
 
             except:
                 msg = 'Data file <{}> not specified / not found / parser error.'.format(str(filename))
                 self.log.error(msg)
                 raise FileNotFoundError(msg)
 
-        self.data = pd.concat(dataframes)
-        data_range = pd.to_datetime(self.data.index)
-        self.total_num_records = self.data.shape[0]
-        self.data_range_delta = (data_range[-1] - data_range[0]).to_pytimedelta()
+        try:
+            data = LazyDataFrame(paths, cache_size=self.lazy_cache_size)
+
+        except OSError as e:
+            self.log.warning('Failed to open lazy data: {}, loading data into memory.'.format(e))
+            return None
+
+        self.log.info('Opened {} records from <{}> as lazy data.'.format(data.shape[0], self.filename))
+
+        return data
+
+    def _csv_read_params(self):
+        return dict(
+            sep=self.sep,
+            header=self.header,
+            index_col=self.index_col,
+            parse_dates=self.parse_dates,
+            names=self.names,
+        )
+
+    def _csv_cache_path(self, filename):
+        """
+        Returns:
+            str, cache entry path for CSV file.
+        """
+        return os.path.join(self.csv_cache_dir, csv_cache_key(filename, self._csv_read_params()))
+
+    def _load_csv_file(self, filename):
+        """
+        Parses single CSV file or loads it from cache, if cached version is valid.
+
+        Args:
+            filename:   str, csv data filename
+
+        Returns:
+            pd.DataFrame with duplicate datetime records removed
+        """
+        read_params = self._csv_read_params()
+        cache_path = None
+        if self.csv_cache_dir is not None:
+            cache_path = self._csv_cache_path(filename)
+            dataframe = load_dataframe(cache_path)
+            if dataframe is not None:
+                self.log.debug('<{}> loaded from cache: {}'.format(filename, cache_path))
+                return dataframe
+
+        dataframe = pd.read_csv(filename, **read_params)
+
+        # Check and remove duplicate datetime indexes:
+        duplicates = dataframe.index.duplicated(keep='first')
+        how_bad = duplicates.sum()
+        if how_bad > 0:
+            dataframe = dataframe[~duplicates]
+            self.log.warning('Found {} duplicated date_time records in <{}>.\
+             Removed all but first occurrences.'.format(how_bad, filename))
+
+        if cache_path is not None:
+            try:
+                if save_dataframe(dataframe, cache_path):
+                    self.log.debug('<{}> cached to: {}'.format(filename, cache_path))
+
+            except OSError as e:
+                self.log.warning('Failed to cache <{}>: {}'.format(filename, e))
+
+        return dataframe
 
     def describe(self):
         """
@@ -480,9 +599,29 @@ class BTgymBaseData:
             - max value
 
         for every data column.
+
+        Statistic is cached until data changes. Samples drawn from other sample (e.g. episodes of trial)
+        derive count, mean and std from prefix sums of parent data, see DataStat.
         """
-        # Pretty straightforward, using standard pandas utility.
-        # The only caveat here is that if actual data has not been loaded yet, need to load, describe and unload again,
+        if self.data is None:
+            source = tuple([self.filename] if isinstance(self.filename, str) else self.filename or [])
+            is_cached = isinstance(self._data_stat_source, tuple) and source == self._data_stat_source
+
+        else:
+            source = self.data
+            is_cached = source is self._data_stat_source
+
+        if is_cached and self.data_stat is not None:
+            return self.data_stat
+
+        parent_stat = self._get_parent_stat()
+        if parent_stat is not None:
+            stat, first_row, last_row = parent_stat
+            self.data_stat = stat.describe(first_row, last_row)
+            self._data_stat_source = source
+            return self.data_stat
+
+        # If actual data has not been loaded yet, need to load, describe and unload again,
         # thus avoiding passing big files to BT server:
         flush_data = False
         try:
@@ -493,7 +632,15 @@ class BTgymBaseData:
             self.read_csv()
             flush_data = True
 
-        self.data_stat = self.data.describe()
+        if isinstance(self.data, pd.DataFrame):
+            # Top-level dataset statistic is not kept: it would stay resident for dataset lifetime:
+            self.data_stat = self.get_stat(keep=not flush_data and self._links_samples()).describe()
+
+        else:
+            # Lazy data is described column by column:
+            self.data_stat = self.data.describe()
+
+        self._data_stat_source = source
         self.log.info('Data summary:\n{}'.format(self.data_stat.to_string()))
 
         if flush_data:
@@ -502,6 +649,62 @@ class BTgymBaseData:
 
         return self.data_stat
 
+    def get_stat(self, keep=True):
+        """
+        Returns DataStat instance for loaded data, cached until data changes.
+
+        Args:
+            keep:   bool, cache newly made instance.
+        """
+        if self._stat is not None and self._stat[0] is self.data:
+            return self._stat[-1]
+
+        stat = DataStat(self.data)
+        if keep:
+            self._stat = (self.data, stat)
+
+        return stat
+
+    def _links_samples(self):
+        """
+        Returns:
+            True if samples of this instance derive their statistic from it: only instances being samples
+            themselves (trials) do, so that top-level dataset never holds DataStat for its whole data.
+        """
+        return self.metadata.get('type') is not None
+
+    def _link_sample(self, sample, first_row, last_row):
+        """
+        Lets sample derive its statistic from this instance data.
+
+        Args:
+            sample:     instance holding self.data[first_row:last_row].
+        """
+        if self._links_samples():
+            sample._parent_stat = (self, self.data, first_row, last_row, sample.data)
+
+    def _get_parent_stat(self):
+        """
+        Returns:
+            (parent DataStat, first_row, last_row) tuple or None if instance is not a sample or either
+            sample or parent data has been changed.
+        """
+        if self._parent_stat is None:
+            return None
+
+        parent, parent_data, first_row, last_row, data = self._parent_stat
+        if parent.data is not parent_data or self.data is not data or not isinstance(parent_data, pd.DataFrame):
+            return None
+
+        return parent.get_stat(), first_row, last_row
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Parent instance would drag whole dataset along; prefix arrays are cheap to rebuild:
+        state['_parent_stat'] = None
+        state['_stat'] = None
+        return state
+
     def to_btfeed(self):
         """
         Performs BTgymData-->bt.feed conversion.
@@ -516,7 +719,7 @@ class BTgymBaseData:
             return timeframe
         try:
             assert not self.data.empty
-            btfeed = btfeeds.PandasDirectData(
+            btfeed = BTgymArrayData(
                 dataname=self.data,
                 timeframe=bt_timeframe(self.timeframe),
                 datetime=self.datetime,
@@ -644,6 +847,219 @@ class BTgymBaseData:
 
         return self.sample_instance
 
+    def _get_timestamps(self):
+        """
+        Returns:
+            int64 array of data index POSIX nanosecond timestamps (wall time for timezone-naive index),
+            cached until data changes.
+        """
+        if self._time_index is None or self._time_index[0] is not self.data:
+            self._time_index = (self.data, np.asarray(self.data.index.asi8, dtype=np.int64), None)
+
+        return self._time_index[1]
+
+    def _get_day_start_rows(self):
+        """
+        Returns:
+            int array holding, for every data row, row of record nearest to the beginning of its day,
+            same as index.get_loc(index[row].date(), method='nearest'); cached until data changes.
+        """
+        timestamps = self._get_timestamps()
+        if self._time_index[-1] is None:
+            num_rows = timestamps.shape[0]
+            day_start = self.data.index.normalize().asi8
+            left = np.searchsorted(timestamps, day_start, side='right') - 1
+            right = np.searchsorted(timestamps, day_start, side='left')
+            left_distance = day_start - timestamps[np.clip(left, 0, num_rows - 1)]
+            right_distance = timestamps[np.clip(right, 0, num_rows - 1)] - day_start
+            use_left = (left >= 0) & ((right >= num_rows) | (left_distance < right_distance))
+            self._time_index = (self.data, timestamps, np.where(use_left, left, right))
+
+        return self._time_index[-1]
+
+    def get_row(self, time, method='nearest'):
+        """
+        Resolves point in time to data row by binary search over data timestamps,
+        same as index.get_loc(time, method=method) does.
+
+        Args:
+            time:       datetime, date, pd.Timestamp or np.datetime64; timezone-naive time is taken as
+                        data timezone one;
+            method:     str, `ffill` (`pad`) - last row at or before `time`, `backfill` (`bfill`) - first row
+                        at or after `time`, `nearest` - nearest row, later one on tie.
+
+        Returns:
+            int, row number.
+
+        Raises:
+            KeyError if there is no such row.
+        """
+        timestamps = self._get_timestamps()
+        time = pd.Timestamp(time)
+        if self.data.index.tz is not None and time.tz is None:
+            time = time.tz_localize(self.data.index.tz)
+
+        value = time.value
+        num_rows = timestamps.shape[0]
+        left = int(np.searchsorted(timestamps, value, side='right')) - 1
+        right = int(np.searchsorted(timestamps, value, side='left'))
+
+        if method in ['ffill', 'pad']:
+            row = left
+
+        elif method in ['backfill', 'bfill']:
+            row = right
+
+        elif method == 'nearest':
+            if left < 0:
+                row = right
+
+            elif right >= num_rows:
+                row = left
+
+            else:
+                row = left if value - timestamps[left] < timestamps[right] - value else right
+
+        else:
+            raise ValueError('Unknown lookup method: {}'.format(method))
+
+        if not 0 <= row < num_rows:
+            raise KeyError(time)
+
+        return row
+
+    def _get_start_rows(self, num_records, check_max_duration=False):
+        """
+        Computes, for every data row, sample start row and whether sample drawn at that row is acceptable
+        with respect to `start_weekdays`, `start_00` and time gap sampling params. Result is cached until
+        next reset().
+
+        Args:
+            num_records:            int, sample number of records;
+            check_max_duration:     bool, if True - reject samples exceeding maximum duration by more than time gap,
+                                    reject samples falling short of maximum duration by more than time gap otherwise.
+
+        Returns:
+            tuple of int arrays: (sample first row for every drawn row, valid drawn rows mask).
+        """
+        key = (id(self.data), tuple(sorted(self.start_weekdays)), self.start_00, num_records, check_max_duration)
+        try:
+            return self._start_rows_cache[key]
+
+        except KeyError:
+            pass
+
+        timestamps = self._get_timestamps()
+        num_rows = timestamps.shape[0]
+
+        if self.start_00:
+            first_rows = self._get_day_start_rows()
+
+        else:
+            first_rows = np.arange(num_rows)
+
+        # Sample is data[first_row: first_row + num_records] slice, with negative end counted from data end:
+        end_rows = first_rows + num_records
+        end_rows = np.where(end_rows < 0, end_rows + num_rows, end_rows)
+        last_rows = np.maximum(np.minimum(end_rows, num_rows) - 1, first_rows)
+        durations = timestamps[last_rows] - timestamps[first_rows]
+        max_duration = pd.Timedelta(self.max_sample_len_delta).value
+        max_gap = pd.Timedelta(self.max_time_gap).value
+
+        if check_max_duration:
+            duration_ok = durations - max_duration < max_gap
+
+        else:
+            duration_ok = max_duration - durations < max_gap
+
+        valid = np.isin(self.data.index.weekday, list(self.start_weekdays)) & duration_ok
+
+        self._start_rows_cache[key] = first_rows, valid
+
+        return first_rows, valid
+
+    def _draw_start_row(self, interval, num_records, b_alpha=1.0, b_beta=1.0, check_max_duration=False):
+        """
+        Draws sample start row from valid ones, such as drawn row is:
+            interval[0] + int((interval[-1] - interval[0] - num_records) * x), x ~ B(b_alpha, b_beta),
+        conditioned on being valid. This is exactly the distribution of resampling until all conditions are met,
+        obtained with single binary search over cumulative B-distribution bins masses of valid rows.
+
+        Args:
+            interval:               tuple, list or 1d-array of integers of length 2;
+            num_records:            int, sample number of records;
+            b_alpha:                float > 0, B-distribution alpha param;
+            b_beta:                 float > 0, B-distribution beta param;
+            check_max_duration:     bool, see _get_start_rows().
+
+        Returns:
+            tuple (drawn row, sample first row) or None if there is no valid start row.
+        """
+        key = (
+            id(self.data),
+            tuple(sorted(self.start_weekdays)),
+            self.start_00,
+            interval[0],
+            interval[-1],
+            num_records,
+            b_alpha,
+            b_beta,
+            check_max_duration
+        )
+        try:
+            rows, cumulative_mass = self._start_mass_cache[key]
+
+        except KeyError:
+            first_rows, valid = self._get_start_rows(num_records, check_max_duration)
+            span = interval[-1] - interval[0] - num_records
+            num_bins = max(abs(span), 1)
+            if span != 0:
+                mass = np.diff(betainc(b_alpha, b_beta, np.arange(num_bins + 1) / num_bins))
+
+            else:
+                mass = np.ones(1)
+
+            # Python int() truncates toward zero, so bins go backwards for negative span:
+            rows = interval[0] + np.sign(span) * np.arange(num_bins)
+            in_range = (rows >= 0) & (rows < valid.shape[0])
+            rows = np.clip(rows, 0, valid.shape[0] - 1)
+            cumulative_mass = np.cumsum(mass * (in_range & valid[rows]))
+
+            if len(self._start_mass_cache) >= 64:
+                self._start_mass_cache.clear()
+            self._start_mass_cache[key] = rows, cumulative_mass
+
+        if not cumulative_mass[-1] > 0:
+            return None
+
+        i = np.searchsorted(cumulative_mass, random_sample() * cumulative_mass[-1], side='right')
+        row = int(rows[min(i, rows.shape[0] - 1)])
+
+        return row, int(self._get_start_rows(num_records, check_max_duration)[0][row])
+
+    def _first_start_row(self, interval, num_records, check_max_duration=False):
+        """
+        Finds valid sample start row closest to beginning of interval.
+
+        Args:
+            interval:               tuple, list or 1d-array of integers of length 2;
+            num_records:            int, sample number of records;
+            check_max_duration:     bool, see _get_start_rows().
+
+        Returns:
+            tuple (found row, sample first row) or None if there is no valid start row.
+        """
+        first_rows, valid = self._get_start_rows(num_records, check_max_duration)
+        lower = max(interval[0], 0)
+        upper = min(interval[-1] + 1, valid.shape[0])
+        candidates = np.flatnonzero(valid[lower:upper])
+        if candidates.shape[0] == 0:
+            return None
+
+        row = lower + int(candidates[0])
+
+        return row, int(first_rows[row])
+
     def _sample_random(
             self,
             sample_type=0,
@@ -677,87 +1093,49 @@ class BTgymBaseData:
         self.log.debug('Respective number of steps: {}.'.format(self.sample_num_records))
         self.log.debug('Maximum allowed data time gap set to: {}.\n'.format(self.max_time_gap))
 
-        sampled_data = None
-        sample_len = 0
-
-        # Sanity check param:
-        max_attempts = 100
-        attempts = 0
-
-        # # Keep sampling random enter points until all conditions are met:
-        while attempts <= max_attempts:
-
-            # Randomly sample record (row) from entire datafeed:
-            first_row = int((self.data.shape[0] - self.sample_num_records - 1) * random.random())
-            sample_first_day = self.data[first_row:first_row + 1].index[0]
-            self.log.debug('Sample start: {}, weekday: {}.'.format(sample_first_day, sample_first_day.weekday()))
+        # Uniformly draw from valid starts of entire datafeed:
+        start = self._draw_start_row(
+            interval=[0, self.data.shape[0] - 1],
+            num_records=self.sample_num_records,
+        )
+        if start is None:
+            msg = (
+                'No valid sample start found within entire dataset.\n' +
+                'Sample number of records: {}\n' +
+                'Maximum sample duration: {}\n' +
+                'Maximum data time gap: {}\n' +
+                'Hint: check sampling params / dataset consistency.'
+            ).format(self.sample_num_records, self.max_sample_len_delta, self.max_time_gap)
+            self.log.error(msg)
+            raise RuntimeError(msg)
 
-            # Keep sampling until good day:
-            while not sample_first_day.weekday() in self.start_weekdays and attempts <= max_attempts:
-                self.log.debug('Not a good day to start, resampling...')
-                first_row = int((self.data.shape[0] - self.sample_num_records - 1) * random.random())
-                sample_first_day = self.data[first_row:first_row + 1].index[0]
-                self.log.debug('Sample start: {}, weekday: {}.'.format(sample_first_day, sample_first_day.weekday()))
-                attempts +=1
+        raw_row, first_row = start
+        sample_first_day = self.data.index[raw_row]
+        self.log.debug('Sample start: {}, weekday: {}.'.format(sample_first_day, sample_first_day.weekday()))
 
-            # Check if managed to get proper weekday:
-            assert attempts <= max_attempts, \
-                'Quitting after {} sampling attempts. Hint: check sampling params / dataset consistency.'. \
-                format(attempts)
+        if self.start_00:
+            adj_timedate = sample_first_day.date()
+            self.log.debug('Start time adjusted to <00:00>')
 
-            # If 00 option set, get index of first record of that day:
-            if self.start_00:
-                adj_timedate = sample_first_day.date()
-                self.log.debug('Start time adjusted to <00:00>')
+        else:
+            adj_timedate = sample_first_day
 
-            else:
-                adj_timedate = sample_first_day
-
-            first_row = self.data.index.get_loc(adj_timedate, method='nearest')
-
-            # Easy part:
-            last_row = first_row + self.sample_num_records  # + 1
-            sampled_data = self.data[first_row: last_row]
-            sample_len = (sampled_data.index[-1] - sampled_data.index[0]).to_pytimedelta()
-            self.log.debug('Actual sample duration: {}.'.format(sample_len, ))
-            self.log.debug('Total sample time gap: {}.'.format(self.max_sample_len_delta - sample_len))
-
-            # Perform data gap check:
-            if self.max_sample_len_delta - sample_len < self.max_time_gap:
-                self.log.debug('Sample accepted.')
-                # If sample OK - compose and return sample:
-                new_instance = self.nested_class_ref(**self.nested_params)
-                new_instance.filename = name + 'n{}_at_{}'.format(self.sample_num, adj_timedate)
-                self.log.info('Sample id: <{}>.'.format(new_instance.filename))
-                new_instance.data = sampled_data
-                new_instance.metadata['type'] = 'random_sample'
-                new_instance.metadata['first_row'] = first_row
-                new_instance.metadata['last_row'] = last_row
-
-                return new_instance
+        last_row = first_row + self.sample_num_records  # + 1
+        sampled_data = self.data[first_row: last_row]
+        self.log.debug(
+            'Actual sample duration: {}.'.format((sampled_data.index[-1] - sampled_data.index[0]).to_pytimedelta())
+        )
 
-            else:
-                self.log.debug('Duration too big, resampling...\n')
-                attempts += 1
-
-        # Got here -> sanity check failed:
-        msg = (
-            '\nQuitting after {} sampling attempts.\n' +
-            'Full sample duration: {}\n' +
-            'Total sample time gap: {}\n' +
-            'Sample start time: {}\n' +
-            'Sample finish time: {}\n' +
-            'Hint: check sampling params / dataset consistency.'
-        ).format(
-            attempts,
-            sample_len,
-            sample_len - self.max_sample_len_delta,
-            sampled_data.index[0],
-            sampled_data.index[-1]
+        new_instance = self.nested_class_ref(**self.nested_params)
+        new_instance.filename = name + 'n{}_at_{}'.format(self.sample_num, adj_timedate)
+        self.log.info('Sample id: <{}>.'.format(new_instance.filename))
+        new_instance.data = sampled_data
+        new_instance.metadata['type'] = 'random_sample'
+        new_instance.metadata['first_row'] = first_row
+        new_instance.metadata['last_row'] = last_row
+        self._link_sample(new_instance, first_row, last_row)
 
-        )
-        self.log.error(msg)
-        raise RuntimeError(msg)
+        return new_instance
 
     def _sample_interval(
             self,
@@ -826,117 +1204,62 @@ class BTgymBaseData:
         self.log.debug('Sample number of steps (adjusted to interval): {}.'.format(sample_num_records))
         self.log.debug('Maximum allowed data time gap set to: {}.\n'.format(self.max_time_gap))
 
-        sampled_data = None
-        sample_len = 0
-
-        # Sanity check param:
-        max_attempts = 100
-        attempts = 0
-
-        # # Keep sampling random enter points until all conditions are met:
-        while attempts <= max_attempts:
-
-            first_row = interval[0] + int(
-                (interval[-1] - interval[0] - sample_num_records) * random_beta(a=b_alpha, b=b_beta)
-            )
-
-            #print('_sample_interval_sample_num_records: ', sample_num_records)
-            #print('_sample_interval_first_row: ', first_row)
-
-            sample_first_day = self.data[first_row:first_row + 1].index[0]
-            self.log.debug(
-                'Sample start row: {}, day: {}, weekday: {}.'.
-                format(first_row, sample_first_day, sample_first_day.weekday())
-            )
-
-            # Keep sampling until good day:
-            while not sample_first_day.weekday() in self.start_weekdays and attempts <= max_attempts:
-                self.log.debug('Not a good day to start, resampling...')
-                first_row = interval[0] + round(
-                    (interval[-1] - interval[0] - sample_num_records) * random_beta(a=b_alpha, b=b_beta)
-                )
-                #print('r_sample_interval_sample_num_records: ', sample_num_records)
-                #print('r_sample_interval_first_row: ', first_row)
-                sample_first_day = self.data[first_row:first_row + 1].index[0]
-                self.log.debug(
-                    'Sample start row: {}, day: {}, weekday: {}.'.
-                    format(first_row, sample_first_day, sample_first_day.weekday())
-                )
-                attempts += 1
-
-            # Check if managed to get proper weekday:
-            try:
-                assert attempts <= max_attempts
-
-            except AssertionError:
-                self.log.exception(
-                    'Quitting after {} sampling attempts. Hint: check sampling params / dataset consistency.'.
-                    format(attempts)
-                )
-                raise RuntimeError
+        start = self._draw_start_row(
+            interval=interval,
+            num_records=sample_num_records,
+            b_alpha=b_alpha,
+            b_beta=b_beta,
+        )
+        if start is None:
+            msg = (
+                'No valid sample start found within interval: {}.\n' +
+                'Sample number of records: {}\n' +
+                'Maximum sample duration: {}\n' +
+                'Maximum data time gap: {}\n' +
+                'Hint: check sampling params / dataset consistency.'
+            ).format(interval, sample_num_records, self.max_sample_len_delta, self.max_time_gap)
+            self.log.error(msg)
+            raise RuntimeError(msg)
 
-            # If 00 option set, get index of first record of that day:
-            if self.start_00:
-                adj_timedate = sample_first_day.date()
-                self.log.debug('Start time adjusted to <00:00>')
-                first_row = self.data.index.get_loc(adj_timedate, method='nearest')
+        raw_row, first_row = start
+        sample_first_day = self.data.index[raw_row]
+        self.log.debug(
+            'Sample start row: {}, day: {}, weekday: {}.'.
+            format(raw_row, sample_first_day, sample_first_day.weekday())
+        )
 
-            else:
-                adj_timedate = sample_first_day
+        # If 00 option set, first record of that day has been taken:
+        if self.start_00:
+            adj_timedate = sample_first_day.date()
+            self.log.debug('Start time adjusted to <00:00>')
 
-            # first_row = self.data.index.get_loc(adj_timedate, method='nearest')
+        else:
+            adj_timedate = sample_first_day
 
-            # Easy part:
-            last_row = first_row + sample_num_records  # + 1
-            sampled_data = self.data[first_row: last_row]
+        last_row = first_row + sample_num_records  # + 1
+        sampled_data = self.data[first_row: last_row]
 
-            self.log.debug(
-                'first_row: {}, last_row: {}, data_shape: {}'.format(
-                    first_row,
-                    last_row,
-                    sampled_data.shape
-                )
+        self.log.debug(
+            'first_row: {}, last_row: {}, data_shape: {}'.format(
+                first_row,
+                last_row,
+                sampled_data.shape
             )
-            sample_len = (sampled_data.index[-1] - sampled_data.index[0]).to_pytimedelta()
-            self.log.debug('Actual sample duration: {}.'.format(sample_len))
-            self.log.debug('Total sample time gap: {}.'.format(self.max_sample_len_delta - sample_len))
-
-            # Perform data gap check:
-            if self.max_sample_len_delta - sample_len < self.max_time_gap:
-                self.log.debug('Sample accepted.')
-                # If sample OK - return new dataset:
-                new_instance = self.nested_class_ref(**self.nested_params)
-                new_instance.filename = name + 'num_{}_at_{}'.format(self.sample_num, adj_timedate)
-                self.log.info('New sample id: <{}>.'.format(new_instance.filename))
-                new_instance.data = sampled_data
-                new_instance.metadata['type'] = 'interval_sample'
-                new_instance.metadata['first_row'] = first_row
-                new_instance.metadata['last_row'] = last_row
-
-                return new_instance
+        )
+        self.log.debug(
+            'Actual sample duration: {}.'.format((sampled_data.index[-1] - sampled_data.index[0]).to_pytimedelta())
+        )
 
-            else:
-                self.log.debug('Attempt {}: gap is too big, resampling, ...\n'.format(attempts))
-                attempts += 1
-
-        # Got here -> sanity check failed:
-        msg = (
-                '\nQuitting after {} sampling attempts.\n' +
-                'Full sample duration: {}\n' +
-                'Total sample time gap: {}\n' +
-                'Sample start time: {}\n' +
-                'Sample finish time: {}\n' +
-                'Hint: check sampling params / dataset consistency.'
-        ).format(
-            attempts,
-            sample_len,
-            sample_len - self.max_sample_len_delta,
-            sampled_data.index[0],
-            sampled_data.index[-1]
+        new_instance = self.nested_class_ref(**self.nested_params)
+        new_instance.filename = name + 'num_{}_at_{}'.format(self.sample_num, adj_timedate)
+        self.log.info('New sample id: <{}>.'.format(new_instance.filename))
+        new_instance.data = sampled_data
+        new_instance.metadata['type'] = 'interval_sample'
+        new_instance.metadata['first_row'] = first_row
+        new_instance.metadata['last_row'] = last_row
+        self._link_sample(new_instance, first_row, last_row)
 
-        )
-        self.log.error(msg)
-        raise RuntimeError(msg)
+        return new_instance
 
     def _sample_aligned_interval(
             self,
@@ -1002,107 +1325,59 @@ class BTgymBaseData:
         self.log.debug('Respective number of steps: {}.'.format(sample_num_records))
         self.log.debug('Maximum allowed data time gap set to: {}.\n'.format(self.max_time_gap))
 
-        # Sanity check param:
         if align_left:
-            max_attempts = interval[-1] - interval[0]
-        else:
-            # Sanity check:
-            max_attempts = 100
-
-        attempts = 0
-        align_shift = 0
-
-        # Sample enter point as close to beginning  until all conditions are met:
-        while attempts <= max_attempts:
-            if align_left:
-                first_row = interval[0] + align_shift
-
-            else:
-                first_row = interval[0] + int(
-                    (interval[-1] - interval[0] - sample_num_records) * random_beta(a=b_alpha, b=b_beta)
-                )
-
-            #print('_sample_interval_sample_num_records: ', sample_num_records)
-            self.log.debug('_sample_interval_first_row: {}'.format(first_row))
-
-            sample_first_day = self.data[first_row:first_row + 1].index[0]
-            self.log.debug('Sample start: {}, weekday: {}.'.format(sample_first_day, sample_first_day.weekday()))
-
-            # Keep sampling until good day:
-            while not sample_first_day.weekday() in self.start_weekdays and attempts <= max_attempts:
-                align_shift += 1
-
-                self.log.debug('Not a good day to start, resampling...')
-
-                if align_left:
-                    first_row = interval[0] + align_shift
-                else:
-
-                    first_row = interval[0] + int(
-                        (interval[-1] - interval[0] - sample_num_records) * random_beta(a=b_alpha, b=b_beta)
-                    )
-                #print('r_sample_interval_sample_num_records: ', sample_num_records)
-                self.log.debug('_sample_interval_first_row: {}'.format(first_row))
-
-                sample_first_day = self.data[first_row:first_row + 1].index[0]
+            # Valid start as close to beginning of interval as possible:
+            start = self._first_start_row(
+                interval=interval,
+                num_records=sample_num_records,
+                check_max_duration=True,
+            )
 
-                self.log.debug('Sample start: {}, weekday: {}.'.format(sample_first_day, sample_first_day.weekday()))
+        else:
+            start = self._draw_start_row(
+                interval=interval,
+                num_records=sample_num_records,
+                b_alpha=b_alpha,
+                b_beta=b_beta,
+                check_max_duration=True,
+            )
 
-                attempts += 1
+        if start is None:
+            msg = (
+                'No valid sample start found within interval: {}.\n' +
+                'Hint: check sampling params / dataset consistency.'
+            ).format(interval)
+            self.log.error(msg)
+            raise RuntimeError(msg)
 
-            # Check if managed to get proper weekday:
-            try:
-                assert attempts <= max_attempts
+        raw_row, first_row = start
+        sample_first_day = self.data.index[raw_row]
+        self.log.debug('Sample start: {}, weekday: {}.'.format(sample_first_day, sample_first_day.weekday()))
 
-            except AssertionError:
-                self.log.exception(
-                    'Quitting after {} sampling attempts. Hint: check sampling params / dataset consistency.'.
-                    format(attempts)
-                )
-                raise RuntimeError
+        # If 00 option set, first record of that day has been taken:
+        if self.start_00:
+            adj_timedate = sample_first_day.date()
+            self.log.debug('Start time adjusted to <00:00>')
 
-            # If 00 option set, get index of first record of that day:
-            if self.start_00:
-                adj_timedate = sample_first_day.date()
-                self.log.debug('Start time adjusted to <00:00>')
-                first_row = self.data.index.get_loc(adj_timedate, method='nearest')
+        else:
+            adj_timedate = sample_first_day
 
-            else:
-                adj_timedate = sample_first_day
-
-            # first_row = self.data.index.get_loc(adj_timedate, method='nearest')
-
-            # Easy part:
-            last_row = first_row + sample_num_records  # + 1
-            sampled_data = self.data[first_row: last_row]
-            sample_len = (sampled_data.index[-1] - sampled_data.index[0]).to_pytimedelta()
-            self.log.debug('Actual sample duration: {}.'.format(sample_len))
-            self.log.debug('Total sample time gap: {}.'.format(sample_len - self.max_sample_len_delta))
-
-            # Perform data gap check:
-            if sample_len - self.max_sample_len_delta < self.max_time_gap:
-                self.log.debug('Sample accepted.')
-                # If sample OK - return new dataset:
-                new_instance = self.nested_class_ref(**self.nested_params)
-                new_instance.filename = name + 'num_{}_at_{}'.format(self.sample_num, adj_timedate)
-                self.log.info('New sample id: <{}>.'.format(new_instance.filename))
-                new_instance.data = sampled_data
-                new_instance.metadata['type'] = 'interval_sample'
-                new_instance.metadata['first_row'] = first_row
-                new_instance.metadata['last_row'] = last_row
-
-                return new_instance
+        last_row = first_row + sample_num_records  # + 1
+        sampled_data = self.data[first_row: last_row]
+        self.log.debug(
+            'Actual sample duration: {}.'.format((sampled_data.index[-1] - sampled_data.index[0]).to_pytimedelta())
+        )
 
-            else:
-                self.log.debug('Attempt {}: duration too big, resampling, ...\n'.format(attempts))
-                attempts += 1
-                align_shift += 1
+        new_instance = self.nested_class_ref(**self.nested_params)
+        new_instance.filename = name + 'num_{}_at_{}'.format(self.sample_num, adj_timedate)
+        self.log.info('New sample id: <{}>.'.format(new_instance.filename))
+        new_instance.data = sampled_data
+        new_instance.metadata['type'] = 'interval_sample'
+        new_instance.metadata['first_row'] = first_row
+        new_instance.metadata['last_row'] = last_row
+        self._link_sample(new_instance, first_row, last_row)
 
-        # Got here -> sanity check failed:
-        msg = ('Quitting after {} sampling attempts.' +
-               'Hint: check sampling params / dataset consistency.').format(attempts)
-        self.log.error(msg)
-        raise RuntimeError(msg)
+        return new_instance
 
     def _sample_exact_interval(self, interval, name='interval_sample_', **kwargs):
         """
@@ -1145,6 +1420,7 @@ class BTgymBaseData:
         new_instance.metadata['type'] = 'interval_sample'
         new_instance.metadata['first_row'] = first_row
         new_instance.metadata['last_row'] = last_row
+        self._link_sample(new_instance, first_row, last_row)
 
         return new_instance
 
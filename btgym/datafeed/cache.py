@@ -0,0 +1,170 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bump when on-disk layout changes, invalidates all existing entries:
+CACHE_VERSION = 1
+
+
+def csv_cache_key(filename, read_params):
+    """
+    Makes cache entry key for parsed CSV file.
+
+    Args:
+        filename:       str, path to CSV file;
+        read_params:    dictionary of parsing parameters affecting resulting dataframe.
+
+    Returns:
+        str, hex digest of file absolute path, modification time, size, parsing parameters and cache version.
+    """
+    stat = os.stat(filename)
+    key = repr(
+        (
+            CACHE_VERSION,
+            os.path.abspath(filename),
+            stat.st_mtime_ns,
+            stat.st_size,
+            sorted(read_params.items()),
+        )
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def save_dataframe(dataframe, path):
+    """
+    Saves dataframe with datetime index as set of .npy files, one per column, plus int64 nanosecond timestamps.
+    Entry gets written to temporary directory first and moved to `path` at once, so concurrent readers
+    never see partial entry.
+
+    Args:
+        dataframe:  pd.DataFrame with DatetimeIndex and numeric columns named by strings;
+        path:       str, entry directory.
+
+    Returns:
+        True if entry has been saved, False if dataframe is not supported by cache.
+    """
+    if not isinstance(dataframe.index, pd.DatetimeIndex):
+        return False
+
+    if any(dtype.kind not in 'biuf' for dtype in dataframe.dtypes):
+        return False
+
+    if any(not isinstance(column, str) for column in dataframe.columns):
+        return False
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=parent)
+    try:
+        np.save(os.path.join(tmp_path, 'index.npy'), np.ascontiguousarray(dataframe.index.asi8))
+        for i, column in enumerate(dataframe.columns):
+            np.save(os.path.join(tmp_path, 'column_{}.npy'.format(i)), dataframe[column].values)
+
+        meta = dict(
+            version=CACHE_VERSION,
+            columns=list(dataframe.columns),
+            index_name=dataframe.index.name,
+            tz=None if dataframe.index.tz is None else str(dataframe.index.tz),
+            num_records=dataframe.shape[0],
+        )
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        try:
+            os.rename(tmp_path, path)
+
+        except OSError:
+            # Someone else has already written same entry:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    return True
+
+
+def load_columns(path, mmap_mode='r'):
+    """
+    Loads cache entry as arrays.
+
+    Args:
+        path:       str, entry directory;
+        mmap_mode:  np.load() memory-mapping mode, None to read arrays into memory.
+
+    Returns:
+        tuple (int64 array of POSIX nanosecond timestamps, dictionary {column: array}, entry metadata)
+        or None if there is no valid entry at `path`.
+    """
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        if meta['version'] != CACHE_VERSION:
+            return None
+
+        index = np.load(os.path.join(path, 'index.npy'), mmap_mode=mmap_mode)
+        columns = {
+            column: np.load(os.path.join(path, 'column_{}.npy'.format(i)), mmap_mode=mmap_mode)
+            for i, column in enumerate(meta['columns'])
+        }
+
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if any(array.shape != index.shape for array in columns.values()):
+        return None
+
+    return index, columns, meta
+
+
+def load_dataframe(path, mmap_mode='r'):
+    """
+    Loads cache entry as dataframe. Columns are read via memory-mapping and copied into dataframe at once,
+    no parsing involved.
+
+    Args:
+        path:       str, entry directory;
+        mmap_mode:  np.load() memory-mapping mode.
+
+    Returns:
+        pd.DataFrame or None if there is no valid entry at `path`.
+    """
+    entry = load_columns(path, mmap_mode=mmap_mode)
+    if entry is None:
+        return None
+
+    index, columns, meta = entry
+    datetime_index = pd.DatetimeIndex(np.asarray(index).view('datetime64[ns]'), name=meta['index_name'])
+    if meta['tz'] is not None:
+        datetime_index = datetime_index.tz_localize('UTC').tz_convert(meta['tz'])
+
+    return pd.DataFrame(
+        {column: np.array(array) for column, array in columns.items()},
+        index=datetime_index,
+        columns=meta['columns'],
+    )
@@ -75,10 +75,7 @@ class BTgymCasualTrial(BTgymDataTrial):
             data row corresponded to current global_time
         """
         if self.is_ready:
-            return self.data.index.get_loc(
-                datetime.datetime.fromtimestamp(self.global_timestamp),
-                method='backfill'
-            )
+            return self.get_row(datetime.datetime.fromtimestamp(self.global_timestamp), method='backfill')
 
         else:
             return 0
@@ -359,10 +356,7 @@ class BTgymCasualDataDomain(BTgymRandomDataDomain):
             data row corresponded to current global_time
         """
         if self.is_ready:
-            return self.data.index.get_loc(
-                datetime.datetime.fromtimestamp(self.global_timestamp),
-                method='backfill'
-            )
+            return self.get_row(datetime.datetime.fromtimestamp(self.global_timestamp), method='backfill')
 
         else:
             return 0
@@ -450,7 +444,7 @@ class BTgymCasualDataDomain(BTgymRandomDataDomain):
         self.final_timestamp = self.data.index[-self.test_num_records].timestamp()
 
         if self.frozen_time_split is not None:
-            frozen_index = self.data.index.get_loc(self.frozen_time_split, method='ffill')
+            frozen_index = self.get_row(self.frozen_time_split, method='ffill')
             self.frozen_split_timestamp = self.data.index[frozen_index].timestamp()
             self.set_global_timestamp(self.frozen_split_timestamp)
 
@@ -0,0 +1,121 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import numpy as np
+import pandas as pd
+
+from backtrader.feed import DataBase
+
+# datetime.date(1970, 1, 1).toordinal():
+_EPOCH_ORDINAL = 719163
+_NS_PER_DAY = 86400 * 10 ** 9
+
+
+def date2num_array(index):
+    """
+    Vectorized backtrader.utils.date2num(): converts datetime index to backtrader float datetimes.
+    Float operations follow same order as original function does, so results are equal bit to bit.
+
+    Args:
+        index:  pd.DatetimeIndex; timezone-aware index is converted to UTC, as date2num() does.
+
+    Returns:
+        float64 array
+    """
+    # For tz-aware index asi8 is UTC already:
+    timestamps = np.asarray(pd.DatetimeIndex(index).asi8, dtype=np.int64)
+    days, day_ns = np.divmod(timestamps, _NS_PER_DAY)
+    hours, hour_ns = np.divmod(day_ns, 3600 * 10 ** 9)
+    minutes, minute_ns = np.divmod(hour_ns, 60 * 10 ** 9)
+    seconds, second_ns = np.divmod(minute_ns, 10 ** 9)
+    microseconds = second_ns // 1000
+
+    return (days + _EPOCH_ORDINAL).astype(np.float64) + (
+        hours / 24.0 +
+        minutes / 1440.0 +
+        seconds / 86400.0 +
+        microseconds / 86400000000.0
+    )
+
+
+class BTgymArrayData(DataBase):
+    """
+    Backtrader data feed serving bars from columns prepared at once, instead of iterating dataframe rows
+    and converting every timestamp, as btfeeds.PandasDirectData does. Drop-in replacement for latter:
+    same `dataname` and column params meaning (0 - dataframe index, i - i-th column, -1 - not present).
+
+    Columns are converted to contiguous float64 arrays and datetimes to backtrader float format when instance is
+    made, so bar loading comes down to indexing plain sequences.
+    """
+    params = (
+        ('datetime', 0),
+        ('open', 1),
+        ('high', 2),
+        ('low', 3),
+        ('close', 4),
+        ('volume', 5),
+        ('openinterest', 6),
+    )
+
+    datafields = ['datetime', 'open', 'high', 'low', 'close', 'volume', 'openinterest']
+
+    def __init__(self):
+        dataframe = self.p.dataname
+        if self.p.datetime == 0:
+            datetime_index = dataframe.index
+
+        else:
+            datetime_index = pd.DatetimeIndex(dataframe.iloc[:, self.p.datetime - 1])
+
+        self.datetimes = date2num_array(datetime_index)
+        self.columns = {}
+        for datafield in self.getlinealiases():
+            if datafield == 'datetime':
+                continue
+
+            colidx = getattr(self.params, datafield, -1)
+            if colidx is None or colidx < 0:
+                # column not present -- skip
+                continue
+
+            self.columns[datafield] = np.ascontiguousarray(dataframe.iloc[:, colidx - 1].values, dtype=np.float64)
+
+        self.numrecords = self.datetimes.shape[0]
+        self._bars = None
+        self._position = 0
+
+    def start(self):
+        super(BTgymArrayData, self).start()
+        # Python floats sequences are way faster to index item by item than numpy arrays:
+        self._bars = [(self.lines.datetime, self.datetimes.tolist())] + [
+            (getattr(self.lines, datafield), column.tolist()) for datafield, column in self.columns.items()
+        ]
+        self._position = 0
+
+    def _load(self):
+        position = self._position
+        if position >= self.numrecords:
+            return False
+
+        for line, values in self._bars:
+            line[0] = values[position]
+
+        self._position = position + 1
+
+        return True
@@ -0,0 +1,171 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import collections
+
+import numpy as np
+import pandas as pd
+
+from .cache import load_columns
+
+
+class LazyDataFrame:
+    """
+    Read-only stand-in for dataset dataframe, backed by memory-mapped cache entries of source CSV files
+    (see cache.save_dataframe()). Only time index and per-file row offsets are held in memory;
+    records are read from disk when positional slice is requested, e.g. `data[first_row:last_row]`,
+    which is how trials and episodes get sampled. Recently materialized slices are kept in LRU cache
+    limited by total size in bytes.
+
+    Supports part of pd.DataFrame interface used by data classes: `index`, `columns`, `shape`, `empty`,
+    `len()`, integer slicing and `describe()`.
+    """
+
+    def __init__(self, paths, cache_size=256 * 2 ** 20):
+        """
+        Args:
+            paths:          list of str, cache entries directories, one per source file, in time order;
+            cache_size:     int, upper bound of materialized slices cache size in bytes, 0 disables cache.
+
+        Raises:
+            OSError if some entry is missing or entries columns do not match.
+        """
+        self.paths = list(paths)
+        self.cache_size = cache_size
+
+        self._entries = []
+        for path in self.paths:
+            entry = load_columns(path, mmap_mode='r')
+            if entry is None:
+                raise OSError('No valid cache entry found at <{}>.'.format(path))
+
+            self._entries.append(entry)
+
+        meta = self._entries[0][-1]
+        if any(entry_meta['columns'] != meta['columns'] for _, _, entry_meta in self._entries):
+            raise OSError('Source files columns do not match: {}'.format(self.paths))
+
+        self.columns = pd.Index(meta['columns'])
+        self.offsets = np.cumsum([0] + [index.shape[0] for index, _, _ in self._entries])
+
+        # Time index is the only thing loaded in full:
+        index = pd.DatetimeIndex(
+            np.concatenate([np.asarray(index) for index, _, _ in self._entries]).view('datetime64[ns]'),
+            name=meta['index_name']
+        )
+        if meta['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(meta['tz'])
+
+        self.index = index
+
+        self._cache = collections.OrderedDict()
+        self.cache_nbytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __getstate__(self):
+        return dict(paths=self.paths, cache_size=self.cache_size)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def shape(self):
+        return len(self), len(self.columns)
+
+    @property
+    def empty(self):
+        return len(self) == 0 or len(self.columns) == 0
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError('Only positional row slices are supported, got: {}'.format(key))
+
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise TypeError('Slice step is not supported, got: {}'.format(key))
+
+        stop = max(start, stop)
+
+        try:
+            frame = self._cache[(start, stop)]
+            self._cache.move_to_end((start, stop))
+            self.cache_hits += 1
+            return frame
+
+        except KeyError:
+            self.cache_misses += 1
+
+        frame = pd.DataFrame(
+            {column: self._read_column(column, start, stop) for column in self.columns},
+            index=self.index[start:stop],
+            columns=self.columns,
+        )
+        self._put(start, stop, frame)
+
+        return frame
+
+    def _read_column(self, column, start, stop):
+        """
+        Returns:
+            array of `column` records [start, stop) copied from entries it spans.
+        """
+        first = max(int(np.searchsorted(self.offsets, start, side='right')) - 1, 0)
+        chunks = []
+        for i in range(first, len(self._entries)):
+            offset = self.offsets[i]
+            if offset >= stop and chunks:
+                break
+
+            array = self._entries[i][1][column]
+            chunks.append(array[max(start - offset, 0): max(stop - offset, 0)])
+
+        return np.concatenate(chunks) if len(chunks) > 1 else np.array(chunks[0])
+
+    def _put(self, start, stop, frame):
+        """
+        Adds slice to cache, evicts least recently used ones to keep total size within `cache_size`.
+        """
+        nbytes = int(frame.memory_usage(index=True, deep=False).sum())
+        if nbytes > self.cache_size:
+            return
+
+        while self._cache and self.cache_nbytes + nbytes > self.cache_size:
+            _, evicted = self._cache.popitem(last=False)
+            self.cache_nbytes -= int(evicted.memory_usage(index=True, deep=False).sum())
+
+        self._cache[(start, stop)] = frame
+        self.cache_nbytes += nbytes
+
+    def clear_cache(self):
+        self._cache.clear()
+        self.cache_nbytes = 0
+
+    def describe(self):
+        """
+        Returns:
+            pd.DataFrame, same as pd.DataFrame.describe() does; columns are read one at a time.
+        """
+        return pd.DataFrame(
+            {column: pd.Series(self._read_column(column, 0, len(self))).describe() for column in self.columns},
+            columns=self.columns,
+        )
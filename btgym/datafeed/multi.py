@@ -8,12 +8,17 @@ import os
 import sys
 
 import backtrader.feeds as btfeeds
+import numpy as np
 import pandas as pd
 
 
 class BTgymMultiData:
     """
     Multiply data streams wrapper.
+
+    On reset streams are aligned to common time index once: records of all streams are stored in single
+    `values` array of shape [time, stream, field] and every stream data becomes a dataframe view of its slice,
+    so streams can be sampled by the same rows without further alignment or copying.
     """
 
     def __init__(
@@ -22,6 +27,7 @@ class BTgymMultiData:
             data_config=None,
             name='multi_data',
             data_names=None,
+            align='intersection',
             task=0,
             log_level=WARNING,
             **kwargs
@@ -30,6 +36,10 @@ class BTgymMultiData:
         Args:
             data_class_ref:         one of BTgym single-stream datafeed classes
             data_config:            nested dictionary of individual data streams sources, see notes below.
+            align:                  str, common time index of streams: `intersection` - only timestamps present
+                                    in every stream; `union` - timestamps present in any stream, missing records
+                                    are forward-filled (see `fill_mask`), timestamps before every stream has
+                                    started are dropped.
 
             kwargs:                 shared parameters for all data streams, see base dataclass
 
@@ -74,6 +84,18 @@ class BTgymMultiData:
         self.names = []
         self.sample_num = 0
 
+        if align not in ['intersection', 'union']:
+            raise ValueError('Expected `align` be one of: intersection, union; got: {}'.format(align))
+
+        self.align = align
+
+        # Aligned streams data:
+        self.time_index = None  # common pd.DatetimeIndex
+        self.values = None  # float array of shape [time, stream, field] or None if streams can't be aligned so
+        self.fill_mask = None  # bool array of shape [time, stream], True where record is forward-filled
+        self.fields = None  # columns names
+        self._aligned_data = ()  # streams data instances `values` hold
+
         # Logging:
         StreamHandler(sys.stdout).push_application()
         self.log = Logger('{}_{}'.format(self.name, self.task), level=self.log_level)
@@ -154,50 +176,101 @@ class BTgymMultiData:
                 setattr(stream, key, value)
 
     def read_csv(self, data_filename=None, force_reload=False):
-        # Load:
-        indexes = []
         for stream in self.data.values():
             stream.read_csv(force_reload=force_reload)
-            indexes.append(stream.data.index)
 
-        # Get indexes intersection:
-        if len(indexes) > 1:
-            idx_intersected = indexes[0]
-            for i in range(1, len(indexes)):
-                idx_intersected = idx_intersected.intersection(indexes[i])
+        self.align_data()
 
-            # Truncate data to common index:
-            for stream in self.data.values():
-                stream.data = stream.data.loc[idx_intersected]
+    def align_data(self):
+        """
+        Aligns loaded streams data to common time index according to `align` param,
+        replaces every stream data with view of its slice of `values` array.
+        """
+        streams = list(self.data.values())
+        if len(self._aligned_data) == len(streams) > 0 and\
+                all(stream.data is data for stream, data in zip(streams, self._aligned_data)):
+            # Already aligned, e.g. sampled:
+            return
 
-    def reset(self, **kwargs):
-        indexes = []
-        for stream in self.data.values():
-            stream.reset(**kwargs)
-            indexes.append(stream.data.index)
+        frames = [stream.data for stream in streams]
+        fields = list(frames[0].columns)
+        if all(frame.index.equals(frames[0].index) for frame in frames[1:]):
+            index = frames[0].index
 
-        # Get indexes intersection:
-        if len(indexes) > 1:
-            idx_intersected = indexes[0]
-            for i in range(1, len(indexes)):
-                idx_intersected = idx_intersected.intersection(indexes[i])
+        else:
+            index = frames[0].index
+            for frame in frames[1:]:
+                if self.align == 'union':
+                    index = index.union(frame.index)
 
-            idx_intersected.drop_duplicates()
-            self.log.info('shared num. records: {}'.format(len(idx_intersected)))
+                else:
+                    index = index.intersection(frame.index)
 
-            # Truncate data to common index:
-            for stream in self.data.values():
-                stream.data = stream.data.loc[idx_intersected]
+        is_numeric = all(
+            isinstance(frame, pd.DataFrame) and list(frame.columns) == fields and
+            all(dtype.kind in 'biuf' for dtype in frame.dtypes) for frame in frames
+        )
+        if not is_numeric:
+            # Can't hold streams in single array, truncate every stream data instead:
+            self.log.warning('Streams fields differ or are not numeric, aligning streams separately.')
+            if self.align == 'union':
+                frames = [frame.reindex(index, method='ffill') for frame in frames]
+                first_row = max(int(np.argmax(frame.notna().any(axis=1).values)) for frame in frames)
+                frames = [frame[first_row:] for frame in frames]
+                index = index[first_row:]
+
+            else:
+                frames = [frame.loc[index] for frame in frames]
+
+            for stream, frame in zip(streams, frames):
+                stream.data = frame
+
+            self.time_index = None
+            self.values = None
+            self.fill_mask = None
+            self.fields = None
+            self._aligned_data = ()
+            self.log.info('shared num. records: {}'.format(len(index)))
+            return
+
+        timestamps = index.asi8
+        values = np.empty((timestamps.shape[0], len(frames), len(fields)), dtype=np.float64)
+        fill_mask = np.zeros((timestamps.shape[0], len(frames)), dtype=bool)
+        first_row = 0
+        for i, frame in enumerate(frames):
+            frame_timestamps = frame.index.asi8
+            # Last record at or before every common timestamp:
+            rows = np.searchsorted(frame_timestamps, timestamps, side='right') - 1
+            has_record = rows >= 0
+            first_row = max(first_row, int(np.argmax(has_record)) if has_record.any() else timestamps.shape[0])
+            rows = np.maximum(rows, 0)
+            values[:, i, :] = frame.values[rows]
+            fill_mask[:, i] = frame_timestamps[rows] != timestamps
+
+        self.time_index = index[first_row:]
+        self.values = values[first_row:]
+        self.fill_mask = fill_mask[first_row:]
+        self.fields = fields
+        for i, stream in enumerate(streams):
+            stream.data = pd.DataFrame(self.values[:, i, :], index=self.time_index, columns=fields, copy=False)
+
+        self._aligned_data = tuple(stream.data for stream in streams)
+        self.log.info('shared num. records: {}'.format(len(self.time_index)))
 
-            # Choose master_data
-            if self.master_data is None:
-                # Just choose first key:
-                all_keys = list(self.data.keys())
-                if len(all_keys) > 0:
-                    self.master_data = self.data[all_keys[0]]
+    def reset(self, **kwargs):
+        self.read_csv()
+        for stream in self.data.values():
+            stream.reset(**kwargs)
 
-            self.global_timestamp = self.master_data.global_timestamp
-            self.names = self.master_data.names
+        # Choose master_data
+        if self.master_data is None:
+            # Just choose first key:
+            all_keys = list(self.data.keys())
+            if len(all_keys) > 0:
+                self.master_data = self.data[all_keys[0]]
+
+        self.global_timestamp = self.master_data.global_timestamp
+        self.names = self.master_data.names
         self.sample_num = 0
         self.is_ready = True
 
@@ -220,6 +293,7 @@ class BTgymMultiData:
         # Prepare empty instance of multistream data:
         sample = BTgymMultiData(
             data_names=self.data_names,
+            align=self.align,
             task=self.task,
             log_level=self.log_level,
             name='sub_' + self.name,
@@ -228,10 +302,22 @@ class BTgymMultiData:
 
         interval = [master_sample.metadata['first_row'], master_sample.metadata['last_row']]
 
-        # Populate sample with data:
+        # Populate sample with data; streams data being views of `values`, slices are views as well:
         for key, stream in self.data.items():
             self.log.debug('Sampling <{}> with interval: {}, kwargs: {}'.format(key, interval, kwargs))
-            sample.data[key] = stream.sample(interval=interval, force_interval=True, **kwargs)
+            if stream is self.master_data:
+                sample.data[key] = master_sample
+
+            else:
+                sample.data[key] = stream.sample(interval=interval, force_interval=True, **kwargs)
+
+        if self.values is not None:
+            # Sample is aligned already:
+            sample.time_index = self.time_index[interval[0]: interval[-1]]
+            sample.values = self.values[interval[0]: interval[-1]]
+            sample.fill_mask = self.fill_mask[interval[0]: interval[-1]]
+            sample.fields = self.fields
+            sample._aligned_data = tuple(stream.data for stream in sample.data.values())
 
         sample.filename = {key: stream.filename for key, stream in self.data.items()}
         self.sample_num += 1
@@ -0,0 +1,297 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import json
+import multiprocessing.util
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bump when on-disk layout changes:
+SHARED_DATA_VERSION = 2
+
+
+def default_shared_dir():
+    """
+    Returns:
+        str, directory to publish datasets to: RAM-backed `/dev/shm` if present, system temporary one otherwise.
+    """
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+
+    return tempfile.gettempdir()
+
+
+class SharedDataset:
+    """
+    Dataset published by data_server once as set of memory-mapped files, so environment servers of same host
+    can get samples as (first_row, last_row) references and make dataframe views over shared pages
+    instead of receiving pickled sample instances.
+
+    Data is kept as 2d arrays, one per run of adjacent columns of same dtype, so column dtypes are preserved
+    and sample dataframe is still made of views without per-column copies (typically price columns block and
+    `volume` one). Sample instances are re-created at receiver side from nested class and parameters of
+    published dataset, which are written once along with data.
+
+    Layout of published directory:
+        `index.npy` -       int64 POSIX nanosecond timestamps;
+        `values_<i>.npy` -  2d array of records, i-th block of columns;
+        `meta.json` -       columns names, number of columns per block, index name and timezone;
+        `template.pkl` -    pickled (nested_class_ref, nested_params) tuple of published dataset.
+
+    Published files are removed by owner close() or, failing that, at owner process exit; files of killed
+    data_server process are left in place.
+    """
+
+    def __init__(self, path, index, blocks, meta, class_ref, params, owner=False):
+        """
+        Use publish() or attach() to get instance.
+
+        Args:
+            path:       str, published directory;
+            index:      int64 array of timestamps;
+            blocks:     list of 2d arrays of records, one per block of columns;
+            meta:       dictionary of published metadata;
+            class_ref:  sample class;
+            params:     dictionary of sample class kwargs;
+            owner:      bool, if True - close() or exit of this process removes published files.
+        """
+        self.path = path
+        self.index = index
+        self.blocks = blocks
+        self.meta = meta
+        self.class_ref = class_ref
+        self.params = params
+        self.owner = owner
+        self.columns = meta['columns']
+        self._finalizer = None
+        if owner:
+            # Unlike atexit handlers, runs at exit of multiprocessing child process as well:
+            self._finalizer = multiprocessing.util.Finalize(self, shutil.rmtree, args=(path, True), exitpriority=0)
+
+    @classmethod
+    def publish(cls, dataset, dirname=None):
+        """
+        Writes dataset data and sample template to new directory.
+
+        Args:
+            dataset:    BTgymBaseData instance holding loaded data;
+            dirname:    str, where to make published directory, see default_shared_dir().
+
+        Returns:
+            SharedDataset instance or None if dataset can not be shared, e.g. holds no data, non-numeric data
+            or does not make samples.
+        """
+        data = getattr(dataset, 'data', None)
+        class_ref = getattr(dataset, 'nested_class_ref', None)
+        if not isinstance(data, pd.DataFrame) or data.empty or class_ref is None:
+            return None
+
+        if not isinstance(data.index, pd.DatetimeIndex):
+            return None
+
+        if any(dtype.kind not in 'biuf' for dtype in data.dtypes):
+            return None
+
+        if dirname is None:
+            dirname = default_shared_dir()
+
+        # Runs of adjacent columns of same dtype:
+        block_sizes = []
+        for i, dtype in enumerate(data.dtypes):
+            if i > 0 and dtype == data.dtypes.iloc[i - 1]:
+                block_sizes[-1] += 1
+
+            else:
+                block_sizes.append(1)
+
+        path = tempfile.mkdtemp(prefix='btgym_data_', dir=dirname)
+        try:
+            np.save(os.path.join(path, 'index.npy'), np.ascontiguousarray(data.index.asi8))
+            start = 0
+            for i, size in enumerate(block_sizes):
+                np.save(
+                    os.path.join(path, 'values_{}.npy'.format(i)),
+                    np.ascontiguousarray(data.iloc[:, start: start + size].to_numpy())
+                )
+                start += size
+
+            meta = dict(
+                version=SHARED_DATA_VERSION,
+                columns=list(data.columns),
+                block_sizes=block_sizes,
+                index_name=data.index.name,
+                tz=None if data.index.tz is None else str(data.index.tz),
+                num_records=data.shape[0],
+            )
+            with open(os.path.join(path, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+
+            with open(os.path.join(path, 'template.pkl'), 'wb') as f:
+                pickle.dump((class_ref, dataset.nested_params), f, pickle.HIGHEST_PROTOCOL)
+
+        except (TypeError, pickle.PicklingError):
+            # Columns names or sample parameters are not serializable:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+
+        return cls.attach(path, mmap_mode='r', owner=True)
+
+    @classmethod
+    def attach(cls, path, mmap_mode='c', owner=False):
+        """
+        Opens published dataset.
+
+        Args:
+            path:       str, published directory;
+            mmap_mode:  np.load() memory-mapping mode; default `c` (copy-on-write) shares pages with other
+                        readers while still allowing sample data to be modified locally;
+            owner:      bool, see __init__().
+
+        Returns:
+            SharedDataset instance.
+
+        Raises:
+            OSError if there is no valid published dataset at `path`.
+        """
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+
+            assert meta['version'] == SHARED_DATA_VERSION
+
+            with open(os.path.join(path, 'template.pkl'), 'rb') as f:
+                class_ref, params = pickle.load(f)
+
+            index = np.load(os.path.join(path, 'index.npy'), mmap_mode=mmap_mode)
+            blocks = [
+                np.load(os.path.join(path, 'values_{}.npy'.format(i)), mmap_mode=mmap_mode)
+                for i in range(len(meta['block_sizes']))
+            ]
+
+        except (AssertionError, ValueError, KeyError, EOFError, pickle.UnpicklingError, AttributeError) as e:
+            raise OSError('No valid shared dataset found at <{}>: {}'.format(path, e))
+
+        shapes = [block.shape for block in blocks]
+        if shapes != [(index.shape[0], size) for size in meta['block_sizes']] or \
+                sum(meta['block_sizes']) != len(meta['columns']):
+            raise OSError('Inconsistent shared dataset found at <{}>.'.format(path))
+
+        return cls(path, index, blocks, meta, class_ref, params, owner=owner)
+
+    def get_view(self, first_row, last_row):
+        """
+        Returns:
+            pd.DataFrame of records [first_row, last_row) backed by shared memory.
+        """
+        index = pd.DatetimeIndex(
+            np.asarray(self.index[first_row:last_row]).view('datetime64[ns]'),
+            name=self.meta['index_name']
+        )
+        if self.meta['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(self.meta['tz'])
+
+        frames = []
+        start = 0
+        for block in self.blocks:
+            columns = self.columns[start: start + block.shape[1]]
+            frames.append(pd.DataFrame(block[first_row:last_row], index=index, columns=columns, copy=False))
+            start += block.shape[1]
+
+        if len(frames) == 1:
+            return frames[0]
+
+        return pd.concat(frames, axis=1, copy=False)
+
+    def get_ref(self, sample):
+        """
+        Makes reference to sample of published dataset.
+
+        Args:
+            sample:     instance returned by published dataset sample() method.
+
+        Returns:
+            dictionary of `path`, `first_row`, `last_row`, `filename` and `metadata` or
+            None if sample data is not a continuous slice of published data.
+        """
+        if type(sample) is not self.class_ref:
+            return None
+
+        try:
+            first_row = int(sample.metadata['first_row'])
+            last_row = int(sample.metadata['last_row'])
+            data = sample.data
+
+        except (KeyError, TypeError, AttributeError):
+            return None
+
+        num_records = len(range(self.index.shape[0])[first_row:last_row])
+        if not isinstance(data, pd.DataFrame) or data.empty or data.shape[0] != num_records:
+            return None
+
+        if list(data.columns) != self.columns or not isinstance(data.index, pd.DatetimeIndex):
+            return None
+
+        # Check bounds timestamps to be sure slice has been taken from published data:
+        bounds = data.index.asi8[[0, -1]]
+        if bounds[0] != self.index[first_row] or bounds[-1] != self.index[first_row + num_records - 1]:
+            return None
+
+        return dict(
+            path=self.path,
+            first_row=first_row,
+            last_row=last_row,
+            filename=sample.filename,
+            metadata=sample.metadata,
+        )
+
+    def make_sample(self, ref):
+        """
+        Re-creates sample instance from reference.
+
+        Args:
+            ref:    dictionary returned by get_ref().
+
+        Returns:
+            sample instance holding view of published data.
+        """
+        instance = self.class_ref(**self.params)
+        instance.filename = ref['filename']
+        instance.metadata = ref['metadata']
+        instance.data = self.get_view(ref['first_row'], ref['last_row'])
+
+        return instance
+
+    def close(self):
+        """
+        Releases arrays, removes published files if owned.
+        """
+        self.index = None
+        self.blocks = None
+        if self._finalizer is not None:
+            # Removes published files once:
+            self._finalizer()
@@ -185,8 +185,7 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
         first_row = sample_num * self.sample_stride
 
         if self.start_00:
-            first_day = self.data[first_row:first_row + 1].index[0]
-            first_row = self.data.index.get_loc(first_day.date(), method='nearest')
+            first_row = int(self._get_day_start_rows()[first_row])
             self.log.debug('Trial train start time adjusted to <00:00>')
 
         last_row = first_row + self.sample_num_records
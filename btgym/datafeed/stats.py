@@ -0,0 +1,100 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import numpy as np
+import pandas as pd
+
+
+def _prefix_sum(array):
+    """
+    Returns:
+        array of shape [n + 1, ...] holding cumulative sums of `array` along first axis, starting from zero.
+    """
+    return np.concatenate([np.zeros((1,) + array.shape[1:], dtype=array.dtype), np.cumsum(array, axis=0)])
+
+
+class DataStat:
+    """
+    Descriptive statistic of dataframe numeric columns for any continuous window of rows,
+    in same format as pd.DataFrame.describe() returns.
+
+    Prefix sums of values and squared values are computed once, so count, mean and standard deviation of
+    any window take O(1). Minimum, maximum and percentiles are exact, taken from window rows with
+    same linear interpolation pandas uses, so results match pd.DataFrame.describe() for any data layout.
+    """
+    percentiles = (0.25, 0.5, 0.75)
+
+    def __init__(self, dataframe):
+        """
+        Args:
+            dataframe:  pd.DataFrame; non-numeric columns are ignored, NaN values are skipped.
+        """
+        numeric = dataframe.select_dtypes(include=[np.number])
+        self.columns = numeric.columns
+        self.values = np.asarray(numeric.values, dtype=np.float64)
+        self.num_records = self.values.shape[0]
+
+        finite = ~np.isnan(self.values)
+        counts = finite.sum(axis=0)
+
+        # Values are centered to keep sums of squares precise for prices of small relative variation:
+        self.shift = np.where(finite, self.values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        centered = np.where(finite, self.values - self.shift, 0.0)
+
+        self.count_sums = _prefix_sum(finite.astype(np.int64))
+        self.sums = _prefix_sum(centered)
+        self.square_sums = _prefix_sum(centered ** 2)
+
+    def describe(self, first_row=0, last_row=None):
+        """
+        Args:
+            first_row:  int, window first row;
+            last_row:   int or None, row next to window last one, None - up to the end of data.
+
+        Returns:
+            pd.DataFrame of records count, mean, std, min, percentiles and max for every numeric column.
+        """
+        first_row, last_row, _ = slice(first_row, last_row).indices(self.num_records)
+        last_row = max(first_row, last_row)
+
+        count = self.count_sums[last_row] - self.count_sums[first_row]
+        sums = self.sums[last_row] - self.sums[first_row]
+        square_sums = self.square_sums[last_row] - self.square_sums[first_row]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, self.shift + sums / count, np.nan)
+            var = np.where(count > 1, (square_sums - sums * sums / count) / (count - 1), np.nan)
+            std = np.sqrt(np.maximum(var, 0.0))
+
+        window = self.values[first_row:last_row]
+        quantiles = np.full((len(self.percentiles) + 2, len(self.columns)), np.nan)
+        for i in range(len(self.columns)):
+            if count[i] == 0:
+                continue
+
+            values = window[:, i]
+            if count[i] < values.shape[0]:
+                values = values[~np.isnan(values)]
+            quantiles[:, i] = np.percentile(values, [0] + [100 * p for p in self.percentiles] + [100])
+
+        return pd.DataFrame(
+            np.vstack([count, mean, std, quantiles]).astype(np.float64),
+            index=['count', 'mean', 'std', 'min'] + ['{:g}%'.format(100 * p) for p in self.percentiles] + ['max'],
+            columns=self.columns,
+        )
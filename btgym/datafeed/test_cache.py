@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from .base import BTgymBaseData
+from .cache import load_columns
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class CSVCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def make_data(self, cache_dir):
+        data = BTgymBaseData(filename=filename)
+        data.csv_cache_dir = cache_dir
+        data.read_csv()
+        return data
+
+    def test_warm_load_matches_cold(self):
+        cold = self.make_data(self.cache_dir)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        warm = self.make_data(self.cache_dir)
+        self.assertTrue(warm.data.equals(cold.data))
+        self.assertEqual(list(warm.data.dtypes), list(cold.data.dtypes))
+        self.assertTrue(warm.data.index.equals(cold.data.index))
+
+        uncached = self.make_data(None)
+        self.assertTrue(uncached.data.equals(cold.data))
+
+    def test_entry_is_memory_mapped(self):
+        cold = self.make_data(self.cache_dir)
+        entry = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        index, columns, meta = load_columns(entry, mmap_mode='r')
+        self.assertIsInstance(index, np.memmap)
+        self.assertEqual(index.dtype, np.int64)
+        self.assertEqual(meta['columns'], list(cold.data.columns))
+        np.testing.assert_array_equal(index, cold.data.index.asi8)
+
+
+if __name__ == '__main__':
+    unittest.main()
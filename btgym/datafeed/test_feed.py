@@ -0,0 +1,75 @@
+import datetime
+import os
+import unittest
+
+import backtrader as bt
+import backtrader.feeds as btfeeds
+import numpy as np
+import pandas as pd
+from backtrader.utils import date2num
+
+from .base import BTgymBaseData
+from .feed import BTgymArrayData, date2num_array
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class RecordingStrategy(bt.Strategy):
+
+    def __init__(self):
+        self.bars = []
+
+    def next(self):
+        self.bars.append(
+            (self.data.datetime[0], self.data.open[0], self.data.high[0], self.data.low[0], self.data.close[0])
+        )
+
+
+class ArrayFeedTest(unittest.TestCase):
+
+    def run_feed(self, feed_class, dataframe):
+        cerebro = bt.Cerebro(stdstats=False)
+        cerebro.addstrategy(RecordingStrategy)
+        cerebro.adddata(
+            feed_class(dataname=dataframe, timeframe=bt.TimeFrame.Minutes, volume=-1, openinterest=-1),
+            name='base_asset'
+        )
+        return cerebro.run(preload=False)[0].bars
+
+    def test_date2num_array(self):
+        index = pd.DatetimeIndex(
+            [
+                datetime.datetime(2017, 1, 1),
+                datetime.datetime(2017, 3, 5, 13, 47, 11, 123456),
+                datetime.datetime(1969, 12, 31, 23, 59, 59),
+            ]
+        )
+        expected = [date2num(dt) for dt in index.to_pydatetime()]
+        self.assertEqual(date2num_array(index).tolist(), expected)
+
+        aware = index.tz_localize('US/Eastern')
+        expected = [date2num(dt) for dt in aware.to_pydatetime()]
+        self.assertEqual(date2num_array(aware).tolist(), expected)
+
+    def test_same_bars_as_pandas_direct_data(self):
+        data = BTgymBaseData(filename=filename)
+        data.csv_cache_dir = None
+        data.read_csv()
+        dataframe = data.data[:3000]
+
+        expected = self.run_feed(btfeeds.PandasDirectData, dataframe)
+        bars = self.run_feed(BTgymArrayData, dataframe)
+        self.assertEqual(len(bars), dataframe.shape[0])
+        self.assertEqual(bars, expected)
+
+        feed = data.to_btfeed()['default_asset']
+        self.assertIsInstance(feed, BTgymArrayData)
+        self.assertEqual(feed.numrecords, data.data.shape[0])
+        np.testing.assert_array_equal(feed.columns['close'], data.data['close'].values)
+
+
+if __name__ == '__main__':
+    unittest.main()
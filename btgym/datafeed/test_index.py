@@ -0,0 +1,79 @@
+import datetime
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from .derivative import BTgymDataset
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class RowLookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.domain = BTgymDataset(
+            filename=filename,
+            episode_duration={'days': 0, 'hours': 23, 'minutes': 55},
+            time_gap={'days': 0, 'hours': 6},
+        )
+        self.domain.csv_cache_dir = None
+        self.domain.reset()
+        # Make data gappy: drop few hours of records and some odd ones:
+        index = self.domain.data.index
+        self.domain.data = self.domain.data.drop(index[3000:3600].append(index[5000:7000:7]))
+        self.domain.reset()
+
+    def reference(self, time, method):
+        # Same as get_loc(time, method=method), but not deprecated:
+        row = self.domain.data.index.get_indexer([time], method=method)[0]
+        if row < 0:
+            raise KeyError(time)
+        return row
+
+    def times(self):
+        index = self.domain.data.index
+        rng = np.random.RandomState(0)
+        offsets = rng.randint(-10 ** 5, (index.asi8[-1] - index.asi8[0]) // 10 ** 6 + 10 ** 5, 500) * 10 ** 6
+        times = [pd.Timestamp(index.asi8[0] + offset) for offset in offsets]
+        # Exact matches, bounds, gap edges and ties:
+        times += [index[0], index[-1], index[2999], index[3000], index[10] + datetime.timedelta(seconds=30)]
+        times += [index[0] - datetime.timedelta(minutes=1), index[-1] + datetime.timedelta(minutes=1)]
+        return times
+
+    def test_lookup_matches_pandas(self):
+        for method in ['ffill', 'backfill', 'nearest']:
+            for time in self.times():
+                with self.subTest(method=method, time=time):
+                    try:
+                        expected = self.reference(time, method)
+
+                    except KeyError:
+                        with self.assertRaises(KeyError):
+                            self.domain.get_row(time, method=method)
+                        continue
+
+                    self.assertEqual(self.domain.get_row(time, method=method), expected)
+                    self.assertEqual(self.domain.get_row(time.to_pydatetime(), method=method), expected)
+
+    def test_day_start_rows_match_pandas(self):
+        index = self.domain.data.index
+        day_start_rows = self.domain._get_day_start_rows()
+        for row in range(0, index.shape[0], 37):
+            with self.subTest(row=row):
+                self.assertEqual(day_start_rows[row], self.reference(pd.Timestamp(index[row].date()), 'nearest'))
+                self.assertEqual(day_start_rows[row], self.domain.get_row(index[row].date()))
+
+    def test_cache_follows_data(self):
+        timestamps = self.domain._get_timestamps()
+        self.assertIs(self.domain._get_timestamps(), timestamps)
+        self.domain.data = self.domain.data[10:]
+        self.assertEqual(self.domain._get_timestamps().shape[0], self.domain.data.shape[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
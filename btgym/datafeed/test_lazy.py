@@ -0,0 +1,98 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from .derivative import BTgymDataset
+from .lazy import LazyDataFrame
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class LazyDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # Split source file in two to check reading across files bounds:
+        with open(filename) as f:
+            lines = f.readlines()
+
+        header, records = lines[0], lines[1:]
+        self.filenames = []
+        for i, part in enumerate([records[:len(records) // 2], records[len(records) // 2:]]):
+            self.filenames.append(os.path.join(self.tmp_dir, 'part_{}.csv'.format(i)))
+            with open(self.filenames[-1], 'w') as f:
+                f.writelines([header] + part)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_domain(self, lazy_data):
+        domain = BTgymDataset(
+            filename=self.filenames,
+            episode_duration={'days': 0, 'hours': 23, 'minutes': 55},
+            time_gap={'days': 0, 'hours': 6},
+            target_period={'days': 1, 'hours': 0, 'minutes': 0},
+        )
+        domain.csv_cache_dir = os.path.join(self.tmp_dir, 'cache')
+        domain.lazy_data = lazy_data
+        domain.lazy_cache_size = 2 ** 20
+        domain.reset()
+        return domain
+
+    def test_lazy_matches_in_memory(self):
+        eager = self.make_domain(lazy_data=False)
+        lazy = self.make_domain(lazy_data=True)
+        self.assertIsInstance(lazy.data, LazyDataFrame)
+        self.assertEqual(lazy.data.shape, eager.data.shape)
+        self.assertTrue(lazy.data.index.equals(eager.data.index))
+        self.assertEqual(list(lazy.data.columns), list(eager.data.columns))
+
+        bound = lazy.data.offsets[1]
+        for first_row, last_row in [(0, 10), (bound - 5, bound + 5), (bound, bound + 1), (100, 100)]:
+            with self.subTest(first_row=first_row, last_row=last_row):
+                np.testing.assert_array_equal(
+                    lazy.data[first_row:last_row].values,
+                    eager.data[first_row:last_row].values
+                )
+                self.assertTrue(lazy.data[first_row:last_row].index.equals(eager.data[first_row:last_row].index))
+
+        np.testing.assert_allclose(lazy.describe().values, eager.describe().values)
+
+        for sample_type in [0, 1]:
+            np.random.seed(sample_type)
+            eager_trial = eager.sample(get_new=True, sample_type=sample_type)
+            np.random.seed(sample_type)
+            lazy_trial = lazy.sample(get_new=True, sample_type=sample_type)
+            self.assertEqual(lazy_trial.metadata, eager_trial.metadata)
+            np.testing.assert_array_equal(lazy_trial.data.values, eager_trial.data.values)
+
+            lazy_trial.reset()
+            episode = lazy_trial.sample(get_new=True, sample_type=0)
+            self.assertFalse(episode.data.empty)
+
+    def test_cache_size_is_bounded(self):
+        lazy = self.make_domain(lazy_data=True)
+        window = lazy.sample_num_records
+        for first_row in range(0, lazy.data.shape[0] - window, window // 3):
+            lazy.data[first_row: first_row + window]
+            self.assertLessEqual(lazy.data.cache_nbytes, lazy.lazy_cache_size)
+
+        lazy.data[0:10]
+        lazy.data[0:10]
+        self.assertGreaterEqual(lazy.data.cache_hits, 1)
+
+        # Pickles as reference to cache entries:
+        restored = pickle.loads(pickle.dumps(lazy.data))
+        self.assertLess(len(pickle.dumps(lazy.data)), 1000)
+        np.testing.assert_array_equal(restored[5:15].values, lazy.data[5:15].values)
+
+
+if __name__ == '__main__':
+    unittest.main()
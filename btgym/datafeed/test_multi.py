@@ -0,0 +1,91 @@
+import copy
+import os
+import unittest
+
+import numpy as np
+
+from .derivative import BTgymDataset, BTgymRandomDataDomain
+from .multi import BTgymMultiData
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class MultiDataAlignTest(unittest.TestCase):
+
+    def setUp(self):
+        source = BTgymDataset(filename=filename)
+        source.csv_cache_dir = None
+        source.read_csv()
+        data = source.data
+        # Streams with different gaps:
+        self.frames = {
+            'a': data.drop(data.index[100:130]),
+            'b': (data * 2).drop(data.index[:3].append(data.index[5000:5010])),
+        }
+
+    def make_data(self, align):
+        multi = BTgymMultiData(
+            data_class_ref=BTgymRandomDataDomain,
+            data_config={key: {'filename': None, 'dataframe': frame} for key, frame in self.frames.items()},
+            align=align,
+            trial_params=dict(
+                sample_duration={'days': 2, 'hours': 0, 'minutes': 0},
+                time_gap={'days': 1, 'hours': 0},
+            ),
+            episode_params=dict(
+                sample_duration={'days': 0, 'hours': 12, 'minutes': 0},
+                time_gap={'days': 0, 'hours': 6},
+            ),
+        )
+        multi.reset()
+        return multi
+
+    def test_intersection(self):
+        multi = self.make_data('intersection')
+        index = self.frames['a'].index.intersection(self.frames['b'].index)
+        self.assertTrue(multi.time_index.equals(index))
+        self.assertEqual(multi.values.shape, (len(index), 2, 5))
+        self.assertFalse(multi.fill_mask.any())
+        for i, key in enumerate(['a', 'b']):
+            stream_data = multi.data[key].data
+            np.testing.assert_array_equal(stream_data.values, self.frames[key].loc[index].values)
+            np.testing.assert_array_equal(multi.values[:, i, :], self.frames[key].loc[index].values)
+            self.assertTrue(np.shares_memory(stream_data.values, multi.values))
+
+    def test_union_forward_fills(self):
+        multi = self.make_data('union')
+        # Union starting from the first record of `b`:
+        index = self.frames['a'].index.union(self.frames['b'].index)[3:]
+        self.assertTrue(multi.time_index.equals(index))
+        for i, key in enumerate(['a', 'b']):
+            expected = self.frames[key].reindex(index, method='ffill')
+            np.testing.assert_array_equal(multi.data[key].data.values, expected.values)
+            np.testing.assert_array_equal(multi.fill_mask[:, i], ~index.isin(self.frames[key].index))
+
+        self.assertEqual(multi.fill_mask[:, 0].sum(), 30)
+        self.assertEqual(multi.fill_mask[:, 1].sum(), 10)
+
+    def test_samples_are_aligned_views(self):
+        multi = self.make_data('intersection')
+        trial = multi.sample(**copy.deepcopy(dict(get_new=True, sample_type=0, b_alpha=1, b_beta=1)))
+        first_row, last_row = trial.metadata['first_row'], trial.metadata['last_row']
+        self.assertTrue(trial.time_index.equals(multi.time_index[first_row:last_row]))
+        for key in ['a', 'b']:
+            self.assertTrue(trial.data[key].data.index.equals(trial.time_index))
+            self.assertTrue(np.shares_memory(trial.data[key].data.values, multi.values))
+
+        values = trial.values
+        trial.reset()
+        # No re-alignment of sampled data:
+        self.assertIs(trial.values, values)
+
+        episode = trial.sample(get_new=True, sample_type=0)
+        self.assertTrue(episode.data['a'].data.index.equals(episode.data['b'].data.index))
+        np.testing.assert_array_equal(episode.data['b'].data.values, 2 * episode.data['a'].data.values)
+
+
+if __name__ == '__main__':
+    unittest.main()
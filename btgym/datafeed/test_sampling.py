@@ -0,0 +1,102 @@
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from .derivative import BTgymDataset
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class ValidStartsTest(unittest.TestCase):
+
+    def make_domain(self, **kwargs):
+        domain = BTgymDataset(
+            filename=filename,
+            episode_duration={'days': 0, 'hours': 23, 'minutes': 55},
+            time_gap={'days': 0, 'hours': 6},
+            target_period={'days': 1, 'hours': 0, 'minutes': 0},
+            **kwargs
+        )
+        domain.csv_cache_dir = None
+        domain.reset()
+        # Make data gappy: drop few hours of records:
+        domain.data = domain.data.drop(domain.data.index[3000:3600])
+        domain.reset()
+        return domain
+
+    def test_valid_starts_match_rejection_rules(self):
+        for start_00 in [False, True]:
+            domain = self.make_domain(start_weekdays=[0, 1, 2, 4], start_00=start_00)
+            num_records = domain.sample_num_records
+            first_rows, valid = domain._get_start_rows(num_records)
+
+            for row in range(0, domain.data.shape[0], 97):
+                day = domain.data.index[row]
+                if start_00:
+                    first_row = domain.data.index.get_indexer([pd.Timestamp(day.date())], method='nearest')[0]
+
+                else:
+                    first_row = row
+                sample = domain.data[first_row: first_row + num_records]
+                duration = (sample.index[-1] - sample.index[0]).to_pytimedelta()
+                expected = day.weekday() in domain.start_weekdays and\
+                    domain.max_sample_len_delta - duration < domain.max_time_gap
+
+                with self.subTest(start_00=start_00, row=row):
+                    self.assertEqual(first_rows[row], first_row)
+                    self.assertEqual(valid[row], expected)
+
+    def test_sampled_starts_are_valid(self):
+        domain = self.make_domain(start_weekdays=[0, 1, 2, 4])
+        first_rows, valid = domain._get_start_rows(domain.sample_num_records)
+        for _ in range(200):
+            row, first_row = domain._draw_start_row(
+                domain.train_interval,
+                domain.sample_num_records,
+                b_alpha=2.0,
+                b_beta=0.5,
+            )
+            self.assertTrue(valid[row])
+            self.assertTrue(domain.train_interval[0] <= row <= domain.train_interval[-1])
+
+        trial = domain.sample(get_new=True, sample_type=0, b_alpha=2.0, b_beta=0.5)
+        self.assertIn(trial.data.index[0].weekday(), domain.start_weekdays)
+
+    def test_interval_shorter_than_sample(self):
+        # Test trial has empty train interval, episode is then data[0:-n] slice, as before:
+        domain = self.make_domain()
+        trial = domain.sample(get_new=True, sample_type=1)
+        trial.reset()
+        self.assertLess(trial.train_interval[-1], 0)
+        episode = trial.sample(get_new=True, sample_type=0)
+        self.assertEqual(episode.data.shape[0], trial.data.shape[0] + trial.train_interval[-1])
+
+    def test_draws_follow_beta_distribution(self):
+        domain = self.make_domain()
+        np.random.seed(0)
+        interval = [0, 2 * domain.sample_num_records]
+        _, valid = domain._get_start_rows(domain.sample_num_records)
+        rows = np.asarray(
+            [
+                domain._draw_start_row(interval, domain.sample_num_records, b_alpha=3.0, b_beta=1.0)[0]
+                for _ in range(2000)
+            ]
+        )
+        # Reference: draw until valid:
+        span = interval[-1] - interval[0] - domain.sample_num_records
+        reference = []
+        while len(reference) < 2000:
+            row = interval[0] + int(span * np.random.beta(3.0, 1.0))
+            if valid[row]:
+                reference.append(row)
+
+        self.assertLess(abs(rows.mean() - np.mean(reference)) / span, 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
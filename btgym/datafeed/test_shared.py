@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from .derivative import BTgymDataset
+from .shared import SharedDataset
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class SharedDatasetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.shared_dir = tempfile.mkdtemp()
+        self.domain = BTgymDataset(
+            filename=filename,
+            episode_duration={'days': 0, 'hours': 23, 'minutes': 55},
+            time_gap={'days': 0, 'hours': 6},
+            target_period={'days': 1, 'hours': 0, 'minutes': 0},
+        )
+        self.domain.csv_cache_dir = None
+        self.domain.reset()
+        self.shared_data = SharedDataset.publish(self.domain, dirname=self.shared_dir)
+
+    def tearDown(self):
+        self.shared_data.close()
+        shutil.rmtree(self.shared_dir, ignore_errors=True)
+
+    def test_sample_ref_roundtrip(self):
+        attached = SharedDataset.attach(self.shared_data.path)
+        for sample_type in [0, 1]:
+            trial = self.domain.sample(get_new=True, sample_type=sample_type)
+            ref = self.shared_data.get_ref(trial)
+            self.assertIsNotNone(ref)
+            # Reference is way smaller than sample itself:
+            self.assertLess(len(pickle.dumps(ref)), len(pickle.dumps(trial)) / 10)
+
+            shared_trial = attached.make_sample(ref)
+            self.assertIsInstance(shared_trial, type(trial))
+            self.assertEqual(shared_trial.filename, trial.filename)
+            self.assertEqual(shared_trial.metadata, trial.metadata)
+            self.assertTrue(shared_trial.data.index.equals(trial.data.index))
+            self.assertEqual(list(shared_trial.data.columns), list(trial.data.columns))
+            np.testing.assert_array_equal(shared_trial.data.values, trial.data.values)
+
+            # Trial data is a view of shared pages:
+            self.assertTrue(np.shares_memory(shared_trial.data.values, attached.blocks[0]))
+
+            # Can be further sampled as usual:
+            shared_trial.reset()
+            episode = shared_trial.sample(get_new=True, sample_type=0)
+            self.assertFalse(episode.data.empty)
+
+    def test_column_dtypes_preserved(self):
+        self.shared_data.close()
+        self.domain.data['volume'] = np.arange(self.domain.data.shape[0], dtype=np.int32)
+        self.shared_data = SharedDataset.publish(self.domain, dirname=self.shared_dir)
+        self.assertEqual(len(self.shared_data.blocks), 2)
+
+        trial = self.domain.sample(get_new=True, sample_type=0)
+        shared_trial = self.shared_data.make_sample(self.shared_data.get_ref(trial))
+        self.assertEqual(list(shared_trial.data.columns), list(trial.data.columns))
+        self.assertEqual(list(shared_trial.data.dtypes), list(trial.data.dtypes))
+        np.testing.assert_array_equal(shared_trial.data['volume'].values, trial.data['volume'].values)
+        for column, block in zip(['open', 'volume'], self.shared_data.blocks):
+            self.assertTrue(np.shares_memory(shared_trial.data[column].values, block))
+
+    def test_foreign_sample_not_referenced(self):
+        trial = self.domain.sample(get_new=True, sample_type=0)
+        # Same shape, but does not match published rows:
+        trial.data = trial.data.shift(1, freq='min')
+        self.assertIsNone(self.shared_data.get_ref(trial))
+
+    def test_close_removes_published_files(self):
+        path = self.shared_data.path
+        self.assertTrue(os.path.isdir(path))
+        self.shared_data.close()
+        self.assertFalse(os.path.exists(path))
+        with self.assertRaises(OSError):
+            SharedDataset.attach(path)
+
+    def test_owner_process_exit_removes_published_files(self):
+        def publish(connection):
+            # Exits without close():
+            connection.send(SharedDataset.publish(self.domain, dirname=self.shared_dir).path)
+
+        parent_connection, child_connection = multiprocessing.Pipe()
+        process = multiprocessing.get_context('fork').Process(target=publish, args=(child_connection,))
+        process.start()
+        path = parent_connection.recv()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from .derivative import BTgymDataset
+from .stats import DataStat
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+class DataStatTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.dataframe = pd.DataFrame(
+            {
+                'open': 1.1 + np.cumsum(rng.normal(0, 1e-4, 5000)),
+                'volume': rng.randint(0, 100, 5000),
+            },
+            index=pd.date_range('2017-01-02', periods=5000, freq='min'),
+        )
+        self.dataframe.iloc[1000:1010, 1] = np.nan
+        self.stat = DataStat(self.dataframe)
+
+    def test_windows_match_pandas(self):
+        for first_row, last_row in [(0, None), (3, 200), (250, 1300), (999, 4097), (4000, 5000), (1000, 1010)]:
+            expected = self.dataframe[first_row:last_row].describe()
+            result = self.stat.describe(first_row, last_row)
+            with self.subTest(first_row=first_row, last_row=last_row):
+                self.assertEqual(list(result.index), list(expected.index))
+                self.assertEqual(list(result.columns), list(expected.columns))
+                np.testing.assert_allclose(result.values, expected.values, rtol=1e-9)
+
+    def test_empty_window(self):
+        result = self.stat.describe(10, 10)
+        self.assertEqual(list(result.loc['count']), [0, 0])
+        self.assertTrue(result.drop('count').isnull().values.all())
+
+
+class SampleStatTest(unittest.TestCase):
+
+    def test_episode_stat_derived_from_trial(self):
+        domain = BTgymDataset(
+            filename=filename,
+            episode_duration={'days': 0, 'hours': 23, 'minutes': 55},
+            time_gap={'days': 0, 'hours': 6},
+            target_period={'days': 1, 'hours': 0, 'minutes': 0},
+        )
+        domain.csv_cache_dir = None
+        domain.reset()
+        dataset_stat = domain.describe()
+        self.assertIs(domain.describe(), dataset_stat)
+        # Whole dataset statistic arrays are not kept:
+        self.assertIsNone(domain._stat)
+        self.assertIsNone(domain.sample(get_new=True, sample_type=0)._parent_stat)
+
+        # Trials get shipped without link to parent:
+        trial = pickle.loads(pickle.dumps(domain.sample(get_new=True, sample_type=0)))
+        self.assertIsNone(trial._parent_stat)
+        trial.reset()
+        trial.describe()
+
+        episode = trial.sample(get_new=True, sample_type=0)
+        episode_stat = episode.describe()
+        self.assertIs(episode._get_parent_stat()[0], trial.get_stat())
+        np.testing.assert_allclose(episode_stat.values, episode.data.describe().values, rtol=1e-9)
+
+        # Changed data gets described anew:
+        episode.data = episode.data[10:]
+        self.assertEqual(episode.describe().loc['count'].iloc[0], episode.data.shape[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
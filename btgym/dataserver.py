@@ -18,11 +18,17 @@
 ###############################################################################
 
 import multiprocessing
+import threading
 import copy
+import pickle
+import queue
+import time
 import zmq
 import datetime
 
 from .datafeed import DataSampleConfig
+from .datafeed.shared import SharedDataset
+from .transport import InProcessContext
 
 
 class BTgymDataFeedServer(multiprocessing.Process):
@@ -30,11 +36,38 @@ class BTgymDataFeedServer(multiprocessing.Process):
     Data provider server class.
     Enables efficient data sampling for asynchronous multiply BTgym environments execution.
     Manages global back-testing time and broadcast messages.
+
+    Global time updates are accepted either via REQ/REP `_set_broadcast_message` request or, without blocking
+    the sender, via PULL socket bound to port reported on `_get_broadcast_address` request. Latter updates
+    are coalesced: only the latest one is applied, lazily, before serving any request.
+
+    With `num_workers` set, server accepts requests via ROUTER socket: sampling and read-only requests
+    (see `concurrent_requests`) are served by worker threads, so clients do not queue behind each other's
+    responses, while control requests and global time updates are served by main thread in order of arrival.
+    Dataset sampling and reset are serialized by lock, other reads are lock-free.
+
+    If `share_data` is set, loaded dataset is published once as memory-mapped files (see
+    btgym.datafeed.shared.SharedDataset) and `_get_data` requests carrying `accept_ref` key are answered with
+    `sample_ref` reference to published data instead of pickled sample instance, where possible.
     """
     process = None
     dataset_stat = None
 
-    def __init__(self, dataset=None, network_address=None, log_level=None, task=0):
+    # Requests served by worker threads, in concurrent mode:
+    concurrent_requests = ('_get_data', '_get_info', '_get_broadcast_message', '_get_global_time')
+
+    def __init__(
+        self,
+        dataset=None,
+        network_address=None,
+        log_level=None,
+        task=0,
+        in_process=False,
+        ready_event=None,
+        share_data=False,
+        shared_data_dir=None,
+        num_workers=0,
+    ):
         """
         Configures data server instance.
 
@@ -43,6 +76,14 @@ class BTgymDataFeedServer(multiprocessing.Process):
             network_address:    ...to bind to.
             log_level:          int, logbook.level
             task:               id
+            in_process:         bool, if True - server is expected to run as thread of environment process
+                                and uses in-process sockets instead of ZMQ ones;
+            ready_event:        multiprocessing.Event or alike, set as soon as server is ready to accept
+                                connections, if given;
+            share_data:         bool, if True - publish dataset to shared memory and send samples as references;
+            shared_data_dir:    str, directory to publish dataset to, see btgym.datafeed.shared.default_shared_dir();
+            num_workers:        int, if positive - serve `concurrent_requests` by that many threads via ROUTER
+                                socket, serve requests one by one via REP socket otherwise; not used in_process.
         """
         super(BTgymDataFeedServer, self).__init__()
 
@@ -54,12 +95,111 @@ class BTgymDataFeedServer(multiprocessing.Process):
         self.network_address = network_address
         self.default_sample_config = copy.deepcopy(DataSampleConfig)
         self.broadcast_message = None
+        self.context_class = InProcessContext if in_process else zmq.Context
+        self.ready_event = ready_event
+        self.log_handler = None
+        self.share_data = share_data
+        self.shared_data_dir = shared_data_dir
+        self.shared_data = None
+        self.shared_data_source = None
+        self.num_workers = num_workers
+        self.dataset_lock = None
+        self.broadcast_port = None
 
         self.debug_pre_sample_fails = 0
         self.debug_pre_sample_attempts = 0
 
         # self.global_timestamp = 0
 
+    def set_broadcast_message(self, timestamp, broadcast_message):
+        """
+        Sets global time and broadcast message, unless it is an attempt to move back in time.
+
+        Returns:
+            str, status message
+        """
+        if self.dataset.global_timestamp != 0 and self.dataset.global_timestamp > timestamp:
+            message = 'Moving back in time not supported! ' +\
+                      'Current global_time: {}, '.\
+                          format(datetime.datetime.fromtimestamp(self.dataset.global_timestamp)) +\
+                      'attempt to set: {}; global_time and broadcast message not set.'.\
+                          format(datetime.datetime.fromtimestamp(timestamp)) +\
+                      'Hint: check sampling logic consistency.'
+
+            self.log.info(message)
+
+        else:
+            with self.dataset_lock:
+                self.dataset.global_timestamp = timestamp
+                self.broadcast_message = broadcast_message
+            message = 'global_time set to: {} / stamp: {}'.\
+                format(
+                    datetime.datetime.fromtimestamp(self.dataset.global_timestamp),
+                    self.dataset.global_timestamp
+                )
+        return message
+
+    def apply_broadcast(self, broadcast_socket):
+        """
+        Applies latest of global time updates pending at broadcast socket, if any.
+        """
+        update = None
+        while True:
+            try:
+                update = broadcast_socket.recv_pyobj(flags=zmq.NOBLOCK)
+
+            except zmq.Again:
+                break
+
+        if update is not None:
+            self.log.debug(self.set_broadcast_message(update['timestamp'], update['broadcast_message']))
+
+    def publish_data(self):
+        """
+        Publishes currently loaded dataset data to shared memory, unless it is already published.
+        """
+        if not self.share_data:
+            return
+
+        if self.shared_data is not None:
+            if self.shared_data_source is self.dataset.data:
+                return
+
+            self.shared_data.close()
+
+        self.shared_data = SharedDataset.publish(self.dataset, dirname=self.shared_data_dir)
+        if self.shared_data is not None:
+            self.shared_data_source = self.dataset.data
+            self.log.info('Dataset published to: <{}>'.format(self.shared_data.path))
+
+        else:
+            self.log.info('Dataset can not be shared, samples will be sent as a whole.')
+
+    def get_data_message(self, sample, accept_ref=False):
+        """
+        Composes `_get_data` response.
+
+        Args:
+            sample:         sample instance;
+            accept_ref:     bool, if True - requester is able to resolve reference to shared data.
+
+        Returns:
+            dictionary of either `sample` instance or `sample_ref` reference, dataset statistic and global time.
+        """
+        message = {
+            'sample': sample,
+            'stat': self.dataset_stat,
+            'origin': 'data_server',
+            'timestamp': self.dataset.global_timestamp,
+        }
+        if accept_ref and self.shared_data is not None:
+            ref = self.shared_data.get_ref(sample)
+            if ref is not None:
+                message['sample'] = None
+                message['sample_ref'] = ref
+
+        return message
+
     def get_data(self, sample_config=None):
         """
         Get Trial sample according to parameters received.
@@ -107,19 +247,31 @@ class BTgymDataFeedServer(multiprocessing.Process):
         # Logging:
         from logbook import Logger, StreamHandler, WARNING
         import sys
-        StreamHandler(sys.stdout).push_application()
+        self.log_handler = StreamHandler(sys.stdout)
+        self.log_handler.push_application()
         if self.log_level is None:
             self.log_level = WARNING
         self.log = Logger('BTgymDataServer_{}'.format(self.task), level=self.log_level)
 
         self.process = multiprocessing.current_process()
         self.log.info('PID: {}'.format(self.process.pid))
+        self.dataset_lock = threading.RLock()
 
         # Set up a comm. channel for server as ZMQ socket:
-        context = zmq.Context()
-        socket = context.socket(zmq.REP)
+        context = self.context_class()
+        concurrent = self.num_workers > 0 and self.context_class is zmq.Context
+        socket = context.socket(zmq.ROUTER if concurrent else zmq.REP)
         socket.bind(self.network_address)
 
+        # Non-blocking global time updates channel, keeps latest update only:
+        broadcast_socket = context.socket(zmq.PULL)
+        broadcast_socket.setsockopt(zmq.CONFLATE, 1)
+        broadcast_port = broadcast_socket.bind_to_random_port(self.network_address.rsplit(':', 1)[0])
+        self.broadcast_port = broadcast_port
+
+        if self.ready_event is not None:
+            self.ready_event.set()
+
         # Actually load data to BTgymDataset instance, will reset it later on:
         try:
             assert not self.dataset.data.empty
@@ -129,128 +281,242 @@ class BTgymDataFeedServer(multiprocessing.Process):
 
         # Describe dataset:
         self.dataset_stat = self.dataset.describe()
+        self.publish_data()
+
+        if concurrent:
+            self.serve_concurrent(context, socket, broadcast_socket)
 
-        # Main loop:
+        else:
+            self.serve(socket, broadcast_socket)
+
+        if self.shared_data is not None:
+            self.shared_data.close()
+        socket.close()
+        broadcast_socket.close()
+        context.destroy()
+
+    def serve(self, socket, broadcast_socket):
+        """
+        Serves requests one by one via REP socket until `_stop` request is received.
+        """
         while True:
             # Stick here until receive any request:
             service_input = socket.recv_pyobj()
             self.log.debug('Received <{}>'.format(service_input))
 
-            if 'ctrl' in service_input:
-                # It's time to exit:
-                if service_input['ctrl'] == '_stop':
-                    # Server shutdown logic:
-                    # send last run statistic, release comm channel and exit:
-                    message = {'ctrl': 'Exiting.'}
-                    self.log.info(str(message))
-                    socket.send_pyobj(message)
-                    socket.close()
-                    context.destroy()
-                    return None
-
-                # Reset datafeed:
-                elif service_input['ctrl'] == '_reset_data':
+            # Catch up with global time:
+            self.apply_broadcast(broadcast_socket)
+
+            message = self.handle_request(service_input)
+            socket.send_pyobj(message)
+
+            if service_input.get('ctrl') == '_stop':
+                return
+
+    def serve_concurrent(self, context, socket, broadcast_socket):
+        """
+        Serves requests via ROUTER socket until `_stop` request is received. Read-only requests are handed
+        to pool of worker threads and served concurrently, others are served by this thread in order of arrival.
+        Workers send pickled responses back via inproc PUSH sockets, this thread relays them to clients.
+        """
+        replies_address = 'inproc://btgym_data_server_replies_{}'.format(id(self))
+        replies_socket = context.socket(zmq.PULL)
+        replies_socket.bind(replies_address)
+
+        work_queue = queue.Queue()
+        workers = [
+            threading.Thread(
+                target=self._worker,
+                args=(context, replies_address, work_queue),
+                name='BTgymDataServer_{}_worker_{}'.format(self.task, i),
+                daemon=True,
+            )
+            for i in range(self.num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        poller = zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
+        poller.register(replies_socket, zmq.POLLIN)
+
+        while True:
+            events = dict(poller.poll())
+
+            # Relay responses made by workers:
+            if events.get(replies_socket) == zmq.POLLIN:
+                while True:
                     try:
-                        kwargs = service_input['kwargs']
+                        socket.send_multipart(replies_socket.recv_multipart(flags=zmq.NOBLOCK))
 
-                    except KeyError:
-                        kwargs = {}
+                    except zmq.Again:
+                        break
 
-                    self.dataset.reset(**kwargs)
-                    # self.global_timestamp = self.dataset.global_timestamp
-                    self.log.notice(
-                        'Initial global_time set to: {} / stamp: {}'.
-                        format(
-                            datetime.datetime.fromtimestamp(self.dataset.global_timestamp),
-                            self.dataset.global_timestamp
-                        )
+            if events.get(socket) != zmq.POLLIN:
+                continue
+
+            # REQ clients envelope: [identity, empty delimiter, request]:
+            frames = socket.recv_multipart()
+            received = time.time()
+            envelope, service_input = frames[:-1], pickle.loads(frames[-1])
+            self.log.debug('Received <{}>'.format(service_input))
+
+            # Catch up with global time:
+            self.apply_broadcast(broadcast_socket)
+
+            if service_input.get('ctrl') in self.concurrent_requests:
+                work_queue.put((envelope, service_input, received))
+                continue
+
+            message = self.handle_request(service_input)
+            socket.send_multipart(envelope + [pickle.dumps(message, pickle.HIGHEST_PROTOCOL)])
+
+            if service_input.get('ctrl') == '_stop':
+                break
+
+        for _ in workers:
+            work_queue.put(None)
+        for worker in workers:
+            worker.join()
+        replies_socket.close()
+
+    def _worker(self, context, replies_address, work_queue):
+        """
+        Worker thread body: serves requests from work queue, sends pickled responses to replies address.
+        """
+        replies_socket = context.socket(zmq.PUSH)
+        replies_socket.setsockopt(zmq.LINGER, 0)
+        replies_socket.connect(replies_address)
+        try:
+            while True:
+                work = work_queue.get()
+                if work is None:
+                    return
+
+                envelope, service_input, received = work
+                started = time.time()
+                try:
+                    message = self.handle_request(service_input)
+
+                except Exception as e:
+                    # Client is waiting on REQ socket and must get a reply in any case:
+                    message = {'ctrl': 'Failed to serve <{}>: {!r}'.format(service_input.get('ctrl'), e)}
+                    self.log.exception(message['ctrl'])
+
+                replies_socket.send_multipart(envelope + [pickle.dumps(message, pickle.HIGHEST_PROTOCOL)])
+                self.log.debug(
+                    '<{}> queued for {:1.6f}s, served in {:1.6f}s.'.format(
+                        service_input.get('ctrl'),
+                        started - received,
+                        time.time() - started
                     )
-                    message = {'ctrl': 'Reset with kwargs: {}'.format(kwargs)}
-                    self.log.debug('Data_is_ready: {}'.format(self.dataset.is_ready))
-                    socket.send_pyobj(message)
+                )
+
+        finally:
+            replies_socket.close()
+
+    def handle_request(self, service_input):
+        """
+        Serves single request. Safe to call concurrently for requests listed in `concurrent_requests`.
+
+        Args:
+            service_input:  request dictionary
+
+        Returns:
+            response dictionary or str
+        """
+        if 'ctrl' in service_input:
+            # It's time to exit:
+            if service_input['ctrl'] == '_stop':
+                # Server shutdown logic:
+                # send last run statistic, release comm channel and exit:
+                message = {'ctrl': 'Exiting.'}
+                self.log.info(str(message))
+
+            # Reset datafeed:
+            elif service_input['ctrl'] == '_reset_data':
+                try:
+                    kwargs = service_input['kwargs']
+
+                except KeyError:
+                    kwargs = {}
+
+                with self.dataset_lock:
+                    self.dataset.reset(**kwargs)
+                    # Reset can load new data:
+                    self.publish_data()
                     self.local_step = 0
 
-                # Send dataset sample:
-                elif service_input['ctrl'] == '_get_data':
-                    if self.dataset.is_ready:
-                        sample = self.get_data(sample_config=service_input['kwargs'])
-                        message = 'Sending sample_#{}.'.format(self.local_step)
-                        self.log.debug(message)
-                        socket.send_pyobj(
-                            {
-                                'sample': sample,
-                                'stat': self.dataset_stat,
-                                'origin': 'data_server',
-                                'timestamp': self.dataset.global_timestamp,
-                            }
-                        )
-
-                    else:
-                        message = {'ctrl': 'Dataset not ready, waiting for control key <_reset_data>'}
-                        self.log.debug('Sent: ' + str(message))
-                        socket.send_pyobj(message)  # pairs any other input
-
-                # Send dataset statisitc:
-                elif service_input['ctrl'] == '_get_info':
-                    message = 'Sending info for #{}.'.format(self.local_step)
-                    self.log.debug(message)
-                    # Compose response:
-                    info_dict = dict(
-                        dataset_stat=self.dataset_stat,
-                        dataset_columns=list(self.dataset.names),
-                        pid=self.process.pid,
-                        dataset_is_ready=self.dataset.is_ready,
-                        data_names=self.dataset.data_names
+                # self.global_timestamp = self.dataset.global_timestamp
+                self.log.notice(
+                    'Initial global_time set to: {} / stamp: {}'.
+                    format(
+                        datetime.datetime.fromtimestamp(self.dataset.global_timestamp),
+                        self.dataset.global_timestamp
                     )
-                    socket.send_pyobj(info_dict)
-
-                # Set global time:
-                elif service_input['ctrl'] == '_set_broadcast_message':
-                    if self.dataset.global_timestamp != 0 and self.dataset.global_timestamp > service_input['timestamp']:
-                        message = 'Moving back in time not supported! ' +\
-                                  'Current global_time: {}, '.\
-                                      format(datetime.datetime.fromtimestamp(self.dataset.global_timestamp)) +\
-                                  'attempt to set: {}; global_time and broadcast message not set.'.\
-                                      format(datetime.datetime.fromtimestamp(service_input['timestamp'])) +\
-                                  'Hint: check sampling logic consistency.'
-
-                        self.log.info(message)
-
-                    else:
-                        self.dataset.global_timestamp = service_input['timestamp']
-                        self.broadcast_message = service_input['broadcast_message']
-                        message = 'global_time set to: {} / stamp: {}'.\
-                            format(
-                                datetime.datetime.fromtimestamp(self.dataset.global_timestamp),
-                                self.dataset.global_timestamp
-                            )
-                    socket.send_pyobj(message)
-                    self.log.debug(message)
-
-                elif service_input['ctrl'] == '_get_global_time':
-                    # Tell time:
-                    message = {'timestamp': self.dataset.global_timestamp}
-                    socket.send_pyobj(message)
-
-                elif service_input['ctrl'] == '_get_broadcast_message':
-                    # Tell:
-                    message = {
-                        'timestamp': self.dataset.global_timestamp,
-                        'broadcast_message': self.broadcast_message,
-                    }
-                    socket.send_pyobj(message)
-
-                else:  # ignore any other input
-                    # NOTE: response dictionary must include 'ctrl' key
-                    message = {
-                        'ctrl':
-                            'waiting for control keys:  <_reset_data>, <_get_data>, ' +
-                            '<_get_info>, <_stop>, <_get_global_time>, <_get_broadcast_message>'
-                    }
+                )
+                message = {'ctrl': 'Reset with kwargs: {}'.format(kwargs)}
+                self.log.debug('Data_is_ready: {}'.format(self.dataset.is_ready))
+
+            # Send dataset sample:
+            elif service_input['ctrl'] == '_get_data':
+                if self.dataset.is_ready:
+                    with self.dataset_lock:
+                        sample = self.get_data(sample_config=service_input['kwargs'])
+                        message = self.get_data_message(sample, accept_ref=service_input.get('accept_ref', False))
+                    self.log.debug('Sending sample_#{}.'.format(self.local_step))
+
+                else:
+                    message = {'ctrl': 'Dataset not ready, waiting for control key <_reset_data>'}
                     self.log.debug('Sent: ' + str(message))
-                    socket.send_pyobj(message)  # pairs any other input
 
-            else:
-                message = {'ctrl': 'No <ctrl> key received, got:\n{}'.format(service_input)}
-                self.log.debug(str(message))
-                socket.send_pyobj(message) # pairs input
+            # Send dataset statisitc:
+            elif service_input['ctrl'] == '_get_info':
+                self.log.debug('Sending info for #{}.'.format(self.local_step))
+                # Compose response:
+                message = dict(
+                    dataset_stat=self.dataset_stat,
+                    dataset_columns=list(self.dataset.names),
+                    pid=self.process.pid,
+                    dataset_is_ready=self.dataset.is_ready,
+                    data_names=self.dataset.data_names
+                )
+
+            # Set global time:
+            elif service_input['ctrl'] == '_set_broadcast_message':
+                message = self.set_broadcast_message(
+                    service_input['timestamp'],
+                    service_input['broadcast_message']
+                )
+                self.log.debug(message)
+
+            elif service_input['ctrl'] == '_get_broadcast_address':
+                # Where to push global time updates to, same host:
+                message = {'broadcast_port': self.broadcast_port}
+
+            elif service_input['ctrl'] == '_get_global_time':
+                # Tell time:
+                message = {'timestamp': self.dataset.global_timestamp}
+
+            elif service_input['ctrl'] == '_get_broadcast_message':
+                # Tell:
+                message = {
+                    'timestamp': self.dataset.global_timestamp,
+                    'broadcast_message': self.broadcast_message,
+                }
+
+            else:  # ignore any other input
+                # NOTE: response dictionary must include 'ctrl' key
+                message = {
+                    'ctrl':
+                        'waiting for control keys:  <_reset_data>, <_get_data>, ' +
+                        '<_get_info>, <_stop>, <_get_global_time>, <_get_broadcast_message>, ' +
+                        '<_set_broadcast_message>, <_get_broadcast_address>'
+                }
+                self.log.debug('Sent: ' + str(message))
+
+        else:
+            message = {'ctrl': 'No <ctrl> key received, got:\n{}'.format(service_input)}
+            self.log.debug(str(message))
+
+        return message
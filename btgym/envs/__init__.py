@@ -19,3 +19,4 @@
 
 from btgym.envs.base import BTgymEnv
 from btgym.envs.multidiscrete import MultiDiscreteEnv
+from btgym.envs.vector import BTgymVecEnv
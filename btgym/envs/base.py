@@ -20,8 +20,12 @@
 from logbook import Logger, StreamHandler, WARNING, NOTICE, INFO, DEBUG
 import sys
 import time
+import asyncio
 import zmq
+import zmq.asyncio
 import os
+import socket
+import multiprocessing
 import copy
 import numpy as np
 import gym
@@ -36,6 +40,10 @@ from btgym import DictSpace, ActionDictSpace
 from btgym.datafeed.multi import BTgymMultiData
 
 from btgym.rendering import BTgymNullRendering
+from btgym.fastengine import BTgymFastEngine, BTgymFastStrategy
+from btgym.transport import SharedObservationRing, InProcessContext, InProcessRunner, stack_observations
+from btgym.transport import get_space_layout
+from btgym.transport import PickleWireCodec, BinaryWireCodec
 
 ############################## OpenAI Gym Environment  ##############################
 
@@ -68,6 +76,7 @@ class BTgymEnv(gym.Env):
     server = None  # Server process.
     context = None  # ZMQ context.
     socket = None  # ZMQ socket, client side.
+    async_socket = None  # (socket, event loop, zmq.asyncio socket) tuple, shadows client socket for areset()/astep().
     port = 5500  # network port to use.
     network_address = 'tcp://127.0.0.1:'  # using localhost.
     ctrl_actions = ('_done', '_reset', '_stop', '_getstat', '_render')  # server control messages.
@@ -77,6 +86,22 @@ class BTgymEnv(gym.Env):
     connect_timeout = 60  # server connection timeout in seconds.
     #connect_timeout_step = 0.01  # time between retries in seconds.
 
+    # Observation transport:
+    obs_transport = 'pickle'  # how server passes observations: `pickle`, `binary` - via socket, `shm` - via shared memory.
+    obs_ring_size = 8  # for `shm`: number of shared memory slots, i.e. number of recent observations kept valid.
+    obs_ring = None  # btgym.transport.SharedObservationRing instance.
+    wire_codec = PickleWireCodec()  # per-step messages codec.
+
+    # Execution mode:
+    in_process = False  # run server and data_server as threads of this process, communicating via in-process queues.
+    server_pool = None  # btgym.pool.BTgymServerPool instance to lease server and data_server processes from.
+    share_data = False  # publish dataset to shared memory, pass trial samples as row ranges; not used in_process.
+    data_server_workers = 0  # data_server threads serving sampling requests concurrently; not used in_process.
+    prefetch_episodes = False  # server samples next episode of current trial in background while current one runs.
+
+    # Instrumentation:
+    profile_steps = False  # time server step phases, see btgym.profiling.StepLatencyProfile.
+
     # Rendering:
     render_enabled = True
     render_modes = ['human', 'episode',]
@@ -113,13 +138,42 @@ class BTgymEnv(gym.Env):
             strategy=None (btgym.startegy):                 strategy to be used by `engine`, any subclass of
                                                             btgym.strategy.base.BTgymBaseStrateg
             engine=None (bt.Cerebro):                       environment simulation engine, any bt.Cerebro subclass,
-                                                            overrides `strategy` arg.
+                                                            overrides `strategy` arg; if set to `fast` - default
+                                                            configuration runs on btgym.fastengine.BTgymFastEngine,
+                                                            single asset, market orders, discrete actions only;
+                                                            `strategy` should be BTgymFastStrategy subclass then.
             network_address=`tcp://127.0.0.1:` (str):       BTGym_server address.
             port=5500 (int):                                network port to use for server - API_shell communication.
             data_master=True (bool):                        let this environment control over data_server;
             data_network_address=`tcp://127.0.0.1:` (str):  data_server address.
             data_port=4999 (int):                           network port to use for server -- data_server communication.
             connect_timeout=60 (int):                       server connection timeout in seconds.
+            obs_transport=`pickle` (str):                   observation transport: `pickle` - send pickled with
+                                                            server response; `shm` - write to shared memory ring,
+                                                            return numpy arrays viewing it (see Note); `binary` -
+                                                            send actions, observations and rewards as raw
+                                                            binary frames (btgym.transport.BinaryWireCodec);
+            obs_ring_size=8 (int):                          number of shared memory ring slots, for `shm` only.
+            in_process=False (bool):                        run server and data_server within this process (no
+                                                            subprocesses, no ZMQ), see Note.
+            server_pool=None (BTgymServerPool):             run server and data_server in warm pool processes
+                                                            instead of starting new ones.
+            share_data=False (bool):                        data_server publishes dataset to shared memory once and
+                                                            sends trials to server as row ranges instead of
+                                                            pickled dataframes, see btgym.datafeed.shared;
+                                                            files are left in /dev/shm if data_server gets killed;
+            data_server_workers=0 (int):                    data_server threads serving trial sampling and info
+                                                            requests of many environments concurrently; 0 - serve
+                                                            requests one by one; only pays off when many
+                                                            environments share one data_server;
+            prefetch_episodes=False (bool):                 server samples and converts next episode data in
+                                                            background while current episode runs; only done when
+                                                            reset kwargs reuse current trial (trial_config
+                                                            get_new=False); prefetched data is used if next reset
+                                                            comes with same kwargs and global time is unchanged;
+            profile_steps=False (bool):                     time server step phases; per-episode latency
+                                                            histograms are returned by get_stat() under
+                                                            `step_latency` key.
             render_enabled=True (bool):                     enable rendering for this environment;
             render_modes=['human', 'episode'] (list):       `episode` - plotted episode results;
                                                             `human` - raw_state observation.
@@ -164,6 +218,17 @@ class BTgymEnv(gym.Env):
 
             If any <other> kwarg is given:
                 override corresponding default parameter.
+
+        Note:
+            With `obs_transport='shm'` observation returned by step() is dictionary of arrays sharing memory with
+            server process; those are valid for next `obs_ring_size - 1` steps only and should be copied explicitly
+            if kept longer.
+
+            With `in_process=True` backtrader engine runs in a thread of environment process, handing control back
+            and forth with step() calls like a coroutine: messages are passed by reference, nothing is pickled;
+            observation arrays are copied once out of strategy state buffers, which are refilled every step.
+            Intended for single environment research and benchmarks. Since nothing gets serialized in this mode,
+            `binary` transport is not applicable.
         """
         # Parameters and default values:
         self.params = dict(
@@ -308,6 +373,14 @@ class BTgymEnv(gym.Env):
             if key in kwargs.keys():
                 self.params['engine'][key] = kwargs.pop(key)
 
+        if self.engine == 'fast':
+            # Array-backed engine, gets configured same way as default Cerebro below:
+            self.engine = None
+            engine_class, base_strategy, msg = BTgymFastEngine, BTgymFastStrategy, 'Fast engine used.'
+
+        else:
+            engine_class, base_strategy, msg = bt.Cerebro, BTgymBaseStrategy, 'Base Cerebro class used.'
+
         if self.engine is not None:
             # If full-blown bt.Cerebro() subclass has been passed:
             # Update info:
@@ -323,8 +396,7 @@ class BTgymEnv(gym.Env):
             # Default configuration for Backtrader computational engine (Cerebro),
             # if no bt.Cerebro() custom subclass has been passed,
             # get base class Cerebro(), using kwargs on top of defaults:
-            self.engine = bt.Cerebro()
-            msg = 'Base Cerebro class used.'
+            self.engine = engine_class()
 
             # First, set STRATEGY configuration:
             if self.strategy is not None:
@@ -333,7 +405,7 @@ class BTgymEnv(gym.Env):
 
             else:
                 # Base class strategy :
-                self.strategy = BTgymBaseStrategy
+                self.strategy = base_strategy
                 msg2 = 'Base Strategy class used.'
 
             # Add, using kwargs on top of defaults:
@@ -450,13 +522,66 @@ class BTgymEnv(gym.Env):
         np.random.seed(self.random_seed)
 
     @staticmethod
-    def _comm_with_timeout( socket, message,):
+    def _comm_with_timeout( socket, message, codec=None):
         """
         Exchanges messages via socket, timeout sensitive.
 
         Args:
             socket: zmq connected socket to communicate via;
             message: message to send;
+            codec: messages codec to use, pickle if None;
+
+        Note:
+            socket zmq.RCVTIMEO and zmq.SNDTIMEO should be set to some finite number of milliseconds.
+
+        Returns:
+            dictionary:
+                `status`: communication result;
+                `message`: received message if status == `ok` or None;
+                `time`: remote side response time.
+        """
+        response = dict(
+            status='ok',
+            message=None,
+        )
+        if codec is None:
+            codec = PickleWireCodec()
+
+        try:
+            codec.send(socket, message)
+
+        except zmq.ZMQError as e:
+            if e.errno == zmq.EAGAIN:
+                response['status'] = 'send_failed_due_to_connect_timeout'
+
+            else:
+                response['status'] = 'send_failed_for_unknown_reason'
+            return response
+
+        start = time.time()
+        try:
+            response['message'] = codec.recv(socket)
+            response['time'] = time.time() - start
+
+        except zmq.ZMQError as e:
+            if e.errno == zmq.EAGAIN:
+                response['status'] = 'receive_failed_due_to_connect_timeout'
+
+            else:
+                response['status'] = 'receive_failed_for_unknown_reason'
+            return response
+
+        return response
+
+    @staticmethod
+    async def _acomm_with_timeout(socket, message, codec=None):
+        """
+        Asyncio counterpart of _comm_with_timeout(): exchanges messages via zmq.asyncio socket, timeout sensitive.
+
+        Args:
+            socket: zmq.asyncio connected socket to communicate via;
+            message: message to send;
+            codec: messages codec to use, pickle if None;
 
         Note:
             socket zmq.RCVTIMEO and zmq.SNDTIMEO should be set to some finite number of milliseconds.
@@ -471,8 +596,11 @@ class BTgymEnv(gym.Env):
             status='ok',
             message=None,
         )
+        if codec is None:
+            codec = PickleWireCodec()
+
         try:
-            socket.send_pyobj(message)
+            await codec.asend(socket, message)
 
         except zmq.ZMQError as e:
             if e.errno == zmq.EAGAIN:
@@ -484,7 +612,7 @@ class BTgymEnv(gym.Env):
 
         start = time.time()
         try:
-            response['message'] = socket.recv_pyobj()
+            response['message'] = await codec.arecv(socket)
             response['time'] = time.time() - start
 
         except zmq.ZMQError as e:
@@ -497,6 +625,80 @@ class BTgymEnv(gym.Env):
 
         return response
 
+    def _get_async_socket(self):
+        """
+        Returns zmq.asyncio socket shadowing client socket, bound to running event loop.
+        Socket options (timeouts) are shared with client socket.
+        """
+        loop = asyncio.get_event_loop()
+        if self.async_socket is None or self.async_socket[0] is not self.socket or self.async_socket[1] is not loop:
+            self.async_socket = (self.socket, loop, zmq.asyncio.Socket(self.socket))
+
+        return self.async_socket[-1]
+
+    def _connect_socket(self):
+        """
+        Opens client REQ socket connected to server.
+        """
+        self.socket = self.context.socket(zmq.REQ)
+        self.socket.setsockopt(zmq.RCVTIMEO, self.connect_timeout * 1000)
+        self.socket.setsockopt(zmq.SNDTIMEO, self.connect_timeout * 1000)
+        self.socket.connect(self.network_address)
+
+    def _reset_socket(self):
+        """
+        Replaces client socket left awaiting server reply: REQ socket can not send again until reply is received.
+        Late reply, if any, gets dropped by server side.
+        """
+        self.socket.close(linger=0)
+        self.async_socket = None
+        self._connect_socket()
+
+    @staticmethod
+    def _release_port(port):
+        """
+        Kills any process using network port, if port is actually busy.
+        """
+        probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            probe.bind(('127.0.0.1', port))
+
+        except OSError:
+            cmd = "kill $( lsof -i:{} -t ) > /dev/null 2>&1".format(port)
+            os.system(cmd)
+
+        finally:
+            probe.close()
+
+    def _wait_for_server(self, server, wait, name):
+        """
+        Waits for just started server to report it is ready to accept connections.
+
+        Args:
+            server:     server process or pool lease;
+            wait:       callable(timeout) returning True if server is ready;
+            name:       str, server name to report.
+        """
+        deadline = time.time() + self.connect_timeout
+        while not wait(0.05):
+            if not server.is_alive():
+                msg = '{} exited with code {} before getting ready.'.format(name, server.exitcode)
+                self.log.error(msg)
+                raise ChildProcessError(msg)
+
+            if time.time() > deadline:
+                msg = '{} not ready after {} sec.'.format(name, self.connect_timeout)
+                self.log.error(msg)
+                raise ConnectionError(msg)
+
+    @property
+    def context_class(self):
+        """
+        Messaging context class: zmq.Context or in-process stand-in.
+        """
+        return InProcessContext if self.in_process else zmq.Context
+
     def _start_server(self):
         """
         Configures backtrader REQ/REP server instance and starts server process.
@@ -507,20 +709,52 @@ class BTgymEnv(gym.Env):
         if self.context:
             self.context.destroy()
             self.socket = None
+            self.async_socket = None
 
         # 2. Kill any process using server port:
-        cmd = "kill $( lsof -i:{} -t ) > /dev/null 2>&1".format(self.port)
-        os.system(cmd)
+        if not self.in_process:
+            self._release_port(self.port)
 
         # Set up client channel:
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.REQ)
-        self.socket.setsockopt(zmq.RCVTIMEO, self.connect_timeout * 1000)
-        self.socket.setsockopt(zmq.SNDTIMEO, self.connect_timeout * 1000)
-        self.socket.connect(self.network_address)
+        self.context = self.context_class()
+        self._connect_socket()
+
+        # Shared memory for observations, if requested (should exist prior to server process):
+        if self.obs_transport == 'shm':
+            self.obs_ring = SharedObservationRing(self.observation_space, num_slots=self.obs_ring_size)
+
+        elif self.obs_transport in ['pickle', 'binary']:
+            self.obs_ring = None
+
+        else:
+            msg = 'Unknown observation transport: <{}>, expected one of: `pickle`, `shm`, `binary`.'.\
+                format(self.obs_transport)
+            self.log.error(msg)
+            raise ValueError(msg)
+
+        if self.server_pool is not None and (self.in_process or self.obs_transport == 'shm'):
+            msg = 'Server pool can not be used with in-process mode or shared memory observation transport.'
+            self.log.error(msg)
+            raise ValueError(msg)
+
+        # Per-step messages codec, negotiated with server at every reset:
+        if self.obs_transport == 'binary':
+            if self.in_process:
+                msg = 'Binary transport is not applicable in in-process mode.'
+                self.log.error(msg)
+                raise ValueError(msg)
+
+            self.wire_codec = BinaryWireCodec(
+                observation_space=self.observation_space,
+                action_space=self.action_space,
+                action_names=getattr(self, 'server_actions', None),
+            )
+
+        else:
+            self.wire_codec = PickleWireCodec()
 
         # Configure and start server:
-        self.server = BTgymServer(
+        server_kwargs = dict(
             cerebro=self.engine,
             render=self.renderer,
             network_address=self.network_address,
@@ -528,11 +762,26 @@ class BTgymEnv(gym.Env):
             connect_timeout=self.connect_timeout,
             log_level=self.log_level,
             task=self.task,
+            obs_ring=self.obs_ring,
+            in_process=self.in_process,
+            profile_steps=self.profile_steps,
+            share_data=self.share_data and not self.in_process,
+            prefetch_episodes=self.prefetch_episodes,
         )
-        self.server.daemon = False
-        self.server.start()
-        # Wait for server to startup:
-        time.sleep(1)
+        if self.in_process:
+            self.server = InProcessRunner(BTgymServer(**server_kwargs))
+            self.server.start()
+
+        elif self.server_pool is not None:
+            self.server = self.server_pool.lease(BTgymServer, **server_kwargs)
+            self._wait_for_server(self.server, self.server.wait_ready, 'Server')
+
+        else:
+            ready_event = multiprocessing.Event()
+            self.server = BTgymServer(ready_event=ready_event, **server_kwargs)
+            self.server.daemon = False
+            self.server.start()
+            self._wait_for_server(self.server, ready_event.wait, 'Server')
 
         # Check connection:
         self.log.info('Server started, pinging {} ...'.format(self.network_address))
@@ -562,11 +811,18 @@ class BTgymEnv(gym.Env):
                 # In case server is running and client side is ok:
                 self.socket.send_pyobj({'ctrl': '_stop'})
                 self.server_response = self.socket.recv_pyobj()
+                # Wait for server to exit; pooled worker gets released to pool on that:
+                self.server.join(timeout=self.connect_timeout)
 
             else:
                 self.server.terminate()
-                self.server.join()
-                self.server_response = 'Server process terminated.'
+                self.server.join(timeout=self.connect_timeout)
+                if self.server.is_alive():
+                    self.server_response = 'Server did not exit after {} sec.'.format(self.connect_timeout)
+                    self.log.warning(self.server_response)
+
+                else:
+                    self.server_response = 'Server process terminated.'
 
             self.log.info('{} Exit code: {}'.format(self.server_response,
                                                     self.server.exitcode))
@@ -575,6 +831,7 @@ class BTgymEnv(gym.Env):
         if self.context:
             self.context.destroy()
             self.socket = None
+            self.async_socket = None
 
     def _force_control_mode(self):
         """Puts BT server to control mode.
@@ -602,6 +859,32 @@ class BTgymEnv(gym.Env):
 
             return True
 
+    async def _aforce_control_mode(self):
+        """
+        Asyncio counterpart of _force_control_mode().
+        """
+        if not self.server or not self.server.is_alive():
+            self.server_response = 'No running server found. Hint: forgot to call reset()?'
+            self.log.info(self.server_response)
+            return False
+
+        if not self.context or self.context.closed:
+            self.server_response = 'No network connection found.'
+            self.log.info(self.server_response)
+            return False
+
+        socket = self._get_async_socket()
+        self.server_response = {}
+        attempt = 0
+
+        while 'ctrl' not in self.server_response:
+            await socket.send_pyobj({'ctrl': '_done'})
+            self.server_response = await socket.recv_pyobj()
+            attempt += 1
+            self.log.debug('FORCE CONTROL MODE attempt: {}.\nResponse: {}'.format(attempt, self.server_response))
+
+        return True
+
     def _assert_response(self, response):
         """
         Simple watcher:
@@ -619,6 +902,22 @@ class BTgymEnv(gym.Env):
         self.log.debug('Response checker received:\n{}\nas type: {}'.
                        format(response, type(response)))
 
+    def _decode_env_response(self, response):
+        """
+        Restores <o, r, d, i> tuple received from server according to observation transport used.
+
+        Args:
+            response:   server response to agent action
+
+        Returns:
+            environment response with observation part as [nested] dictionary of arrays.
+        """
+        if self.obs_ring is not None and type(response) == tuple and len(response) == 4:
+            # Observation is kept in shared memory slot:
+            return (self.obs_ring.read(response[0]),) + response[1:]
+
+        return response
+
     def _print_space(self, space, _tab=''):
         """
         Parses observation space shape or response.
@@ -692,6 +991,91 @@ class BTgymEnv(gym.Env):
                     b_beta=1
                 )
 
+        """
+        if self._request_reset(**kwargs):
+            # Get initial environment response:
+            self.env_response = self.step(self.get_initial_action())
+            self._assert_initial_response(self.env_response)
+
+            return self.env_response[0]
+
+        else:
+            msg = 'Something went wrong. env.reset() can not get response from server.'
+            self.log.exception(msg)
+            raise ChildProcessError(msg)
+
+    async def areset(self, **kwargs):
+        """
+        Asyncio counterpart of reset(): waits for server responses without blocking event loop, so
+        many environments can be kept in flight from single thread.
+        Server processes [re]starting, if needed, is still done synchronously.
+
+        Args:
+            kwargs:         any kwargs, see reset()
+
+        Returns:
+            observation space state
+
+        Note:
+            in in-process mode it is same as reset(), i.e. blocks until server responds.
+        """
+        if self.in_process:
+            return self.reset(**kwargs)
+
+        if await self._arequest_reset(**kwargs):
+            # Get initial environment response:
+            self.env_response = await self.astep(self.get_initial_action())
+            self._assert_initial_response(self.env_response)
+
+            return self.env_response[0]
+
+        else:
+            msg = 'Something went wrong. env.areset() can not get response from server.'
+            self.log.exception(msg)
+            raise ChildProcessError(msg)
+
+    async def _arequest_reset(self, **kwargs):
+        """
+        Asyncio counterpart of _request_reset().
+        """
+        self._check_servers()
+
+        if await self._aforce_control_mode():
+            self.server_response = await self._acomm_with_timeout(
+                socket=self._get_async_socket(),
+                message={'ctrl': '_reset', 'kwargs': kwargs, 'wire_codec': self.wire_codec.get_spec()}
+            )
+            return True
+
+        else:
+            return False
+
+    def _request_reset(self, **kwargs):
+        """
+        Ensures data_server and server are running, puts server to control mode and sends `_reset` request.
+        New episode starts when server receives first action.
+
+        Args:
+            kwargs:     reset() kwargs passed to server.
+
+        Returns:
+            True if server accepted request, False otherwise.
+        """
+        self._check_servers()
+
+        if self._force_control_mode():
+            self.server_response = self._comm_with_timeout(
+                socket=self.socket,
+                message={'ctrl': '_reset', 'kwargs': kwargs, 'wire_codec': self.wire_codec.get_spec()}
+            )
+            return True
+
+        else:
+            return False
+
+    def _check_servers(self):
+        """
+        Ensures data_server [for data_master] and server are running and dataset is ready.
         """
         # Data Server check:
         if self.data_master:
@@ -715,55 +1099,45 @@ class BTgymEnv(gym.Env):
             self.log.info('No running server found, starting...')
             self._start_server()
 
-        if self._force_control_mode():
-            self.server_response = self._comm_with_timeout(
-                socket=self.socket,
-                message={'ctrl': '_reset', 'kwargs': kwargs}
-            )
-            # Get initial environment response:
-            self.env_response = self.step(self.get_initial_action())
-
-            # Check (once) if it is really (o,r,d,i) tuple:
-            self._assert_response(self.env_response)
-
-            # Check (once) if state_space is as expected:
-            try:
-                assert self.observation_space.contains(self.env_response[0])
-
-            except (AssertionError, AttributeError) as e:
-                msg1 = self._print_space(self.observation_space.spaces)
-                msg2 = self._print_space(self.env_response[0])
-                msg3 = ''
-                for step_info in self.env_response[-1]:
-                    msg3 += '{}\n'.format(step_info)
-                msg = (
-                    '\nState observation shape/range mismatch!\n' +
-                    'Space set by env: \n{}\n' +
-                    'Space returned by server: \n{}\n' +
-                    'Full response:\n{}\n' +
-                    'Reward: {}\n' +
-                    'Done: {}\n' +
-                    'Info:\n{}\n' +
-                    'Hint: Wrong Strategy.get_state() parameters?'
-                ).format(
-                    msg1,
-                    msg2,
-                    self.env_response[0],
-                    self.env_response[1],
-                    self.env_response[2],
-                    msg3,
-                )
-                self.log.exception(msg)
-                self._stop_server()
-                raise AssertionError(msg)
-
-            return self.env_response[0]
+    def _assert_initial_response(self, env_response):
+        """
+        Checks (once per episode) if first environment response is (o,r,d,i) tuple and
+        state observation is consistent with observation space.
 
+        Args:
+            env_response:   environment response to initial action
+        """
+        self._assert_response(env_response)
 
-        else:
-            msg = 'Something went wrong. env.reset() can not get response from server.'
+        try:
+            assert self.observation_space.contains(env_response[0])
+
+        except (AssertionError, AttributeError) as e:
+            msg1 = self._print_space(self.observation_space.spaces)
+            msg2 = self._print_space(env_response[0])
+            msg3 = ''
+            for step_info in env_response[-1]:
+                msg3 += '{}\n'.format(step_info)
+            msg = (
+                '\nState observation shape/range mismatch!\n' +
+                'Space set by env: \n{}\n' +
+                'Space returned by server: \n{}\n' +
+                'Full response:\n{}\n' +
+                'Reward: {}\n' +
+                'Done: {}\n' +
+                'Info:\n{}\n' +
+                'Hint: Wrong Strategy.get_state() parameters?'
+            ).format(
+                msg1,
+                msg2,
+                env_response[0],
+                env_response[1],
+                env_response[2],
+                msg3,
+            )
             self.log.exception(msg)
-            raise ChildProcessError(msg)
+            self._stop_server()
+            raise AssertionError(msg)
 
     def step(self, action):
         """
@@ -777,6 +1151,107 @@ class BTgymEnv(gym.Env):
             tuple (Observation, Reward, Info, Done)
 
         """
+        # Send action (as dict of strings) to backtrader engine, receive environment response:
+        env_response = self._comm_with_timeout(
+            socket=self.socket,
+            message=self._make_step_message(action),
+            codec=self.wire_codec,
+        )
+        if not env_response['status'] in 'ok':
+            msg = '.step(): server unreachable with status: <{}>.'.format(env_response['status'])
+            self.log.error(msg)
+            raise ConnectionError(msg)
+
+        self.env_response = self._decode_env_response(env_response['message'])
+
+        return self.env_response
+
+    async def astep(self, action):
+        """
+        Asyncio counterpart of step(): waits for server response without blocking event loop.
+
+        Args:
+            action:     int or dict, action compatible to env.action_space
+
+        Returns:
+            tuple (Observation, Reward, Info, Done)
+
+        Note:
+            in in-process mode it is same as step(), i.e. blocks until server responds.
+        """
+        if self.in_process:
+            return self.step(action)
+
+        message = self._make_step_message(action)
+        env_response = await self._acomm_with_timeout(
+            socket=self._get_async_socket(),
+            message=message,
+            codec=self.wire_codec,
+        )
+        if not env_response['status'] in 'ok':
+            msg = '.astep(): server unreachable with status: <{}>.'.format(env_response['status'])
+            self.log.error(msg)
+            raise ConnectionError(msg)
+
+        self.env_response = self._decode_env_response(env_response['message'])
+
+        return self.env_response
+
+    def step_many(self, actions):
+        """
+        Makes sequence of steps in the environment with single server request: actions are executed one
+        per step in open-loop fashion, stops early if episode is done.
+        Useful for scripted baselines and backtests, where per-step round trip dominates.
+
+        Args:
+            actions:    iterable of actions, each compatible to env.action_space
+
+        Returns:
+            tuple (observations, rewards, dones, infos) of length K <= len(actions), where observations is
+            dictionary of arrays stacked along first dimension, rewards and dones are 1D arrays and infos is
+            list of step info lists.
+        """
+        actions = [self._make_step_message(action)['action'] for action in actions]
+        assert len(actions) > 0, '.step_many(): expected at least one action.'
+
+        env_response = self._comm_with_timeout(
+            socket=self.socket,
+            message={'actions': actions},
+            codec=self.wire_codec,
+        )
+        if not env_response['status'] in 'ok':
+            msg = '.step_many(): server unreachable with status: <{}>.'.format(env_response['status'])
+            self.log.error(msg)
+            raise ConnectionError(msg)
+
+        responses = env_response['message']
+        if not isinstance(responses, list):
+            msg = '.step_many(): unexpected server response: <{}>.'.format(responses)
+            self.log.error(msg)
+            raise AssertionError(msg)
+
+        self.env_response = responses[-1]
+
+        # Batch is pickled whatever transport is; match observations step() would return:
+        layout = None if self.obs_transport == 'pickle' else get_space_layout(self.observation_space)
+
+        return (
+            stack_observations([response[0] for response in responses], layout),
+            np.asarray([response[1] for response in responses]),
+            np.asarray([response[2] for response in responses], dtype=bool),
+            [response[3] for response in responses],
+        )
+
+    def _make_step_message(self, action):
+        """
+        Checks agent action and connection state, converts action to server message.
+
+        Args:
+            action:     int or dict, action compatible to env.action_space
+
+        Returns:
+            server message as dictionary
+        """
         # If we got int as action - try to treat it as an action for single-valued action space dict:
         self.log.debug('got action: {} as {}'.format(action, type(action)))
 
@@ -820,21 +1295,9 @@ class BTgymEnv(gym.Env):
             self.log.error(msg)
             raise ConnectionError(msg)
 
-        # Send action (as dict of strings) to backtrader engine, receive environment response:
         action_as_dict = {key: self.server_actions[key][value] for key, value in action.items()}
-        #print('step: ', action, action_as_dict)
-        env_response = self._comm_with_timeout(
-            socket=self.socket,
-            message={'action': action_as_dict}
-        )
-        if not env_response['status'] in 'ok':
-            msg = '.step(): server unreachable with status: <{}>.'.format(env_response['status'])
-            self.log.error(msg)
-            raise ConnectionError(msg)
 
-        self.env_response = env_response ['message']
-
-        return self.env_response
+        return {'action': action_as_dict}
 
     def close(self):
         """
@@ -935,24 +1398,37 @@ class BTgymEnv(gym.Env):
 
         # Only data_master launches/stops data_server process:
         if self.data_master:
-            # 2. Kill any process using server port:
-            cmd = "kill $( lsof -i:{} -t ) > /dev/null 2>&1".format(self.data_port)
-            os.system(cmd)
-
             # Configure and start server:
-            self.data_server = BTgymDataFeedServer(
+            data_server_kwargs = dict(
                 dataset=self.dataset,
                 network_address=self.data_network_address,
                 log_level=self.log_level,
-                task=self.task
+                task=self.task,
+                in_process=self.in_process,
+                share_data=self.share_data and not self.in_process,
+                num_workers=self.data_server_workers,
             )
-            self.data_server.daemon = False
-            self.data_server.start()
-            # Wait for server to startup
-            time.sleep(1)
+            if self.in_process:
+                self.data_server = InProcessRunner(BTgymDataFeedServer(**data_server_kwargs))
+                self.data_server.start()
+
+            else:
+                # 2. Kill any process using server port:
+                self._release_port(self.data_port)
+
+                if self.server_pool is not None:
+                    self.data_server = self.server_pool.lease(BTgymDataFeedServer, **data_server_kwargs)
+                    self._wait_for_server(self.data_server, self.data_server.wait_ready, 'Data_server')
+
+                else:
+                    ready_event = multiprocessing.Event()
+                    self.data_server = BTgymDataFeedServer(ready_event=ready_event, **data_server_kwargs)
+                    self.data_server.daemon = False
+                    self.data_server.start()
+                    self._wait_for_server(self.data_server, ready_event.wait, 'Data_server')
 
         # Set up client channel:
-        self.data_context = zmq.Context()
+        self.data_context = self.context_class()
         self.data_socket = self.data_context.socket(zmq.REQ)
         self.data_socket.setsockopt(zmq.RCVTIMEO, self.connect_timeout * 1000)
         self.data_socket.setsockopt(zmq.SNDTIMEO, self.connect_timeout * 1000)
@@ -988,11 +1464,17 @@ class BTgymEnv(gym.Env):
                 # In case server is running and is ok:
                 self.data_socket.send_pyobj({'ctrl': '_stop'})
                 self.data_server_response = self.data_socket.recv_pyobj()
+                self.data_server.join(timeout=self.connect_timeout)
 
             else:
                 self.data_server.terminate()
-                self.data_server.join()
-                self.data_server_response = 'Data_server process terminated.'
+                self.data_server.join(timeout=self.connect_timeout)
+                if self.data_server.is_alive():
+                    self.data_server_response = 'Data_server did not exit after {} sec.'.format(self.connect_timeout)
+                    self.log.warning(self.data_server_response)
+
+                else:
+                    self.data_server_response = 'Data_server process terminated.'
 
             self.log.info('{} Exit code: {}'.format(self.data_server_response, self.data_server.exitcode))
 
@@ -432,17 +432,15 @@ class PortfolioEnv(BTgymEnv):
         action[self.cash_name] = np.asarray([1.0])
         return action
 
-    def step(self, action):
+    def _make_step_message(self, action):
         """
-        Implementation of OpenAI Gym env.step() method.
-        Makes a step in the environment.
+        Checks agent action and connection state, converts action to server message.
 
         Args:
-            action:     int or dict, action compatible to env.action_space
+            action:     dict, action compatible to env.action_space
 
         Returns:
-            tuple (Observation, Reward, Info, Done)
-
+            server message as dictionary
         """
         # Are you in the list, ready to go and all that?
         if self.action_space.contains(action) \
@@ -466,16 +464,4 @@ class PortfolioEnv(BTgymEnv):
             self.log.exception(msg)
             raise AssertionError(msg)
 
-        # print('step: ', action, action_as_dict)
-        env_response = self._comm_with_timeout(
-            socket=self.socket,
-            message={'action': action}
-        )
-        if not env_response['status'] in 'ok':
-            msg = '.step(): server unreachable with status: <{}>.'.format(env_response['status'])
-            self.log.error(msg)
-            raise ConnectionError(msg)
-
-        self.env_response = env_response['message']
-
-        return self.env_response
+        return {'action': action}
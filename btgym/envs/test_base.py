@@ -0,0 +1,144 @@
+import copy
+import os
+import socket
+import unittest
+
+import numpy as np
+
+from btgym.envs.base import BTgymEnv
+
+
+filename = os.path.join(os.path.dirname(__file__), '..', '..', 'examples', 'data', 'DAT_ASCII_EURUSD_M1_201701.csv')
+
+# Same ~200 steps episode on every reset:
+sample_config = dict(get_new=True, sample_type=0, b_alpha=1, b_beta=1, force_interval=True, interval=[100, 400])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def assert_observations_equal(observation, other):
+    if isinstance(observation, dict):
+        assert observation.keys() == other.keys()
+        for key in observation.keys():
+            assert_observations_equal(observation[key], other[key])
+
+    else:
+        assert observation.dtype == other.dtype, (observation.dtype, other.dtype)
+        np.testing.assert_array_equal(observation, other)
+
+
+def index_observation(observations, i):
+    if isinstance(observations, dict):
+        return {key: index_observation(value, i) for key, value in observations.items()}
+
+    return observations[i]
+
+
+class StepManyTest(unittest.TestCase):
+
+    actions = np.random.RandomState(0).choice(4, size=40, p=[0.7, 0.1, 0.1, 0.1]).tolist()
+
+    def make_env(self, obs_transport):
+        return BTgymEnv(
+            filename=filename,
+            port=free_port(),
+            data_port=free_port(),
+            episode_duration={'days': 0, 'hours': 1, 'minutes': 0},
+            render_enabled=False,
+            obs_transport=obs_transport,
+        )
+
+    def reset(self, env):
+        return env.reset(trial_config=copy.deepcopy(sample_config), episode_config=copy.deepcopy(sample_config))
+
+    def check_same_as_step(self, obs_transport):
+        # Separate environments, so episode metadata (trial and sample numbers) is same as well:
+        env = self.make_env(obs_transport)
+        try:
+            self.reset(env)
+            observations, rewards, dones, infos = env.step_many(self.actions)
+
+        finally:
+            env.close()
+
+        env = self.make_env(obs_transport)
+        try:
+            self.reset(env)
+            # Shared memory observations get overwritten by later steps, keep copies:
+            responses = [copy.deepcopy(env.step(action)) for action in self.actions]
+
+        finally:
+            env.close()
+
+        self.assertEqual(len(rewards), len(self.actions))
+        self.assertEqual(infos, [info for _, _, _, info in responses])
+        np.testing.assert_array_equal(rewards, [reward for _, reward, _, _ in responses])
+        np.testing.assert_array_equal(dones, [done for _, _, done, _ in responses])
+        for i, (observation, _, _, _) in enumerate(responses):
+            assert_observations_equal(index_observation(observations, i), observation)
+
+    def test_same_as_step_pickle(self):
+        self.check_same_as_step('pickle')
+
+    def test_same_as_step_binary(self):
+        self.check_same_as_step('binary')
+
+    def test_same_as_step_shm(self):
+        self.check_same_as_step('shm')
+
+    def test_stops_when_done(self):
+        env = self.make_env('pickle')
+        try:
+            self.reset(env)
+            observations, rewards, dones, infos = env.step_many([0] * 1000)
+            self.assertLess(len(rewards), 1000)
+            self.assertTrue(dones[-1])
+            self.assertFalse(dones[:-1].any())
+            self.assertEqual(len(infos), len(rewards))
+            self.assertEqual(observations['raw'].shape[0], len(rewards))
+
+            # Episode is over, environment is ready for new one:
+            self.reset(env)
+            _, rewards, dones, _ = env.step_many([0] * 3)
+            self.assertEqual(len(rewards), 3)
+            self.assertFalse(dones.any())
+
+        finally:
+            env.close()
+
+
+class InProcessTest(unittest.TestCase):
+
+    def test_terminate_stops_server_thread(self):
+        env = BTgymEnv(
+            filename=filename,
+            port=free_port(),
+            data_port=free_port(),
+            episode_duration={'days': 0, 'hours': 1, 'minutes': 0},
+            render_enabled=False,
+            in_process=True,
+        )
+        try:
+            env.reset(trial_config=copy.deepcopy(sample_config), episode_config=copy.deepcopy(sample_config))
+            env.step(0)
+
+            # Mid-episode:
+            env.server.terminate()
+            env.server.join(timeout=10)
+            self.assertFalse(env.server.is_alive())
+            self.assertEqual(env.server.exitcode, 0)
+
+            env.data_server.terminate()
+            env.data_server.join(timeout=10)
+            self.assertFalse(env.data_server.is_alive())
+
+        finally:
+            env.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import copy
+import os
+import signal
+import unittest
+
+import numpy as np
+
+from btgym.envs.vector import BTgymVecEnv
+from btgym.envs.test_base import filename, sample_config, free_port
+
+
+class BTgymVecEnvTest(unittest.TestCase):
+
+    num_envs = 2
+
+    def make_vec_env(self, **kwargs):
+        return BTgymVecEnv(
+            num_envs=self.num_envs,
+            filename=filename,
+            port=free_port(),
+            data_port=free_port(),
+            episode_duration={'days': 0, 'hours': 1, 'minutes': 0},
+            render_enabled=False,
+            **kwargs
+        )
+
+    def reset(self, vec_env):
+        return vec_env.reset(trial_config=copy.deepcopy(sample_config), episode_config=copy.deepcopy(sample_config))
+
+    def run_episode(self, vec_env):
+        """
+        Holds till episode end, all environments run same episode.
+        """
+        for _ in range(1000):
+            observations, rewards, dones, infos = vec_env.step([0] * self.num_envs)
+            if dones.any():
+                return observations, rewards, dones, infos
+
+        self.fail('Episode did not end.')
+
+    def test_stacking(self):
+        vec_env = self.make_vec_env()
+        try:
+            observations = self.reset(vec_env)
+            self.assertEqual(observations['raw'].shape[0], self.num_envs)
+            self.assertEqual(observations['metadata']['first_row'].shape, (self.num_envs,))
+            np.testing.assert_array_equal(observations['raw'][0], observations['raw'][1])
+
+            observations, rewards, dones, infos = vec_env.step([0, 1])
+            self.assertEqual(observations['raw'].shape[1:], vec_env.observation_space.spaces['raw'].shape)
+            self.assertEqual(rewards.shape, (self.num_envs,))
+            self.assertEqual(dones.dtype, bool)
+            self.assertEqual(len(infos), self.num_envs)
+            self.assertEqual(infos[0][-1]['action'], {'default_asset': 'hold'})
+            self.assertEqual(infos[1][-1]['action'], {'default_asset': 'buy'})
+
+        finally:
+            vec_env.close()
+
+    def test_auto_reset(self):
+        vec_env = self.make_vec_env()
+        try:
+            initial_observations = self.reset(vec_env)
+            observations, rewards, dones, infos = self.run_episode(vec_env)
+            self.assertTrue(dones.all())
+            for i in range(self.num_envs):
+                terminal_observation = infos[i][-1]['terminal_observation']
+                self.assertFalse(np.array_equal(terminal_observation['raw'], observations['raw'][i]))
+                np.testing.assert_array_equal(observations['raw'][i], initial_observations['raw'][i])
+
+            # New episodes are running:
+            _, _, dones, _ = vec_env.step([0] * self.num_envs)
+            self.assertFalse(dones.any())
+
+        finally:
+            vec_env.close()
+
+    def test_no_auto_reset(self):
+        vec_env = self.make_vec_env(auto_reset=False)
+        try:
+            self.reset(vec_env)
+            observations, rewards, dones, infos = self.run_episode(vec_env)
+            self.assertTrue(dones.all())
+            for i in range(self.num_envs):
+                self.assertNotIn('terminal_observation', infos[i][-1])
+                np.testing.assert_array_equal(observations['raw'][i], vec_env.envs[i].env_response[0]['raw'])
+
+        finally:
+            vec_env.close()
+
+    def test_recovers_from_timeout(self):
+        vec_env = self.make_vec_env(connect_timeout=2)
+        try:
+            self.reset(vec_env)
+            stalled = vec_env.envs[1].server.pid
+            os.kill(stalled, signal.SIGSTOP)
+            try:
+                with self.assertRaises(ConnectionError):
+                    vec_env.step([0] * self.num_envs)
+
+            finally:
+                os.kill(stalled, signal.SIGCONT)
+
+            # Stalled server reply is dropped, both environments accept requests again:
+            observations = self.reset(vec_env)
+            self.assertEqual(observations['raw'].shape[0], self.num_envs)
+            _, rewards, _, _ = vec_env.step([0] * self.num_envs)
+            self.assertEqual(rewards.shape, (self.num_envs,))
+
+        finally:
+            vec_env.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
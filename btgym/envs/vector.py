@@ -0,0 +1,256 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import zmq
+import numpy as np
+
+from btgym.envs.base import BTgymEnv
+from btgym.transport import stack_observations
+
+
+class BTgymVecEnv:
+    """
+    Vectorized environment: runs N BTgym environments (each with its own BTgymServer process, all sharing
+    single data_server) and steps them concurrently.
+
+    Actions for all environments are sent at once by `step_async()`, replies are gathered by `step_wait()`
+    with single zmq.Poller, so wall time of batched step is about that of slowest server rather than sum
+    of all of them. Finished environments are reset automatically, see `step_wait()`.
+
+    Usage::
+
+        vec_env = BTgymVecEnv(num_envs=8, filename='../examples/data/DAT_ASCII_EURUSD_M1_2016.csv', port=5000)
+        observations = vec_env.reset()
+        while True:
+            observations, rewards, dones, infos = vec_env.step([0] * vec_env.num_envs)
+    """
+
+    def __init__(self, num_envs, env_class=BTgymEnv, port=5500, data_port=4999, auto_reset=True, **kwargs):
+        """
+
+        Args:
+            num_envs:       int, number of environments to run;
+            env_class:      BTgymEnv or any subclass;
+            port:           int, first network port to use, i-th environment server gets `port + i`;
+            data_port:      int, data_server port;
+            auto_reset:     bool, reset finished environments within `step_wait()`;
+            kwargs:         any environment kwargs, passed to every environment instance.
+
+        Note:
+            First environment is data_master and runs data_server; rendering, if enabled, is kept for
+            last environment only.
+        """
+        assert num_envs > 0, 'Expected positive number of environments, got: {}'.format(num_envs)
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.reset_kwargs = {}
+
+        render_enabled = kwargs.pop('render_enabled', False)
+        task = kwargs.pop('task', 0)
+        kwargs.pop('data_master', None)
+
+        self.envs = []
+        try:
+            for i in range(num_envs):
+                self.envs.append(
+                    env_class(
+                        port=port + i,
+                        data_port=data_port,
+                        data_master=(i == 0),
+                        render_enabled=render_enabled and i == num_envs - 1,
+                        task=task + 0.01 * i if num_envs > 1 else task,
+                        **kwargs
+                    )
+                )
+
+        except Exception as e:
+            self.close()
+            raise e
+
+        self.log = self.envs[0].log
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+        self.connect_timeout = self.envs[0].connect_timeout
+
+        self.poller = zmq.Poller()
+        self.waiting = []
+
+    def _gather(self, env_indices):
+        """
+        Receives responses from all servers in list, in order of arrival.
+
+        Args:
+            env_indices:    list of environments indices response is awaited from.
+
+        Returns:
+            dictionary {env_index: env response}
+
+        Raises:
+            ConnectionError, if some servers did not respond within connect_timeout; sockets of those
+            environments get replaced, so all environments can be sent requests (e.g. reset) again.
+        """
+        pending = {self.envs[i].socket: i for i in env_indices}
+        for socket in pending.keys():
+            self.poller.register(socket, zmq.POLLIN)
+
+        responses = {}
+        lost = []
+        try:
+            while len(responses) < len(env_indices):
+                events = dict(self.poller.poll(self.connect_timeout * 1000))
+                if not events:
+                    lost = [i for i in env_indices if i not in responses]
+                    msg = 'BTgymVecEnv: servers {} unreachable with status: <receive_failed_due_to_connect_timeout>.'.\
+                        format([self.envs[i].network_address for i in lost])
+                    self.log.error(msg)
+                    raise ConnectionError(msg)
+
+                for socket in events.keys():
+                    i = pending[socket]
+                    responses[i] = self.envs[i]._decode_env_response(self.envs[i].wire_codec.recv(socket))
+                    self.envs[i].env_response = responses[i]
+                    self.poller.unregister(socket)
+
+        finally:
+            for socket in pending.keys():
+                if socket in self.poller:
+                    self.poller.unregister(socket)
+
+            for i in lost:
+                self.envs[i]._reset_socket()
+
+        return responses
+
+    def _reset_envs(self, env_indices):
+        """
+        Resets environments in list, initial actions are sent to all servers at once.
+
+        Returns:
+            dictionary {env_index: initial env. response}
+        """
+        for i in env_indices:
+            env = self.envs[i]
+            if not env._request_reset(**self.reset_kwargs):
+                msg = 'Something went wrong. env.reset() can not get response from server @{}.'.\
+                    format(env.network_address)
+                self.log.exception(msg)
+                raise ChildProcessError(msg)
+
+            env.wire_codec.send(env.socket, env._make_step_message(env.get_initial_action()))
+
+        responses = self._gather(env_indices)
+        for i, response in responses.items():
+            self.envs[i]._assert_initial_response(response)
+
+        return responses
+
+    def reset(self, **kwargs):
+        """
+        Resets all environments.
+
+        Args:
+            kwargs:     environment reset() kwargs, also used for all subsequent automatic resets.
+
+        Returns:
+            batch of initial observations: dictionary of stacked arrays.
+        """
+        self.reset_kwargs = kwargs
+        # Data_master goes first to get data_server ready:
+        responses = self._reset_envs([0])
+        responses.update(self._reset_envs(list(range(1, self.num_envs))))
+
+        return stack_observations([responses[i][0] for i in range(self.num_envs)])
+
+    def step_async(self, actions):
+        """
+        Sends actions to all environment servers, does not wait for responses.
+
+        Args:
+            actions:    iterable of `num_envs` actions, each compatible to env.action_space
+        """
+        actions = list(actions)
+        assert len(actions) == self.num_envs, \
+            'Expected {} actions, got: {}'.format(self.num_envs, len(actions))
+        assert not self.waiting, 'step_async() called twice without step_wait().'
+
+        for env, action in zip(self.envs, actions):
+            env.wire_codec.send(env.socket, env._make_step_message(action))
+
+        self.waiting = list(range(self.num_envs))
+
+    def step_wait(self):
+        """
+        Waits for all environments to respond to actions sent by `step_async()`.
+        If auto_reset is on, every finished environment is reset and its observation is replaced by initial
+        observation of new episode; terminal observation is kept as `terminal_observation` key of
+        last info entry.
+
+        Returns:
+            tuple (observations, rewards, dones, infos) where observations is dictionary of stacked arrays,
+            rewards and dones are 1D arrays and infos is list of environments info lists.
+        """
+        try:
+            responses = self._gather(self.waiting)
+
+        finally:
+            self.waiting = []
+
+        observations = [responses[i][0] for i in range(self.num_envs)]
+        rewards = np.asarray([responses[i][1] for i in range(self.num_envs)])
+        dones = np.asarray([responses[i][2] for i in range(self.num_envs)], dtype=bool)
+        infos = [responses[i][3] for i in range(self.num_envs)]
+
+        if self.auto_reset and dones.any():
+            done_indices = list(np.nonzero(dones)[0])
+            for i in done_indices:
+                infos[i][-1]['terminal_observation'] = observations[i]
+
+            initial_responses = self._reset_envs(done_indices)
+            for i, response in initial_responses.items():
+                observations[i] = response[0]
+
+        return stack_observations(observations), rewards, dones, infos
+
+    def step(self, actions):
+        """
+        Makes synchronous step in all environments.
+
+        Args:
+            actions:    iterable of `num_envs` actions, each compatible to env.action_space
+
+        Returns:
+            tuple (observations, rewards, dones, infos), see `step_wait()`.
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def get_stat(self):
+        """
+        Returns:
+            list of last run episode statistics for every environment.
+        """
+        return [env.get_stat() for env in self.envs]
+
+    def close(self):
+        """
+        Closes all environments; data_master goes last.
+        """
+        for env in reversed(self.envs):
+            env.close()
+        self.envs = []
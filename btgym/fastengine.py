@@ -0,0 +1,899 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+
+import copy
+import types
+
+from backtrader.utils import num2date
+
+from .strategy.base import BTgymBaseStrategy
+
+
+class BTgymFastOrder:
+    """
+    Market order as seen by strategy notify_order() method; mirrors attributes of bt.Order strategies rely upon.
+    """
+    Created, Submitted, Accepted, Partial, Completed, Canceled, Expired, Margin, Rejected = range(9)
+    Status = ['Created', 'Submitted', 'Accepted', 'Partial', 'Completed', 'Canceled', 'Expired', 'Margin', 'Rejected']
+
+    Buy, Sell = range(2)
+
+    def __init__(self, ref, data, size, price):
+        """
+
+        Args:
+            ref:    int, order reference number;
+            data:   data feed order is issued for;
+            size:   order size, negative for sell orders;
+            price:  close price of the bar order has been created at.
+        """
+        self.ref = ref
+        self.data = data
+        self.size = size
+        self.ordtype = self.Buy if size > 0 else self.Sell
+        self.status = self.Created
+        self.created = types.SimpleNamespace(size=size, price=price)
+        self.executed = types.SimpleNamespace(size=0, price=0.0, value=0.0, comm=0.0, pnl=0.0)
+
+    def isbuy(self):
+        return self.ordtype == self.Buy
+
+    def issell(self):
+        return self.ordtype == self.Sell
+
+    def alive(self):
+        return self.status in [self.Created, self.Submitted, self.Partial, self.Accepted]
+
+    def getstatusname(self, status=None):
+        return self.Status[self.status if status is None else status]
+
+    def execute(self, size, price, value, comm, pnl):
+        """
+        Records execution, sets order status to `Completed` or `Partial`.
+        """
+        executed = self.executed
+        oldvalue = executed.size * executed.price
+        newvalue = size * price
+        executed.size += size
+        executed.price = (oldvalue + newvalue) / executed.size
+        executed.value += value
+        executed.comm += comm
+        executed.pnl += pnl
+        self.status = self.Partial if executed.size != self.size else self.Completed
+
+    def clone(self):
+        """
+        Returns:
+            snapshot of order to notify strategy with.
+        """
+        order = copy.copy(self)
+        order.executed = types.SimpleNamespace(**vars(self.executed))
+        return order
+
+
+class BTgymFastPosition:
+    """
+    Position size and average price, updated the same way bt.Position does.
+    """
+
+    def __init__(self, size=0, price=0.0):
+        self.size = size
+        self.price = price if size else 0.0
+
+    def __bool__(self):
+        return self.size != 0
+
+    def clone(self):
+        return BTgymFastPosition(self.size, self.price)
+
+    def update(self, size, price):
+        """
+        Adds operation to position.
+
+        Returns:
+            tuple of (new size, new average price, opened size, closed size).
+        """
+        oldsize = self.size
+        self.size += size
+
+        if not self.size:
+            opened, closed = 0, size
+            self.price = 0.0
+
+        elif not oldsize:
+            opened, closed = size, 0
+            self.price = price
+
+        elif oldsize > 0:
+            if size > 0:
+                opened, closed = size, 0
+                self.price = (self.price * oldsize + size * price) / self.size
+
+            elif self.size > 0:
+                opened, closed = 0, size
+
+            else:
+                opened, closed = self.size, -oldsize
+                self.price = price
+
+        else:
+            if size < 0:
+                opened, closed = size, 0
+                self.price = (self.price * oldsize + size * price) / self.size
+
+            elif self.size < 0:
+                opened, closed = 0, size
+
+            else:
+                opened, closed = self.size, -oldsize
+                self.price = price
+
+        return self.size, self.price, opened, closed
+
+    def pseudoupdate(self, size, price):
+        return self.clone().update(size, price)
+
+
+class BTgymFastTrade:
+    """
+    Round trip from opening to closing position, as seen by strategy notify_trade() method; mirrors bt.Trade
+    profit and loss accounting.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.size = 0
+        self.price = 0.0
+        self.value = 0.0
+        self.commission = 0.0
+        self.pnl = 0.0
+        self.pnlcomm = 0.0
+        self.long = None
+        self.justopened = False
+        self.isopen = False
+        self.isclosed = False
+        self.baropen = 0
+        self.barclose = 0
+
+    def update(self, size, price, commission):
+        if not size:
+            return
+
+        self.commission += commission
+        oldsize = self.size
+        self.size += size
+        self.justopened = bool(not oldsize and size)
+        if self.justopened:
+            self.baropen = len(self.data)
+            self.long = self.size > 0
+
+        self.isopen = bool(self.size)
+        self.isclosed = bool(oldsize and not self.size)
+        if self.isclosed:
+            self.isopen = False
+            self.barclose = len(self.data)
+
+        if abs(self.size) > abs(oldsize):
+            # Position increased, update average price:
+            self.price = (oldsize * self.price + size * price) / self.size
+            pnl = 0.0
+
+        else:
+            # Position reduced or closed:
+            pnl = -size * (price - self.price)
+
+        self.pnl += pnl
+        self.pnlcomm = self.pnl - self.commission
+        self.value = self.size * self.price
+
+
+class BTgymFastBroker:
+    """
+    Single asset broker for market orders, follows bt.brokers.BackBroker accounting for stock-like
+    percentage commission scheme: orders are checked against available cash at price of the bar they have been
+    created at and get executed at open price of the next bar; cash, position, value and trades are updated with
+    same arithmetic backtrader uses, so figures match bit to bit.
+    """
+
+    def __init__(self, cash=10000.0, commission=0.0, leverage=1.0, shortcash=True, checksubmit=True):
+        """
+
+        Args:
+            cash:           starting cash;
+            commission:     commission as fraction of operation value, .001 stands for 0.1%;
+            leverage:       leverage;
+            shortcash:      if True - cash increases when selling short and short position value is negative;
+            checksubmit:    if True - check available cash before accepting order.
+        """
+        self.startingcash = self.cash = cash
+        self.commission = commission
+        self.leverage = leverage
+        self.shortcash = shortcash
+        self.checksubmit = checksubmit
+
+        self.position = BTgymFastPosition()
+        self._value = cash
+        # Actual portfolio leverage as of latest bar, as BackBroker.get_leverage() reports:
+        self._leverage = 1.0
+        self._order_ref = 0
+
+        self.submitted = []  # orders to check against cash
+        self.pending = []  # orders to execute at next bar open
+        self.notifs = []  # orders snapshots to notify strategy with
+        self.executions = []  # executed parts as (closed, opened, price, closedcomm, openedcomm) tuples
+
+    def setcash(self, cash):
+        self.startingcash = self.cash = cash
+        self._value = cash
+
+    def getcash(self):
+        return self.cash
+
+    get_cash = getcash
+
+    def getvalue(self):
+        """
+        Returns:
+            portfolio value as of latest bar close.
+        """
+        return self._value
+
+    get_value = getvalue
+
+    def get_leverage(self):
+        return self._leverage
+
+    def setcommission(self, commission=0.0, margin=None, mult=1.0, leverage=1.0, name=None):
+        """
+        Sets percentage commission scheme, as bt.brokers.BackBroker.setcommission() does for stock-like assets.
+
+        Raises:
+            ValueError if futures-like scheme is requested.
+        """
+        if margin or mult != 1.0:
+            raise ValueError('Only stock-like commission scheme is supported, got margin: {}, mult: {}'.format(
+                margin, mult
+            ))
+
+        self.commission = commission
+        self.leverage = leverage
+
+    def set_shortcash(self, shortcash):
+        self.shortcash = shortcash
+
+    def set_checksubmit(self, checksubmit):
+        self.checksubmit = checksubmit
+
+    def getposition(self, data=None):
+        return self.position
+
+    def buy(self, owner, data, size, **kwargs):
+        return self.submit(self._make_order(data, size))
+
+    def sell(self, owner, data, size, **kwargs):
+        return self.submit(self._make_order(data, -size))
+
+    def _make_order(self, data, size):
+        self._order_ref += 1
+        return BTgymFastOrder(self._order_ref, data, size, data.close[0])
+
+    def submit(self, order):
+        if self.checksubmit:
+            order.status = order.Submitted
+            self.submitted.append(order)
+            self.notify(order)
+
+        else:
+            self.submit_accept(order)
+
+        return order
+
+    def submit_accept(self, order):
+        order.status = order.Accepted
+        self.pending.append(order)
+        self.notify(order)
+
+    def notify(self, order):
+        self.notifs.append(order.clone())
+
+    def next(self, open_price, close_price):
+        """
+        Checks submitted orders, executes accepted ones at bar open, updates portfolio value with bar close.
+        """
+        if self.checksubmit and self.submitted:
+            self.check_submitted()
+
+        pending = self.pending
+        self.pending = []
+        for order in pending:
+            self._execute(order, open_price)
+
+        self._value = self._get_value(close_price)
+
+    def check_submitted(self):
+        """
+        Pseudo-executes submitted orders one by one at their creation price, accepts order if
+        there is cash left, rejects with `Margin` status otherwise.
+        """
+        cash = self.cash
+        position = self.position.clone()
+        submitted = self.submitted
+        self.submitted = []
+        for order in submitted:
+            cash = self._pseudo_execute(order, cash, position)
+            if cash >= 0.0:
+                self.submit_accept(order)
+                continue
+
+            order.status = order.Margin
+            self.notify(order)
+
+    def _closed_cash(self, closed, price):
+        if self.shortcash:
+            closedvalue = -closed * price
+
+        else:
+            closedvalue = abs(closed) * price
+
+        closecash = closedvalue
+        if closedvalue > 0:
+            # Long position closed:
+            closecash /= self.leverage
+
+        return closedvalue, closecash
+
+    def _opened_cash(self, opened, price):
+        if self.shortcash:
+            openedvalue = opened * price
+
+        else:
+            openedvalue = abs(opened) * price
+
+        opencash = openedvalue
+        if openedvalue > 0:
+            # Long position being opened:
+            opencash /= self.leverage
+
+        return openedvalue, opencash
+
+    def _pseudo_execute(self, order, cash, position):
+        """
+        Returns:
+            cash left after executing order at its creation price.
+        """
+        price = pprice_orig = order.created.price
+        psize, pprice, opened, closed = position.update(order.size, price)
+        if closed:
+            closedvalue, closecash = self._closed_cash(closed, pprice_orig)
+            cash += closecash
+            cash -= abs(closed) * self.commission * price
+
+        if opened:
+            openedvalue, opencash = self._opened_cash(opened, price)
+            cash -= opencash
+            cash -= abs(opened) * self.commission * price
+
+        return cash
+
+    def _execute(self, order, price):
+        position = self.position
+        pprice_orig = position.price
+        psize, pprice, opened, closed = position.pseudoupdate(order.size, price)
+        pnl = -closed * (price - pprice_orig)
+        cash = self.cash
+
+        if closed:
+            # Closed part gets cash back along with profit or loss:
+            closedvalue, closecash = self._closed_cash(closed, pprice_orig)
+            cash += closecash + pnl
+            closedcomm = abs(closed) * self.commission * price
+            cash -= closedcomm
+            self.cash = cash
+
+        else:
+            closedvalue = closedcomm = 0.0
+
+        popened = opened
+        if opened:
+            openedvalue, opencash = self._opened_cash(opened, price)
+            cash -= opencash
+            openedcomm = abs(opened) * self.commission * price
+            cash -= openedcomm
+            if cash < 0.0:
+                # Not enough cash to open, execute closing part only:
+                opened = 0
+                openedvalue = openedcomm = 0.0
+
+            else:
+                self.cash = cash
+
+        else:
+            openedvalue = openedcomm = 0.0
+
+        execsize = closed + opened
+        if execsize:
+            position.update(execsize, price)
+            order.execute(execsize, price, closedvalue + openedvalue, closedcomm + openedcomm, pnl)
+            self.notify(order)
+            self.executions.append((closed, opened, price, closedcomm, openedcomm))
+
+        if popened and not opened:
+            order.status = order.Margin
+            self.notify(order)
+
+    def _get_value(self, price):
+        """
+        Returns:
+            cash plus unlevered position value at given price; updates actual leverage.
+        """
+        position = self.position
+        size = position.size
+        if not size:
+            self._leverage = 0.0 / 1.0
+            return self.cash + 0.0
+
+        if self.shortcash:
+            dvalue = size * price
+
+        elif size > 0:
+            dvalue = size * price
+
+        else:
+            # Short position is worth more as price goes down:
+            dvalue = position.price * size
+            dvalue += (position.price - price) * size
+            dvalue = abs(dvalue)
+
+        unrealized = size * (price - position.price)
+        if dvalue > 0:
+            pos_value_unlever = 0.0 + (dvalue - unrealized) / self.leverage
+            pos_value_unlever += unrealized
+
+        else:
+            pos_value_unlever = 0.0 + dvalue
+
+        self._leverage = (0.0 + dvalue) / (pos_value_unlever or 1.0)
+
+        return self.cash + pos_value_unlever
+
+
+class _FastLine(list):
+    """
+    Per-bar values list indexed backtrader way: [0] is latest value, [-1] is previous one, etc.
+    """
+
+    def __getitem__(self, ago):
+        return list.__getitem__(self, len(self) - 1 + ago)
+
+
+class _FastColumn:
+    """
+    Backtrader-like line over data feed column array, follows feed cursor.
+    """
+
+    def __init__(self, values, feed):
+        self.values = values
+        self.feed = feed
+
+    def __len__(self):
+        return len(self.feed)
+
+    def __getitem__(self, ago):
+        return self.values[len(self.feed) - 1 + ago]
+
+    def get(self, ago=0, size=1):
+        end = len(self.feed) + ago
+        return self.values[max(end - size, 0): end]
+
+    def buflen(self):
+        return len(self.feed)
+
+
+class _FastDatetimeColumn(_FastColumn):
+
+    def datetime(self, ago=0):
+        return num2date(self[ago])
+
+
+class _FastFeed:
+    """
+    Cursor over columns of btgym.datafeed.feed.BTgymArrayData instance, exposes data feed attributes
+    strategy methods rely upon: `_name`, `columns`, `datetimes`, `numrecords`, price lines and len().
+    """
+
+    def __init__(self, data, name=None):
+        self._name = data._name if name is None else name
+        self.columns = data.columns
+        self.datetimes = data.datetimes
+        self.numrecords = data.numrecords
+        self.datetime = _FastDatetimeColumn(self.datetimes, self)
+        for field, column in self.columns.items():
+            setattr(self, field, _FastColumn(column, self))
+
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def buflen(self):
+        return self._len
+
+
+class _FastAnalyzers(list):
+    """
+    Strategy analyzers collection.
+    """
+
+    def getbyname(self, name):
+        for analyzer in self:
+            if analyzer._name == name:
+                return analyzer
+
+        raise KeyError(name)
+
+    def getnames(self):
+        return [analyzer._name for analyzer in self]
+
+
+class _MetaFastStrategy(type):
+    """
+    Extends parameters of parent class with `params` dictionary or tuple declared by subclass,
+    as backtrader does for strategy subclasses.
+    """
+
+    def __init__(cls, name, bases, dct):
+        super(_MetaFastStrategy, cls).__init__(name, bases, dct)
+        params = dct.get('params')
+        if isinstance(params, (dict, tuple, list)):
+            cls.params = super(cls, cls).params._derive(name, params, ())
+
+
+class BTgymFastStrategy(metaclass=_MetaFastStrategy):
+    """
+    BTgymBaseStrategy counterpart for BTgymFastEngine. Shares parameters and state, reward, info, termination and
+    order handling methods with BTgymBaseStrategy, so environment gets same responses as from base strategy
+    run by backtrader.
+
+    Note:
+        - supports discrete actions only;
+        - no backtrader indicators or observers: next() gets called once `time_dim` bars are loaded;
+          `stats` attribute holds DrawDown `drawdown`, `maxdrawdown` and Broker `cash`, `value` lines only,
+          updated after every bar as backtrader observers are;
+        - data feed exposes episode `columns` arrays, custom observation methods should slice those
+          or use precomputed features, see BTgymBaseStrategy.get_features_window();
+        - subclass as usual; `params` dictionary of subclass extends parameters of parent class.
+    """
+    time_dim = BTgymBaseStrategy.time_dim
+    skip_frame = BTgymBaseStrategy.skip_frame
+    avg_period = BTgymBaseStrategy.avg_period
+    gamma = BTgymBaseStrategy.gamma
+    reward_scale = BTgymBaseStrategy.reward_scale
+    portfolio_actions = BTgymBaseStrategy.portfolio_actions
+    precomputed_features = BTgymBaseStrategy.precomputed_features
+    debug_allocations = BTgymBaseStrategy.debug_allocations
+    allocation_limit = BTgymBaseStrategy.allocation_limit
+
+    params = BTgymBaseStrategy.params
+
+    def __init__(self, env, datas, **kwargs):
+        """
+
+        Args:
+            env:        BTgymFastEngine instance running this strategy;
+            datas:      list of single data feed;
+            **kwargs:   strategy parameters, see BTgymBaseStrategy.
+        """
+        self.env = self.cerebro = env
+        self.broker = env.broker
+        self.datas = datas
+        self.data = datas[0]
+
+        self.p = self.params = type(self).params()
+        for name, default in self.p._getitems():
+            setattr(self.p, name, kwargs.pop(name, default))
+
+        if not self.p.portfolio_actions:
+            raise ValueError('Continuous actions are not supported by {}.'.format(type(self).__name__))
+
+        self.minperiod = 1
+        self.stats = types.SimpleNamespace(
+            drawdown=types.SimpleNamespace(drawdown=_FastLine(), maxdrawdown=_FastLine()),
+            broker=types.SimpleNamespace(cash=_FastLine(), value=_FastLine()),
+        )
+        self.analyzers = _FastAnalyzers()
+
+        BTgymBaseStrategy.__init__(self, **kwargs)
+
+    def _set_minperiod(self):
+        self.minperiod = self.time_dim
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def position(self):
+        return self.broker.getposition(self.data)
+
+    def getposition(self, data=None, broker=None):
+        return self.broker.getposition(data)
+
+    def getdatabyname(self, name):
+        return self.env.datasbyname[name]
+
+    def _getdata(self, data):
+        if isinstance(data, str):
+            return self.getdatabyname(data)
+
+        return self.data if data is None else data
+
+    def getsizing(self, data=None, isbuy=True):
+        """
+        Returns:
+            stake of fixed size sizer set by engine addsizer() method, 1 if not set.
+        """
+        if len(self.env.sizers) > 0:
+            sizer, args, kwargs = list(self.env.sizers.values())[0]
+            return kwargs.get('stake', 1)
+
+        return 1
+
+    def buy(self, data=None, size=None, **kwargs):
+        data = self._getdata(data)
+        size = size if size is not None else self.getsizing(data, isbuy=True)
+        if size:
+            return self.broker.buy(self, data, size)
+
+        return None
+
+    def sell(self, data=None, size=None, **kwargs):
+        data = self._getdata(data)
+        size = size if size is not None else self.getsizing(data, isbuy=False)
+        if size:
+            return self.broker.sell(self, data, size)
+
+        return None
+
+    def close(self, data=None, size=None, **kwargs):
+        data = self._getdata(data)
+        possize = self.getposition(data).size
+        size = abs(size if size is not None else possize)
+        if possize > 0:
+            return self.sell(data=data, size=size)
+
+        elif possize < 0:
+            return self.buy(data=data, size=size)
+
+        return None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def nextstart(self):
+        self.inner_embedding = len(self.data)
+        self.log.debug('Inner time embedding: {}'.format(self.inner_embedding))
+
+    prenext = BTgymBaseStrategy.prenext
+    next = BTgymBaseStrategy.next
+    notify_order = BTgymBaseStrategy.notify_order
+    notify_trade = BTgymBaseStrategy.notify_trade
+    update_broker_stat = BTgymBaseStrategy.update_broker_stat
+    get_broker_value = BTgymBaseStrategy.get_broker_value
+    get_broker_cash = BTgymBaseStrategy.get_broker_cash
+    get_broker_exposure = BTgymBaseStrategy.get_broker_exposure
+    get_broker_pos_direction = BTgymBaseStrategy.get_broker_pos_direction
+    get_broker_realized_pnl = BTgymBaseStrategy.get_broker_realized_pnl
+    get_broker_unrealized_pnl = BTgymBaseStrategy.get_broker_unrealized_pnl
+    get_broker_episode_step = BTgymBaseStrategy.get_broker_episode_step
+    get_broker_drawdown = BTgymBaseStrategy.get_broker_drawdown
+    get_broker_pos_duration = BTgymBaseStrategy.get_broker_pos_duration
+    get_broker_max_unrealized_pnl = BTgymBaseStrategy.get_broker_max_unrealized_pnl
+    get_broker_min_unrealized_pnl = BTgymBaseStrategy.get_broker_min_unrealized_pnl
+    set_datalines = BTgymBaseStrategy.set_datalines
+    get_features_window = BTgymBaseStrategy.get_features_window
+    get_raw_state = BTgymBaseStrategy.get_raw_state
+    get_internal_state = BTgymBaseStrategy.get_internal_state
+    get_metadata_state = BTgymBaseStrategy.get_metadata_state
+    get_state = BTgymBaseStrategy.get_state
+    _update_state = BTgymBaseStrategy._update_state
+    get_reward = BTgymBaseStrategy.get_reward
+    get_info = BTgymBaseStrategy.get_info
+    get_done = BTgymBaseStrategy.get_done
+    _get_done = BTgymBaseStrategy._get_done
+    _get_time = BTgymBaseStrategy._get_time
+    _get_timestamp = BTgymBaseStrategy._get_timestamp
+    _get_broadcast_info = BTgymBaseStrategy._get_broadcast_info
+    _next_discrete = BTgymBaseStrategy._next_discrete
+
+
+class BTgymFastEngine:
+    """
+    Array-backed replacement for bt.Cerebro for single asset, market orders only setups.
+
+    Runs BTgymFastStrategy [subclass] over single BTgymArrayData feed in plain loop, keeping bar-by-bar
+    sequence of backtrader engine run with `preload=False`:
+
+        - broker checks and executes orders issued at previous bar, updates portfolio value;
+        - strategy gets notified of orders and trades;
+        - strategy prenext(), nextstart() or next() is called;
+        - analyzers next() is called once strategy minimal period is reached;
+        - drawdown and broker statistics lines get updated, as bt.observers.DrawDown and
+          bt.observers.Broker do.
+
+    Exposes parts of bt.Cerebro interface BTgymEnv and BTgymServer use: strats, sizers, broker,
+    addstrategy(), addsizer(), addanalyzer(), adddata(), run(), runstop(). Analyzers should accept strategy
+    as first argument, see btgym.server._BTgymFastAnalyzer.
+    """
+
+    def __init__(self):
+        self.strats = []
+        self.sizers = {}
+        self.analyzers = []
+        self.datas = []
+        self.datasbyname = {}
+        self.broker = BTgymFastBroker()
+        self._event_stop = False
+
+    def addstrategy(self, strategy, *args, **kwargs):
+        if not (isinstance(strategy, type) and issubclass(strategy, BTgymFastStrategy)):
+            raise TypeError('Expected BTgymFastStrategy subclass, got: {}'.format(strategy))
+
+        self.strats.append([(strategy, args, kwargs)])
+
+        return len(self.strats) - 1
+
+    def addsizer(self, sizercls, *args, **kwargs):
+        """
+        Sets order stake, e.g. by bt.sizers.SizerFix `stake` kwarg.
+        """
+        self.sizers[None] = (sizercls, args, kwargs)
+
+    def addanalyzer(self, ancls, *args, **kwargs):
+        self.analyzers.append((ancls, args, kwargs))
+
+    def adddata(self, data, name=None):
+        """
+
+        Args:
+            data:   btgym.datafeed.feed.BTgymArrayData instance;
+            name:   str, data line name.
+        """
+        if len(self.datas) > 0:
+            raise ValueError('{} supports single data feed only.'.format(type(self).__name__))
+
+        feed = _FastFeed(data, name)
+        self.datas.append(feed)
+        self.datasbyname[feed._name] = feed
+
+        return feed
+
+    def runstop(self):
+        self._event_stop = True
+
+    def run(self, **kwargs):
+        """
+        Runs episode. Keyword arguments are accepted for bt.Cerebro.run() compatibility and ignored.
+
+        Returns:
+            list of single strategy instance.
+        """
+        if len(self.strats) != 1 or len(self.strats[0]) != 1:
+            raise ValueError('{} runs single strategy only.'.format(type(self).__name__))
+
+        if len(self.datas) != 1:
+            raise ValueError('{} needs single data feed to run, got: {}'.format(type(self).__name__, len(self.datas)))
+
+        strategy_class, args, kwargs = self.strats[0][0]
+        feed = self.datas[0]
+        broker = self.broker
+        self._event_stop = False
+
+        strategy = strategy_class(self, self.datas, *args, **kwargs)
+        for ancls, anargs, ankwargs in self.analyzers:
+            ankwargs = dict(ankwargs)
+            name = ankwargs.pop('_name', ancls.__name__.lower())
+            analyzer = ancls(strategy, *anargs, **ankwargs)
+            analyzer._name = name
+            strategy.analyzers.append(analyzer)
+
+        # Observers lines:
+        drawdown_line = strategy.stats.drawdown.drawdown
+        maxdrawdown_line = strategy.stats.drawdown.maxdrawdown
+        cash_line = strategy.stats.broker.cash
+        value_line = strategy.stats.broker.value
+
+        trade = None
+        maxvalue = float('-inf')
+        maxdrawdown = 0.0
+
+        opens = feed.columns['open'].tolist()
+        closes = feed.columns['close'].tolist()
+
+        strategy.start()
+        for length in range(1, feed.numrecords + 1):
+            feed._len = length
+            broker.next(opens[length - 1], closes[length - 1])
+
+            # Notify strategy of orders and trades:
+            notifs, broker.notifs = broker.notifs, []
+            for order in notifs:
+                strategy.notify_order(order)
+
+            executions, broker.executions = broker.executions, []
+            trades = []
+            for closed, opened, price, closedcomm, openedcomm in executions:
+                if trade is None:
+                    trade = BTgymFastTrade(feed)
+
+                if closed:
+                    trade.update(closed, price, closedcomm)
+                    if trade.isclosed:
+                        trades.append(copy.copy(trade))
+
+                if opened:
+                    if trade.isclosed:
+                        trade = BTgymFastTrade(feed)
+
+                    trade.update(opened, price, openedcomm)
+                    if trade.isclosed:
+                        trades.append(copy.copy(trade))
+
+                if trade.justopened:
+                    trades.append(copy.copy(trade))
+
+            for closed_trade in trades:
+                strategy.notify_trade(closed_trade)
+
+            value = broker.getvalue()
+            maxvalue = max(maxvalue, value)
+
+            if length < strategy.minperiod:
+                strategy.prenext()
+                for analyzer in strategy.analyzers:
+                    analyzer.prenext()
+
+            else:
+                if length == strategy.minperiod:
+                    strategy.nextstart()
+
+                else:
+                    strategy.next()
+
+                for analyzer in strategy.analyzers:
+                    analyzer.next()
+
+            # Observers:
+            drawdown = 100.0 * (maxvalue - value) / maxvalue
+            maxdrawdown = max(maxdrawdown, drawdown)
+            drawdown_line.append(drawdown)
+            maxdrawdown_line.append(maxdrawdown)
+            cash_line.append(float(broker.getcash()))
+            value_line.append(float(broker.getvalue()))
+
+            if self._event_stop:
+                break
+
+        strategy.stop()
+        for analyzer in strategy.analyzers:
+            analyzer.stop()
+
+        return [strategy]
@@ -0,0 +1,266 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import multiprocessing
+import time
+import traceback
+
+# Heavy imports, done once before workers get forked:
+import backtrader
+import pandas
+from logbook import Handler
+
+
+class _PipeReadyEvent:
+    """
+    Server `ready_event` stand-in reporting readiness to pool lease via worker pipe.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def set(self):
+        self.connection.send(('ready', None))
+
+
+def _pool_worker(connection, warmup_pyplot):
+    """
+    Pool worker process body: runs leased servers one after another.
+    """
+    if warmup_pyplot:
+        import matplotlib
+        matplotlib.use('Agg', force=True)
+        import matplotlib.pyplot
+
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+
+        server_class, kwargs = job
+        num_handlers = len(list(Handler.stack_manager.iter_context_objects()))
+        server = server_class(ready_event=_PipeReadyEvent(connection), **kwargs)
+        try:
+            server.run()
+
+        except BaseException:
+            # Server state is unknown, sockets may be left bound - do not reuse this process:
+            traceback.print_exc()
+            connection.send(('done', 1))
+            break
+
+        # Release whatever server kept open; server, dataset and renderer all push own log handlers:
+        while len(list(Handler.stack_manager.iter_context_objects())) > num_handlers:
+            Handler.stack_manager.pop_application()
+
+        for context in [getattr(server, 'context', None), getattr(server, 'data_context', None)]:
+            if context is not None and not context.closed:
+                context.destroy(linger=0)
+
+        connection.send(('done', 0))
+
+    connection.close()
+
+
+class BTgymServerLease:
+    """
+    Handle to server running in pool worker process.
+    Mimics part of multiprocessing.Process interface used by environment.
+    """
+
+    def __init__(self, pool, worker):
+        self.pool = pool
+        self.process, self.connection = worker
+        self.pid = self.process.pid
+        self.exitcode = None
+        self.ready = False
+
+    def _poll(self, timeout=0.0):
+        """
+        Processes worker reports, if any, waiting up to `timeout` seconds for first one.
+        """
+        while self.exitcode is None and self.connection.poll(timeout):
+            timeout = 0.0
+            try:
+                report, value = self.connection.recv()
+
+            except EOFError:
+                self.exitcode = self.process.exitcode or 1
+                break
+
+            if report == 'ready':
+                self.ready = True
+
+            elif report == 'done':
+                self.exitcode = value
+                self.pool._release((self.process, self.connection), reuse=value == 0)
+
+        if self.exitcode is None and not self.process.is_alive():
+            self.exitcode = self.process.exitcode
+
+    def wait_ready(self, timeout):
+        """
+        Waits for server to report it is ready to accept connections.
+
+        Args:
+            timeout:    seconds
+
+        Returns:
+            True if server is ready, False on timeout or if server has stopped.
+        """
+        deadline = time.time() + timeout
+        while not self.ready and self.exitcode is None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            self._poll(min(remaining, 0.1))
+
+        return self.ready and self.exitcode is None
+
+    def is_alive(self):
+        self._poll()
+        return self.exitcode is None
+
+    def join(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while self.exitcode is None:
+            if deadline is not None and time.time() >= deadline:
+                break
+            self._poll(0.1)
+
+    def terminate(self):
+        # Stuck server can not be recalled, worker process goes down with it:
+        if self.is_alive():
+            self.process.terminate()
+            self.process.join()
+            self.exitcode = self.process.exitcode
+            self.pool._release((self.process, self.connection), reuse=False)
+
+
+class BTgymServerPool:
+    """
+    Pool of pre-forked worker processes to run BTgymServer and BTgymDataFeedServer instances in.
+
+    Workers are forked once, after heavy imports are done, and get reused by environments:
+    instead of starting new server process, environment leases warm worker, passes server configuration
+    to it and waits for readiness report. Worker returns to pool as soon as server gets stopped.
+
+    Usage::
+
+        pool = BTgymServerPool(num_workers=9)
+        envs = [
+            BTgymEnv(filename=..., port=5000 + i, data_master=(i == 0), server_pool=pool) for i in range(8)
+        ]
+        ...
+        for env in reversed(envs):
+            env.close()
+        pool.close()
+
+    Note:
+        - server configuration is passed to worker pickled, so shared memory observation transport is not
+          supported for pooled servers;
+        - pool grows as needed if all workers are busy;
+        - pool should be closed explicitly; workers are daemonic and do not outlive parent process anyway.
+    """
+
+    def __init__(self, num_workers=1, start_method='fork', warmup_pyplot=True):
+        """
+
+        Args:
+            num_workers:    int, number of workers to fork at once;
+            start_method:   str, multiprocessing start method, `fork` is expected to be fastest;
+            warmup_pyplot:  bool, import matplotlib.pyplot in every worker in advance (rendering).
+        """
+        self.context = multiprocessing.get_context(start_method)
+        self.warmup_pyplot = warmup_pyplot
+        self.idle = []
+        self.busy = []
+        self.closed = False
+        for _ in range(num_workers):
+            self.idle.append(self._fork())
+
+    def _fork(self):
+        parent_connection, child_connection = self.context.Pipe()
+        process = self.context.Process(
+            target=_pool_worker,
+            args=(child_connection, self.warmup_pyplot),
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        return process, parent_connection
+
+    def _release(self, worker, reuse=True):
+        if worker in self.busy:
+            self.busy.remove(worker)
+            if reuse and not self.closed and worker[0].is_alive():
+                self.idle.append(worker)
+
+            else:
+                worker[1].close()
+
+    def lease(self, server_class, **kwargs):
+        """
+        Runs server in idle worker.
+
+        Args:
+            server_class:   BTgymServer or BTgymDataFeedServer class;
+            kwargs:         server kwargs.
+
+        Returns:
+            BTgymServerLease instance.
+        """
+        assert not self.closed, 'Server pool is closed.'
+        worker = None
+        while self.idle and worker is None:
+            worker = self.idle.pop(0)
+            if not worker[0].is_alive():
+                worker[1].close()
+                worker = None
+
+        if worker is None:
+            worker = self._fork()
+
+        self.busy.append(worker)
+        worker[1].send((server_class, kwargs))
+
+        return BTgymServerLease(self, worker)
+
+    def close(self):
+        """
+        Stops idle workers, terminates busy ones.
+        """
+        self.closed = True
+        for process, connection in self.idle:
+            try:
+                connection.send(None)
+
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+
+        for process, connection in self.busy:
+            process.terminate()
+            connection.close()
+
+        for process, _ in self.idle + self.busy:
+            process.join(timeout=1)
+
+        self.idle = []
+        self.busy = []
@@ -0,0 +1,99 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import time
+
+import numpy as np
+
+
+class StepLatencyProfile:
+    """
+    Collects per-episode latencies of server step phases and aggregates them into histograms.
+
+    Phases are timed as consecutive laps: every lap() call records time elapsed since previous lap()
+    or mark() call under given phase name.
+
+    Server phases recorded (seconds):
+        `engine` -          backtrader engine run between two analyzer calls: data feeds, strategy next(),
+                            broker, observers;
+        `get_info` -        strategy.get_info();
+        `get_raw_state` -   strategy.get_raw_state();
+        `get_state` -       strategy.get_state();
+        `get_reward` -      strategy.get_reward();
+        `send` -            response serialization and sending;
+        `broadcast` -       data_server global time broadcast round trip;
+        `client_wait` -     waiting for agent action, including its decoding and serving in-episode
+                            control requests.
+    """
+    # Histogram bins: zero and log-spaced from 1 microsecond to 10 seconds, 4 bins per decade:
+    bin_edges = np.concatenate([[0.0], np.logspace(-6, 1, 29), [np.inf]])
+
+    def __init__(self):
+        self.samples = {}
+        self.last_time = None
+
+    def mark(self):
+        """
+        Starts new lap.
+        """
+        self.last_time = time.perf_counter()
+
+    def lap(self, phase):
+        """
+        Records time since previous lap or mark as `phase` latency, starts new lap.
+        Nothing is recorded if there were no previous lap.
+
+        Args:
+            phase:  str, phase name
+        """
+        now = time.perf_counter()
+        if self.last_time is not None:
+            try:
+                self.samples[phase].append(now - self.last_time)
+
+            except KeyError:
+                self.samples[phase] = [now - self.last_time]
+
+        self.last_time = now
+
+    def get_stat(self):
+        """
+        Returns:
+            dictionary {phase: statistic}, where statistic is dictionary of:
+                `count`, `total`, `mean`, `p50`, `p90`, `p99`, `max` - seconds;
+                `histogram` - array of counts per bin;
+                `bin_edges` - array of histogram bins edges, seconds.
+        """
+        stat = {}
+        for phase, samples in self.samples.items():
+            samples = np.asarray(samples)
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+            stat[phase] = dict(
+                count=samples.size,
+                total=samples.sum(),
+                mean=samples.mean(),
+                p50=p50,
+                p90=p90,
+                p99=p99,
+                max=samples.max(),
+                histogram=np.histogram(samples, bins=self.bin_edges)[0],
+                bin_edges=self.bin_edges,
+            )
+
+        return stat
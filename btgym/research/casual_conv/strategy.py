@@ -107,17 +107,6 @@ class CasualConvStrategy(DevStrat_4_12):
         metadata={},
     )
 
-    def set_datalines(self):
-        self.data.features = [
-            btind.SimpleMovingAverage(self.datas[0], period=period) for period in self.features_parameters
-        ]
-
-        self.data.dim_sma = btind.SimpleMovingAverage(
-            self.datas[0],
-            period=(np.asarray(self.features_parameters).max() + self.time_dim)
-        )
-        self.data.dim_sma.plotinfo.plot = False
-
 
 class MaxPool(Indicator):
     """
@@ -260,19 +249,20 @@ class CasualConvStrategy_0(CasualConvStrategy):
     )
 
     def set_datalines(self):
-        features_low = [MinPool(self.data, period=period) for period in self.features_parameters]
-        features_high = [MaxPool(self.data, period=period) for period in self.features_parameters]
-
         # If `scale` was scalar - make it vector:
         if len(np.asarray(self.p.state_ext_scale).shape) < 1:
             self.p.state_ext_scale = np.repeat(np.asarray(self.p.state_ext_scale), self.num_features)
 
         # Sort features by `period` for .get_external_state() to estimate
-        # more or less sensible gradient; double-stretch scale vector accordingly:
+        # more or less sensible gradient; double-stretch scale vector accordingly;
+        # same as MinPool/MaxPool indicators, computed for entire episode at once:
         # TODO: maybe 2 separate conv. encoders for hi/low?
-        self.data.features = []
-        for f1, f2 in zip(features_low, features_high):
-            self.data.features += [f1, f2]
+        self.precomputed_features = []
+        for period in self.features_parameters:
+            self.precomputed_features += [
+                dict(kind='min', periods=[period], line='low'),
+                dict(kind='max', periods=[period], line='high'),
+            ]
 
         self.p.state_ext_scale = np.repeat(self.p.state_ext_scale, 2)
 
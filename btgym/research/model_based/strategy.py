@@ -517,7 +517,7 @@ class PairSpreadStrategy_0(BaseStrategy6):
         # Potential-based shaping function 1:
         # based on potential of averaged profit/loss for current opened trade (unrealized p/l):
         unrealised_pnl = np.asarray(self.broker_stat['unrealized_pnl'])
-        current_pos_duration = self.broker_stat['pos_duration'][-1]
+        current_pos_duration = int(self.broker_stat['pos_duration'][-1])
 
         # We want to estimate potential `fi = gamma*fi_prime - fi` of current opened position,
         # thus need to consider different cases given skip_fame parameter:
@@ -921,9 +921,8 @@ class DevStrat_4_12(DevStrat_4_11):
     )
 
     def set_datalines(self):
-        self.data.features = [
-            btind.SimpleMovingAverage(self.datas[0], period=period) for period in self.features_parameters
-        ]
+        # SMA bank is computed for entire episode at once:
+        self.precomputed_features = [dict(kind='sma', periods=self.features_parameters)]
 
         self.data.dim_sma = btind.SimpleMovingAverage(
             self.datas[0],
@@ -933,12 +932,8 @@ class DevStrat_4_12(DevStrat_4_11):
 
     def get_external_state(self):
 
-        x_sma = np.stack(
-            [
-                feature.get(size=self.time_dim) for feature in self.data.features
-            ],
-            axis=-1
-        )
+        x_sma = self.get_features_window()
+
         # Gradient along features axis:
         dx = np.gradient(x_sma, axis=-1) * self.p.state_ext_scale
 
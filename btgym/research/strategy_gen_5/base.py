@@ -24,9 +24,8 @@ from gym import spaces
 from btgym import DictSpace
 
 import numpy as np
-from collections import deque
 
-from btgym.strategy.utils import norm_value, decayed_result, exp_scale
+from btgym.strategy.utils import norm_value, decayed_result, exp_scale, BrokerStat
 
 
 ############################## Base BTgymStrategy Class ###################
@@ -331,7 +330,7 @@ class BaseStrategy5(bt.Strategy):
 
         # Broker and account related sliding statistics accumulators, globally normalized last `avg_perod` values,
         # so it's a bit more computationally efficient than use of bt.Observers:
-        self.broker_stat = {key: deque(maxlen=self.avg_period) for key in self.broker_datalines}
+        self.broker_stat = BrokerStat(self.broker_datalines, self.avg_period)
 
         # Add custom data Lines if any (convenience wrapper):
         self.set_datalines()
@@ -425,7 +424,7 @@ class BaseStrategy5(bt.Strategy):
 
     def update_broker_stat(self):
         """
-        Updates all sliding broker statistics deques with latest-step values such as:
+        Updates all sliding broker statistics with latest-step values such as:
             - normalized broker value
             - normalized broker cash
             - normalized exposure (position size)
@@ -440,14 +439,15 @@ class BaseStrategy5(bt.Strategy):
         positions = [self.env.broker.getposition(data) for data in self.datas]
         exposure = sum([abs(pos.size) for pos in positions])
 
-        for key, method in self.collection_get_broker_stat_methods.items():
-            self.broker_stat[key].append(
+        self.broker_stat.append(
+            [
                 method(
                     current_value=current_value,
                     positions=positions,
                     exposure=exposure,
-                )
-            )
+                ) for method in self.collection_get_broker_stat_methods.values()
+            ]
+        )
 
         # Reset one-time flags:
         self.trade_just_closed = False
@@ -630,11 +630,8 @@ class BaseStrategy5(bt.Strategy):
         Generally, this method should not be modified, implement corresponding get_broker_[mode]() methods.
 
         """
-        x_broker = np.concatenate(
-            [np.asarray(stat)[..., None] for stat in self.broker_stat.values()],
-            axis=-1
-        )
-        return x_broker[:, None, :]
+        # Copy ordered [time, stat] window; buffer gets overwritten by next update:
+        return self.broker_stat.array[:, None, :].copy()
 
     def get_metadata_state(self):
         self.metadata['timestamp'] = np.asarray(self._get_timestamp())
@@ -718,7 +715,7 @@ class BaseStrategy5(bt.Strategy):
         # Potential-based shaping function 1:
         # based on potential of averaged profit/loss for current opened trade (unrealized p/l):
         unrealised_pnl = np.asarray(self.broker_stat['unrealized_pnl'])
-        current_pos_duration = self.broker_stat['pos_duration'][-1]
+        current_pos_duration = int(self.broker_stat['pos_duration'][-1])
 
         # We want to estimate potential `fi = gamma*fi_prime - fi` of current opened position,
         # thus need to consider different cases given skip_fame parameter:
@@ -10,6 +10,7 @@ from scipy import stats
 from collections import namedtuple
 
 from btgym.research.model_based.model.rec import Zscore
+from btgym.strategy.utils import BrokerStat
 
 
 NormalisationState = namedtuple('NormalisationState', ['mean', 'variance', 'low_interval', 'up_interval'])
@@ -317,7 +318,7 @@ class BaseStrategy6(bt.Strategy):
                 raise NotImplementedError('Callable get_broker_{}.() not found'.format(line))
 
         # Broker and account related sliding statistics accumulators:
-        self.broker_stat = {key: np.zeros(self.avg_period) for key in self.broker_datalines}
+        self.broker_stat = BrokerStat(self.broker_datalines, self.avg_period, zero_filled=True)
 
         # This data line will be used to by default to
         # define normalisation bounds (can be overiden via .set_datalines()):
@@ -469,17 +470,21 @@ class BaseStrategy6(bt.Strategy):
         # print('normalizer: ', normalizer)
         # print('self.current_order_sizes: ', self.current_order_sizes)
 
-        for key, method in self.collection_get_broker_stat_methods.items():
-            update = method(
-                current_value=current_value,
-                positions=positions,
-                exposure=exposure,
-                lower_bound=norm_state.low_interval,
-                upper_bound=norm_state.up_interval,
-                normalizer=self.normalizer,
-            )
-            # Update accumulator:
-            self.broker_stat[key] = np.concatenate([self.broker_stat[key][1:], np.asarray([float(update)])])
+        # Update accumulator:
+        self.broker_stat.append(
+            [
+                float(
+                    method(
+                        current_value=current_value,
+                        positions=positions,
+                        exposure=exposure,
+                        lower_bound=norm_state.low_interval,
+                        upper_bound=norm_state.up_interval,
+                        normalizer=self.normalizer,
+                    )
+                ) for method in self.collection_get_broker_stat_methods.values()
+            ]
+        )
 
         # Reset one-time flags:
         self.trade_just_closed = False
@@ -18,9 +18,10 @@
 ###############################################################################
 
 import multiprocessing
-import gc
+import threading
 
 import itertools
+import collections
 import zmq
 import copy
 
@@ -30,17 +31,19 @@ from datetime import timedelta
 
 import backtrader as bt
 from .datafeed import DataSampleConfig, EnvResetConfig
+from .datafeed.shared import SharedDataset
 from .strategy.observers import NormPnL, Position, Reward
+from .transport import InProcessContext, make_wire_codec, copy_observation
+from .profiling import StepLatencyProfile
+from .fastengine import BTgymFastEngine
 
 ###################### BT Server in-episode communocation method ##############
 
 
-class _BTgymAnalyzer(bt.Analyzer):
+class _EnvCommunicator:
     """
-    This [kind of] misused analyzer handles strategy/environment communication logic
-    while in episode mode.
-    As part of core server operational logic, it should not be explicitly called/edited.
-    Yes, it actually analyzes nothing.
+    Strategy/environment communication logic while in episode mode, shared by backtrader analyzer and
+    its BTgymFastEngine counterpart. Expects `strategy` attribute to be set before __init__() is called.
     """
     log = None
     socket = None
@@ -50,7 +53,14 @@ class _BTgymAnalyzer(bt.Analyzer):
         self.log = self.strategy.env._log
         self.socket = self.strategy.env._socket
         self.data_socket = self.strategy.env._data_socket
+        self.broadcast_socket = self.strategy.env._broadcast_socket
         self.render = self.strategy.env._render
+        self.obs_ring = self.strategy.env._obs_ring
+        self.wire_codec = self.strategy.env._wire_codec
+        # In-process responses are passed by reference, while strategy refills state buffers every step:
+        self.copy_state = self.strategy.env._copy_state
+        # StepLatencyProfile instance if step phases timing is on, None otherwise:
+        self.profile = self.strategy.env._step_profile
 
         # Pass data serving methods:
         self.get_current_trial = self.strategy.env._get_data
@@ -60,9 +70,14 @@ class _BTgymAnalyzer(bt.Analyzer):
         self.get_broadcast_info = self.strategy._get_broadcast_info
 
         self.message = None
+        self.last_broadcast = None  # latest global time update sent
         self.step_to_render = None  # Due to reset(), this will get populated before first render() call.
         self.respond_pending = False
 
+        # Time from '_reset' receipt to engine ready to serve first step:
+        self.reset_time = self.strategy.env._reset_time
+        self.reset_latency = None
+
         # At the end of the episode - render everything but episode:
         self.render_at_stop = self.render.render_modes.copy()
         try:
@@ -73,6 +88,10 @@ class _BTgymAnalyzer(bt.Analyzer):
 
         self.info_list = []
 
+        # Open-loop action sequence received via `actions` key and responses collected so far:
+        self.action_queue = collections.deque()
+        self.batch_responses = None
+
     def prenext(self):
         pass
 
@@ -96,30 +115,62 @@ class _BTgymAnalyzer(bt.Analyzer):
         Sends environment response as <o, r, d, i> tuple.
         See issue #84.
         """
+        profile = self.profile
         # Gather response:
         raw_state = self.strategy.get_raw_state()
+        if profile is not None:
+            profile.lap('get_raw_state')
+
         state = self.strategy.get_state()
+        if profile is not None:
+            profile.lap('get_state')
+
         reward = self.strategy.get_reward()
+        if profile is not None:
+            profile.lap('get_reward')
+
         # Send response as <o, r, d, i> tuple (Gym convention),
         # opt to send entire info_list or just latest part:
         info = [self.info_list[-1]]
-        self.socket.send_pyobj((state, reward, is_done, info))
+        if self.batch_responses is not None:
+            # Serving action sequence: collect response, send all at once when sequence is over or episode is done:
+            self.batch_responses.append((copy.deepcopy(state), reward, is_done, info))
+            if is_done or not self.action_queue:
+                self.socket.send_pyobj(self.batch_responses)
+                self.batch_responses = None
+                self.action_queue.clear()
+
+        elif self.obs_ring is not None:
+            # Put observation to shared memory, send slot index only:
+            self.socket.send_pyobj((self.obs_ring.write(state), reward, is_done, info))
+
+        else:
+            if self.copy_state:
+                state = copy_observation(state)
+
+            self.wire_codec.send_response(self.socket, (state, reward, is_done, info))
 
-        # Increment global time by sending timestamp to data_server, if authorized;
+        if profile is not None:
+            profile.lap('send')
+
+        # Increment global time by pushing timestamp to data_server, if authorized;
+        # no reply awaited, data_server applies latest update received before serving next request:
         if self.can_broadcast:
-            global_timestamp = self.get_timestamp()
-            broadcast_info = self.get_broadcast_info()
-            self.log.debug('broadcasting timestamp: {}'.format(global_timestamp))
-
-            self.data_socket.send_pyobj(
-                {
-                    'ctrl': '_set_broadcast_message',
-                    'timestamp': global_timestamp,
-                    'broadcast_message': broadcast_info,
-                }
-            )
-            broadcast_set_response = self.data_socket.recv_pyobj()
-            self.log.debug('DATA_COMM/broadcast received: {}'.format(broadcast_set_response))
+            self.last_broadcast = {
+                'ctrl': '_set_broadcast_message',
+                'timestamp': self.get_timestamp(),
+                'broadcast_message': self.get_broadcast_info(),
+            }
+            self.log.debug('broadcasting timestamp: {}'.format(self.last_broadcast['timestamp']))
+            try:
+                self.broadcast_socket.send_pyobj(self.last_broadcast, flags=zmq.NOBLOCK)
+
+            except zmq.Again:
+                # Not connected yet or previous update still queued; it gets flushed at episode end anyway:
+                pass
+
+            if profile is not None:
+                profile.lap('broadcast')
 
         # Back up step information for rendering.
         # It pays when using skip-frames: will'll get future state otherwise.
@@ -131,15 +182,32 @@ class _BTgymAnalyzer(bt.Analyzer):
         self.strategy.env_iteration += 1
         self.respond_pending = False
 
+    def set_action(self, action):
+        """
+        Passes agent action to strategy, rises respond_pending flag.
+        """
+        self.strategy.action = action
+        self.strategy.last_action = action
+        self.respond_pending = True
+
     def next(self):
         """
         Actual env.step() communication and episode termination is here.
         """
+        if self.reset_latency is None:
+            self.reset_latency = time.time() - self.reset_time
+
+        profile = self.profile
+        if profile is not None:
+            profile.lap('engine')
+
         # We'll do it every step:
         # If it's time to leave:
         is_done = self.strategy._get_done()
         # Collect step info:
         self.info_list.append(self.strategy.get_info())
+        if profile is not None:
+            profile.lap('get_info')
         # Put agent on hold:
         self.strategy.action = self.strategy.p.initial_portfolio_action
         # Trick to avoid excessive orders emitting during skip_frame loop:
@@ -159,57 +227,69 @@ class _BTgymAnalyzer(bt.Analyzer):
             #print('Analyzer_strat_iteration:', self.strategy.iteration)
             #print('Analyzer_env_iteration:', self.strategy.env_iteration)
 
-            # Halt and wait to receive message from outer world:
-            self.message = self.socket.recv_pyobj()
-            msg = 'COMM received: {}'.format(self.message)
-            self.log.debug(msg)
-
-            # Control actions loop, ignoring 'action' key:
-            while 'ctrl' in self.message:
-                # Rendering requested:
-                if self.message['ctrl'] == '_render':
-                    self.socket.send_pyobj(
-                        self.render.render(
-                            self.message['mode'],
-                            step_to_render=self.step_to_render,
+            if self.action_queue:
+                # Still serving action sequence, no need to ask outer world:
+                self.set_action(self.action_queue.popleft())
+
+            else:
+                # Halt and wait to receive message from outer world:
+                self.message = self.wire_codec.recv(self.socket)
+                msg = 'COMM received: {}'.format(self.message)
+                self.log.debug(msg)
+
+                # Control actions loop, ignoring 'action' key:
+                while 'ctrl' in self.message:
+                    # Rendering requested:
+                    if self.message['ctrl'] == '_render':
+                        self.socket.send_pyobj(
+                            self.render.render(
+                                self.message['mode'],
+                                step_to_render=self.step_to_render,
+                            )
                         )
-                    )
-                # Episode termination requested:
-                elif self.message['ctrl'] == '_done':
-                    is_done = True  # redundant
-                    self.socket.send_pyobj('_DONE SIGNAL RECEIVED')
-                    self.early_stop()
-                    return None
+                    # Episode termination requested:
+                    elif self.message['ctrl'] == '_done':
+                        is_done = True  # redundant
+                        self.socket.send_pyobj('_DONE SIGNAL RECEIVED')
+                        self.early_stop()
+                        return None
 
-                elif self.message['ctrl'] == '_get_data':
-                    self.socket.send_pyobj(self.get_current_trial())
+                    elif self.message['ctrl'] == '_get_data':
+                        self.socket.send_pyobj(self.get_current_trial())
 
-                elif self.message['ctrl'] == '_get_info':
-                    self.socket.send_pyobj(self.get_dataset_info())
+                    elif self.message['ctrl'] == '_get_info':
+                        self.socket.send_pyobj(self.get_dataset_info())
 
-                # Unknown key:
-                else:
-                    message = {'ctrl': 'send control keys: <_reset>, <_getstat>, ' +
-                                       '<_render>, <_stop>, or valid agent action'}
-                    self.log.warning(
-                        'Analyzer received unexpected key: {}; Sent: {}'.format(self.message, str(message))
-                    )
-                    self.socket.send_pyobj(message)
+                    # Unknown key:
+                    else:
+                        message = {'ctrl': 'send control keys: <_reset>, <_getstat>, ' +
+                                           '<_render>, <_stop>, or valid agent action'}
+                        self.log.warning(
+                            'Analyzer received unexpected key: {}; Sent: {}'.format(self.message, str(message))
+                        )
+                        self.socket.send_pyobj(message)
 
-                # Halt again:
-                self.message = self.socket.recv_pyobj()
-                msg = 'COMM recieved: {}'.format(self.message)
-                self.log.debug(msg)
+                    # Halt again:
+                    self.message = self.wire_codec.recv(self.socket)
+                    msg = 'COMM recieved: {}'.format(self.message)
+                    self.log.debug(msg)
 
-            # Store agent action an rise respond_pending flag:
-            if 'action' in self.message:  # now it should!
-                self.strategy.action = self.message['action']
-                self.strategy.last_action = self.message['action']
-                self.respond_pending = True
+                if profile is not None:
+                    profile.lap('client_wait')
 
-            else:
-                msg = 'No <action> key recieved:\n' + msg
-                raise AssertionError(msg)
+                # Store agent action an rise respond_pending flag:
+                if 'action' in self.message:  # now it should!
+                    self.set_action(self.message['action'])
+
+                # ...or sequence of actions to execute one per step, replying once:
+                elif 'actions' in self.message and len(self.message['actions']) > 0:
+                    self.action_queue.extend(self.message['actions'])
+                    self.batch_responses = []
+                    self.set_action(self.action_queue.popleft())
+
+                else:
+                    msg = 'No <action> key recieved:\n' + msg
+                    raise AssertionError(msg)
 
         # If done, initiate fallback to Control Mode:
         if is_done:
@@ -219,9 +299,136 @@ class _BTgymAnalyzer(bt.Analyzer):
         self.strategy.iteration += 1
         self.strategy.broker_message = '-'
 
+        if profile is not None:
+            profile.mark()
+
+
+class _BTgymAnalyzer(_EnvCommunicator, bt.Analyzer):
+    """
+    This [kind of] misused analyzer handles strategy/environment communication logic
+    while in episode mode.
+    As part of core server operational logic, it should not be explicitly called/edited.
+    Yes, it actually analyzes nothing.
+    """
+
+
+class _BTgymFastAnalyzer(_EnvCommunicator):
+    """
+    Handles strategy/environment communication for episodes run by btgym.fastengine.BTgymFastEngine.
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        super(_BTgymFastAnalyzer, self).__init__()
+
     ##############################  BTgym Server Main  ##############################
 
 
+class BTgymEngineFactory:
+    """
+    Builds fresh backtrader engine instance for every episode from cached specification of engine template:
+    Cerebro class and parameters, strategies with their parameters, pristine broker, sizers, observers,
+    analyzers, indicators, signals and writers. Unlike deepcopy of entire template, only strategy kwargs
+    containers and broker get copied per episode.
+    """
+
+    def __init__(self, cerebro, observers=(), analyzers=()):
+        """
+
+        Args:
+            cerebro:    bt.Cerebro [subclass] instance used as template, not run yet;
+            observers:  iterable of auxiliary observers classes to add, if not already;
+            analyzers:  iterable of tuples (analyzer class, kwargs) to add.
+        """
+        self.cerebro_class = type(cerebro)
+        self.params = cerebro.p._getkwargs()
+
+        self.strats = [[(cls, args, dict(kwargs)) for cls, args, kwargs in strat] for strat in cerebro.strats]
+        self.sizers = dict(cerebro.sizers)
+        self.indicators = list(cerebro.indicators)
+        self.signals = list(cerebro.signals)
+        self.signal_config = (cerebro._signal_strat, cerebro._signal_concurrent, cerebro._signal_accumulate)
+        self.writers = list(cerebro.writers)
+        self.analyzers = list(cerebro.analyzers)
+        self.observers = list(cerebro.observers)
+
+        for aux in observers:
+            if not any(aux in observer for observer in self.observers):
+                self.observers.append((False, aux, (), dict()))
+
+        for analyzer, kwargs in analyzers:
+            self.analyzers.append((analyzer, (), kwargs))
+
+        # Keep pristine broker detached from template engine:
+        broker = copy.copy(cerebro.broker)
+        broker.cerebro = None
+        self.broker = copy.deepcopy(broker)
+
+    @staticmethod
+    def _copy_kwargs(kwargs):
+        # Strategies are free to modify mutable params, e.g. `initial_portfolio_action`:
+        return {
+            key: copy.copy(value) if isinstance(value, (dict, list)) else value for key, value in kwargs.items()
+        }
+
+    def make(self):
+        """
+        Returns:
+            new engine instance ready to add data to.
+        """
+        cerebro = self.cerebro_class(**self.params)
+        cerebro.strats = [
+            [(cls, args, self._copy_kwargs(kwargs)) for cls, args, kwargs in strat] for strat in self.strats
+        ]
+        cerebro.sizers = dict(self.sizers)
+        cerebro.indicators = list(self.indicators)
+        cerebro.signals = list(self.signals)
+        cerebro._signal_strat, cerebro._signal_concurrent, cerebro._signal_accumulate = self.signal_config
+        cerebro.writers = list(self.writers)
+        cerebro.analyzers = list(self.analyzers)
+        cerebro.observers = list(self.observers)
+        cerebro.broker = copy.deepcopy(self.broker)
+
+        return cerebro
+
+
+class BTgymFastEngineFactory(BTgymEngineFactory):
+    """
+    Builds fresh BTgymFastEngine instance for every episode from cached template specification.
+    """
+
+    def __init__(self, engine, analyzers=()):
+        """
+
+        Args:
+            engine:     BTgymFastEngine [subclass] instance used as template, not run yet;
+            analyzers:  iterable of tuples (analyzer class, kwargs) to add.
+        """
+        self.engine_class = type(engine)
+        self.strats = [[(cls, args, dict(kwargs)) for cls, args, kwargs in strat] for strat in engine.strats]
+        self.sizers = dict(engine.sizers)
+        self.analyzers = list(engine.analyzers)
+        for analyzer, kwargs in analyzers:
+            self.analyzers.append((analyzer, (), kwargs))
+
+        self.broker = copy.deepcopy(engine.broker)
+
+    def make(self):
+        """
+        Returns:
+            new engine instance ready to add data to.
+        """
+        engine = self.engine_class()
+        engine.strats = [
+            [(cls, args, self._copy_kwargs(kwargs)) for cls, args, kwargs in strat] for strat in self.strats
+        ]
+        engine.sizers = dict(self.sizers)
+        engine.analyzers = list(self.analyzers)
+        engine.broker = copy.deepcopy(self.broker)
+
+        return engine
+
+
 class BTgymServer(multiprocessing.Process):
     """Backtrader server class.
 
@@ -230,7 +437,8 @@ class BTgymServer(multiprocessing.Process):
     Control mode IN::
 
         dict(action=<control action, type=str>,), where control action is:
-        '_reset' - rewinds backtrader engine and runs new episode;
+        '_reset' - rewinds backtrader engine and runs new episode; optional `wire_codec` key holds
+                   per-step messages codec specification, see btgym.transport.make_wire_codec();
         '_getstat' - retrieve episode results and statistics;
         '_stop' - server shut-down.
 
@@ -243,6 +451,7 @@ class BTgymServer(multiprocessing.Process):
         Episode mode IN:
         dict(action=<agent_action, type=str>,), where agent_action is:
         {'buy', 'sell', 'hold', 'close', '_done'} - agent or service actions; '_done' - stops current episode;
+        dict(actions=<list of agent_action>,) - open-loop sequence of actions, executed one per step;
 
     Episode mode OUT::
 
@@ -254,6 +463,7 @@ class BTgymServer(multiprocessing.Process):
                            reward, <any> - current portfolio statistics for environment reward estimation;
                            done, <bool> - episode termination flag;
                            info, <list> - auxiliary information.
+        list of response tuples - for `actions` sequence, sent once sequence is over or episode is done.
     """
     data_server_response = None
 
@@ -266,6 +476,12 @@ class BTgymServer(multiprocessing.Process):
         connect_timeout=90,
         log_level=None,
         task=0,
+        obs_ring=None,
+        in_process=False,
+        ready_event=None,
+        profile_steps=False,
+        share_data=False,
+        prefetch_episodes=False,
     ):
         """
 
@@ -276,6 +492,18 @@ class BTgymServer(multiprocessing.Process):
             data_network_address:   data communication, str
             connect_timeout:        seconds, int
             log_level:              int, logbook.level
+            obs_ring:               btgym.transport.SharedObservationRing instance or None;
+                                    if given, observations are passed via shared memory.
+            in_process:             bool, if True - server is expected to run as thread of environment process
+                                    and uses in-process sockets instead of ZMQ ones;
+            ready_event:            multiprocessing.Event or alike, set as soon as server is ready to accept
+                                    connections, if given;
+            profile_steps:          bool, if True - time step phases and add per-episode latency histograms
+                                    to episode results under `step_latency` key, see btgym.profiling;
+            share_data:             bool, if True - ask data_server for trial samples as references to dataset
+                                    published in shared memory, see btgym.datafeed.shared.SharedDataset;
+            prefetch_episodes:      bool, if True - prepare next episode data in background while current one
+                                    runs; used at next reset if it comes with same kwargs and global time.
         """
 
         super(BTgymServer, self).__init__()
@@ -289,6 +517,14 @@ class BTgymServer(multiprocessing.Process):
         self.data_network_address = data_network_address
         self.connect_timeout = connect_timeout # server connection timeout in seconds.
         self.connect_timeout_step = 0.01
+        self.obs_ring = obs_ring
+        self.context_class = InProcessContext if in_process else zmq.Context
+        self.ready_event = ready_event
+        self.profile_steps = profile_steps
+        self.share_data = share_data
+        self.prefetch_episodes = prefetch_episodes
+        self.shared_data = None
+        self.log_handler = None
 
         self.trial_sample = None
         self.trial_stat = None
@@ -368,7 +604,7 @@ class BTgymServer(multiprocessing.Process):
             # Get new data subset:
             data_server_response = self._comm_with_timeout(
                 socket=self.data_socket,
-                message={'ctrl': '_get_data', 'kwargs': reset_kwargs}
+                message={'ctrl': '_get_data', 'kwargs': reset_kwargs, 'accept_ref': self.share_data}
             )
             if data_server_response['status'] in 'ok':
                 self.log.debug('Data_server @{} responded in ~{:1.6f} seconds.'.
@@ -402,7 +638,18 @@ class BTgymServer(multiprocessing.Process):
             except (AssertionError, KeyError) as e:
                 break
         # Get trial instance:
-        trial_sample = data_server_response['message']['sample']
+        if data_server_response['message'].get('sample_ref') is not None:
+            try:
+                trial_sample = self.get_shared_sample(data_server_response['message']['sample_ref'])
+
+            except OSError as e:
+                self.log.warning('Failed to attach shared dataset: {}, falling back to copying samples.'.format(e))
+                self.share_data = False
+                return self.get_trial(**reset_kwargs)
+
+        else:
+            trial_sample = data_server_response['message']['sample']
+
         trial_stat = trial_sample.describe()
         trial_sample.reset()
         dataset_stat = data_server_response['message']['stat']
@@ -411,6 +658,22 @@ class BTgymServer(multiprocessing.Process):
 
         return trial_sample, trial_stat, dataset_stat, origin, timestamp
 
+    def get_shared_sample(self, ref):
+        """
+        Makes trial instance viewing dataset published by data_server, attaches to published dataset if needed.
+
+        Args:
+            ref:    sample reference received from data_server
+
+        Returns:
+            trial sample instance
+        """
+        if self.shared_data is None or self.shared_data.path != ref['path']:
+            self.shared_data = SharedDataset.attach(ref['path'])
+            self.log.debug('Attached to shared dataset at: <{}>'.format(ref['path']))
+
+        return self.shared_data.make_sample(ref)
+
     def get_trial_message(self):
         """
         Prepares  message containing current trial instance, mimicking data_server message protocol.
@@ -478,6 +741,185 @@ class BTgymServer(multiprocessing.Process):
 
         return data_server_response['message']['timestamp'], data_server_response['message']['broadcast_message']
 
+    def prepare_episode(self, reset_kwargs, current_timestamp, current_broadcast_message, trial_sample=None):
+        """
+        Gets trial (new or current one) and samples episode from it, converts episode data to backtrader feed.
+        Does not alter server attributes; note that sampling advances state of data_server and of trial sampled.
+
+        Args:
+            reset_kwargs:               dictionary of `_reset` kwargs;
+            current_timestamp:          data_server global time;
+            current_broadcast_message:  data_server broadcast message;
+            trial_sample:               trial to reuse instead of current one, if new trial is not requested.
+
+        Returns:
+            dictionary of: `trial_sample`, `trial_stat`, `dataset_stat`, `episode_sample`, `episode_stat`, `feed`,
+            `broadcast_message`.
+        """
+        # Parse args we got with _reset call:
+        sample_config = dict(
+            episode_config=copy.deepcopy(DataSampleConfig),
+            trial_config=copy.deepcopy(DataSampleConfig)
+        )
+        for key, config in sample_config.items():
+            try:
+                config.update(reset_kwargs[key])
+
+            except KeyError:
+                self.log.debug(
+                    '_reset <{}> kwarg not found, using default values: {}'.format(key, config)
+                )
+        sample_config['trial_config']['broadcast_message'] = current_broadcast_message
+        sample_config['episode_config']['broadcast_message'] = current_broadcast_message
+        if trial_sample is None:
+            trial_sample = self.trial_sample
+
+        # Get new Trial from data_server if requested,
+        # despite bult-in new/reuse data object sampling option, perform checks here to avoid
+        # redundant traffic:
+        if sample_config['trial_config']['get_new'] or trial_sample is None:
+            self.log.info(
+                'Requesting new Trial sample with args: {}'.format(sample_config['trial_config'])
+            )
+            trial_sample, trial_stat, dataset_stat, origin, current_timestamp =\
+                self.get_trial(**sample_config['trial_config'])
+
+            if origin in 'data_server':
+                trial_sample.set_logger(self.log_level, self.task)
+
+            self.log.debug('Got new Trial: <{}>'.format(trial_sample.filename))
+
+        else:
+            trial_stat, dataset_stat = self.trial_stat, self.dataset_stat
+            self.log.info('Reusing Trial <{}>'.format(trial_sample.filename))
+            # current_timestamp = self.get_global_time()
+
+        self.log.debug(
+            'current global_time: {}'.format(datetime.datetime.fromtimestamp(current_timestamp))
+        )
+        # Get episode:
+        if sample_config['episode_config']['timestamp'] is None or\
+                sample_config['episode_config']['timestamp'] < current_timestamp:
+            sample_config['episode_config']['timestamp'] = current_timestamp
+
+        self.log.info(
+            'Requesting episode from <{}> with args: {}'.
+            format(trial_sample.filename, sample_config['episode_config'])
+        )
+
+        episode_sample = trial_sample.sample(**sample_config['episode_config'])
+        self.log.debug('Got new Episode: <{}>'.format(episode_sample.filename))
+
+        return dict(
+            trial_sample=trial_sample,
+            trial_stat=trial_stat,
+            dataset_stat=dataset_stat,
+            episode_sample=episode_sample,
+            episode_stat=episode_sample.describe(),
+            feed=episode_sample.to_btfeed(),
+            broadcast_message=current_broadcast_message,
+        )
+
+    def can_prefetch(self, reset_kwargs):
+        """
+        Tells if next episode can be prepared ahead of time, assuming next `_reset` comes with same kwargs.
+        Only episodes of current trial are prefetched: getting new trial advances data_server sampling state,
+        which can not be undone if prefetched data gets discarded.
+
+        Args:
+            reset_kwargs:   dictionary of current `_reset` kwargs.
+
+        Returns:
+            bool
+        """
+        trial_config = copy.deepcopy(DataSampleConfig)
+        trial_config.update(reset_kwargs.get('trial_config', {}))
+
+        return not trial_config['get_new'] and self.trial_sample is not None
+
+    def start_prefetch(self, reset_kwargs, current_timestamp, current_broadcast_message):
+        """
+        Starts preparing next episode data in background thread, assuming next `_reset` comes with same kwargs,
+        global time and broadcast message. Episode is sampled from a copy of current trial, so trial sampling
+        state advances only if prefetched episode gets used.
+
+        Args:
+            reset_kwargs:               dictionary of current `_reset` kwargs;
+            current_timestamp:          data_server global time;
+            current_broadcast_message:  data_server broadcast message.
+
+        Returns:
+            prefetch dictionary to pass to get_prefetched_episode() or None if episode can not be prefetched.
+        """
+        if not self.can_prefetch(reset_kwargs):
+            self.log.debug('New trial requested, episode not prefetched.')
+            return None
+
+        prefetch = dict(
+            reset_kwargs=copy.deepcopy(reset_kwargs),
+            state=(current_timestamp, current_broadcast_message),
+            trial_sample=copy.copy(self.trial_sample),
+            episode_data=None,
+            error=None,
+        )
+        prefetch['thread'] = threading.Thread(
+            target=self._prefetch_episode,
+            args=(prefetch,),
+            name='BTgymServer_{}_prefetch'.format(self.task),
+            daemon=True,
+        )
+        prefetch['thread'].start()
+
+        return prefetch
+
+    def _prefetch_episode(self, prefetch):
+        """
+        Prefetch thread body. Does not talk to data_server; any failure is passed to main thread.
+        """
+        try:
+            prefetch['episode_data'] = self.prepare_episode(
+                prefetch['reset_kwargs'],
+                *prefetch['state'],
+                trial_sample=prefetch['trial_sample']
+            )
+
+        except Exception as e:
+            prefetch['error'] = e
+
+    def get_prefetched_episode(self, prefetch, reset_kwargs, current_timestamp, current_broadcast_message):
+        """
+        Waits for prefetch to finish, checks it is valid for this reset.
+
+        Args:
+            prefetch:                   dictionary returned by start_prefetch();
+            reset_kwargs:               dictionary of `_reset` kwargs;
+            current_timestamp:          data_server global time;
+            current_broadcast_message:  data_server broadcast message.
+
+        Returns:
+            episode data dictionary as returned by prepare_episode() or None if prefetched data is not valid.
+        """
+        prefetch['thread'].join()
+        if prefetch['error'] is not None:
+            self.log.warning('Failed to prefetch episode: {}'.format(prefetch['error']))
+            return None
+
+        try:
+            is_valid = prefetch['episode_data'] is not None and\
+                prefetch['reset_kwargs'] == reset_kwargs and\
+                prefetch['state'] == (current_timestamp, current_broadcast_message)
+
+        except ValueError:
+            # Arrays found in kwargs or message, can't tell:
+            is_valid = False
+
+        if is_valid:
+            self.log.debug('Using prefetched episode.')
+            return prefetch['episode_data']
+
+        self.log.debug('Prefetched episode discarded: reset kwargs or global time changed.')
+        return None
+
     def run(self):
         """
         Server process runtime body. This method is invoked by env._start_server().
@@ -485,7 +927,8 @@ class BTgymServer(multiprocessing.Process):
         # Logging:
         from logbook import Logger, StreamHandler, WARNING
         import sys
-        StreamHandler(sys.stdout).push_application()
+        self.log_handler = StreamHandler(sys.stdout)
+        self.log_handler.push_application()
         if self.log_level is None:
             self.log_level = WARNING
         self.log = Logger('BTgymServer_{}'.format(self.task), level=self.log_level)
@@ -497,6 +940,7 @@ class BTgymServer(multiprocessing.Process):
         cerebro = None
         episode_result = dict()
         episode_sample = None
+        prefetch = None
 
         # How long to wait for data_master to reset data:
         self.wait_for_data_reset = 300  # seconds
@@ -506,13 +950,15 @@ class BTgymServer(multiprocessing.Process):
         # Set up a comm. channel for server as ZMQ socket
         # to carry both service and data signal
         # !! Reminder: Since we use REQ/REP - messages do go in pairs !!
-        self.context = zmq.Context()
+        self.context = self.context_class()
         self.socket = self.context.socket(zmq.REP)
         self.socket.setsockopt(zmq.RCVTIMEO, -1)
         self.socket.setsockopt(zmq.SNDTIMEO, connect_timeout * 1000)
         self.socket.bind(self.network_address)
+        if self.ready_event is not None:
+            self.ready_event.set()
 
-        self.data_context = zmq.Context()
+        self.data_context = self.context_class()
         self.data_socket = self.data_context.socket(zmq.REQ)
         self.data_socket.setsockopt(zmq.RCVTIMEO, connect_timeout * 1000)
         self.data_socket.setsockopt(zmq.SNDTIMEO, connect_timeout * 1000)
@@ -535,6 +981,27 @@ class BTgymServer(multiprocessing.Process):
             self.log.error(msg)
             raise ConnectionError(msg)
 
+        # Set up non-blocking global time broadcasting channel, keeping latest update only:
+        data_server_response = self._comm_with_timeout(
+            socket=self.data_socket,
+            message={'ctrl': '_get_broadcast_address'}
+        )
+        if data_server_response['status'] not in 'ok':
+            msg = 'Data_server unreachable with status: <{}>.'.\
+                format(data_server_response['status'])
+            self.log.error(msg)
+            raise ConnectionError(msg)
+
+        self.broadcast_socket = self.data_context.socket(zmq.PUSH)
+        self.broadcast_socket.setsockopt(zmq.CONFLATE, 1)
+        self.broadcast_socket.setsockopt(zmq.LINGER, 0)
+        self.broadcast_socket.connect(
+            '{}:{}'.format(
+                self.data_network_address.rsplit(':', 1)[0],
+                data_server_response['message']['broadcast_port']
+            )
+        )
+
         # Init renderer:
         self.render.initialize_pyplot()
 
@@ -546,6 +1013,22 @@ class BTgymServer(multiprocessing.Process):
         else:
             aux_obsrevers = [bt.observers.DrawDown]
 
+        # Cache engine specification once, add communication utility:
+        is_fast_engine = isinstance(self.cerebro, BTgymFastEngine)
+        if is_fast_engine:
+            # Drawdown and broker statistics are built in, plotting observers are not supported:
+            engine_factory = BTgymFastEngineFactory(
+                self.cerebro,
+                analyzers=[(_BTgymFastAnalyzer, dict(_name='_env_analyzer'))],
+            )
+
+        else:
+            engine_factory = BTgymEngineFactory(
+                self.cerebro,
+                observers=aux_obsrevers,
+                analyzers=[(_BTgymAnalyzer, dict(_name='_env_analyzer'))],
+            )
+
         # Server 'Control Mode' loop:
         for episode_number in itertools.count(0):
             while True:
@@ -568,6 +1051,8 @@ class BTgymServer(multiprocessing.Process):
 
                     # Start episode:
                     elif service_input['ctrl'] == '_reset':
+                        # Per-step messages codec as requested by environment:
+                        wire_codec = make_wire_codec(service_input.get('wire_codec'))
                         message = 'Preparing new episode with kwargs: {}'.format(service_input['kwargs'])
                         self.log.debug(message)
                         self.socket.send_pyobj(message)  # pairs '_reset'
@@ -610,98 +1095,63 @@ class BTgymServer(multiprocessing.Process):
 
             # Got '_reset' signal -> prepare Cerebro subclass and run episode:
             start_time = time.time()
-            cerebro = copy.deepcopy(self.cerebro)
+            cerebro = engine_factory.make()
+            cerebro._reset_time = start_time
             cerebro._socket = self.socket
             cerebro._data_socket = self.data_socket
+            cerebro._broadcast_socket = self.broadcast_socket
             cerebro._log = self.log
             cerebro._render = self.render
+            cerebro._obs_ring = self.obs_ring
+            cerebro._wire_codec = wire_codec
+            cerebro._copy_state = self.context_class is InProcessContext
+            cerebro._step_profile = StepLatencyProfile() if self.profile_steps else None
 
             # Pass methods for serving capabilities:
             cerebro._get_data = self.get_trial_message
             cerebro._get_info = self.get_dataset_stat
 
-            # Add auxillary observers, if not already:
-            for aux in aux_obsrevers:
-                is_added = False
-                for observer in cerebro.observers:
-                    if aux in observer:
-                        is_added = True
-                if not is_added:
-                    cerebro.addobserver(aux)
-
-            # Add communication utility:
-            cerebro.addanalyzer(_BTgymAnalyzer, _name='_env_analyzer',)
-
             # Data preparation:
 
             # Renew system state:
             current_timestamp, current_broadcast_message = self.get_broadcast_message()
 
-            # Parse args we got with _reset call:
-            sample_config = dict(
-                episode_config=copy.deepcopy(DataSampleConfig),
-                trial_config=copy.deepcopy(DataSampleConfig)
-            )
-            for key, config in sample_config.items():
-                try:
-                    config.update(service_input['kwargs'][key])
-
-                except KeyError:
-                    self.log.debug(
-                        '_reset <{}> kwarg not found, using default values: {}'.format(key, config)
-                    )
-            sample_config['trial_config']['broadcast_message'] = current_broadcast_message
-            sample_config['episode_config']['broadcast_message'] = current_broadcast_message
-
-            # Get new Trial from data_server if requested,
-            # despite bult-in new/reuse data object sampling option, perform checks here to avoid
-            # redundant traffic:
-            if sample_config['trial_config']['get_new'] or self.trial_sample is None:
-                self.log.info(
-                    'Requesting new Trial sample with args: {}'.format(sample_config['trial_config'])
+            episode_data = None
+            if prefetch is not None:
+                episode_data = self.get_prefetched_episode(
+                    prefetch,
+                    service_input['kwargs'],
+                    current_timestamp,
+                    current_broadcast_message
                 )
-                self.trial_sample, self.trial_stat, self.dataset_stat, origin, current_timestamp =\
-                    self.get_trial(**sample_config['trial_config'])
-
-                if origin in 'data_server':
-                    self.trial_sample.set_logger(self.log_level, self.task)
-
-                self.log.debug('Got new Trial: <{}>'.format(self.trial_sample.filename))
+                prefetch = None
 
-            else:
-                self.log.info('Reusing Trial <{}>'.format(self.trial_sample.filename))
-                # current_timestamp = self.get_global_time()
-
-            self.log.debug(
-                'current global_time: {}'.format(datetime.datetime.fromtimestamp(current_timestamp))
-            )
-            # Get episode:
-            if sample_config['episode_config']['timestamp'] is None or\
-                    sample_config['episode_config']['timestamp'] < current_timestamp:
-                sample_config['episode_config']['timestamp'] = current_timestamp
-
-            self.log.info(
-                'Requesting episode from <{}> with args: {}'.
-                format(self.trial_sample.filename, sample_config['episode_config'])
-            )
+            if episode_data is None:
+                episode_data = self.prepare_episode(
+                    service_input['kwargs'],
+                    current_timestamp,
+                    current_broadcast_message
+                )
 
-            episode_sample = self.trial_sample.sample(**sample_config['episode_config'])
-            self.log.debug('Got new Episode: <{}>'.format(episode_sample.filename))
+            self.trial_sample = episode_data['trial_sample']
+            self.trial_stat = episode_data['trial_stat']
+            self.dataset_stat = episode_data['dataset_stat']
+            episode_sample = episode_data['episode_sample']
 
             # Get episode data statistic and pass it to strategy params:
             cerebro.strats[0][0][2]['trial_stat'] = self.trial_stat
             cerebro.strats[0][0][2]['trial_metadata'] = self.trial_sample.metadata
             cerebro.strats[0][0][2]['dataset_stat'] = self.dataset_stat
-            cerebro.strats[0][0][2]['episode_stat'] = episode_sample.describe()
+            cerebro.strats[0][0][2]['episode_stat'] = episode_data['episode_stat']
             cerebro.strats[0][0][2]['metadata'] = episode_sample.metadata
 
-            cerebro.strats[0][0][2]['broadcast_message'] = current_broadcast_message
+            cerebro.strats[0][0][2]['broadcast_message'] = episode_data['broadcast_message']
 
             # Set nice broker cash plotting:
             cerebro.broker.set_shortcash(False)
 
-            # Convert and add data to engine:
-            feed = episode_sample.to_btfeed()
+            # Add converted data to engine:
+            feed = episode_data['feed']
             if isinstance(feed, dict):
                 for key, stream in feed.items():
                     cerebro.adddata(stream, name=key)
@@ -709,16 +1159,32 @@ class BTgymServer(multiprocessing.Process):
             else:
                 cerebro.adddata(feed, name='base_asset')
 
+            # Prepare next episode data while this one runs, assuming same reset kwargs:
+            if self.prefetch_episodes:
+                prefetch = self.start_prefetch(
+                    service_input['kwargs'],
+                    current_timestamp,
+                    current_broadcast_message
+                )
+
             # Finally:
             episode = cerebro.run(stdstats=True, preload=False, oldbuysell=True)[0]
 
             self.log.debug('Episode run finished.')
 
-            # Update episode rendering:
-            _ = self.render.render('just_render', cerebro=cerebro)
-            _ = None
+            # Update episode rendering, fast engine has nothing to plot:
+            if not is_fast_engine:
+                _ = self.render.render('just_render', cerebro=cerebro)
+                _ = None
+
+            # Make sure data_server got latest global time before next episode gets sampled:
+            last_broadcast = episode.analyzers.getbyname('_env_analyzer').last_broadcast
+            if last_broadcast is not None:
+                data_server_response = self._comm_with_timeout(socket=self.data_socket, message=last_broadcast)
+                self.log.debug('DATA_COMM/broadcast received: {}'.format(data_server_response['message']))
 
             # Recover that bloody analytics:
+            reset_latency = episode.analyzers.getbyname('_env_analyzer').reset_latency or 0
             analyzers_list = episode.analyzers.getnames()
             analyzers_list.remove('_env_analyzer')
 
@@ -727,12 +1193,17 @@ class BTgymServer(multiprocessing.Process):
 
             episode_result['episode'] = episode_number
             episode_result['runtime'] = elapsed_time
-            episode_result['length'] = len(episode.data.close)
+            episode_result['reset_latency'] = timedelta(seconds=reset_latency)
+            episode_result['length'] = len(episode.data)
 
             for name in analyzers_list:
                 episode_result[name] = episode.analyzers.getbyname(name).get_analysis()
 
-            gc.collect()
+            if cerebro._step_profile is not None:
+                episode_result['step_latency'] = cerebro._step_profile.get_stat()
+
+            # No forced full garbage collection here: it costs tens of ms per episode scanning entire heap
+            # while finding few hundreds of cyclic objects, which generational collector would get anyway.
 
         # Just in case -- we actually shouldn't get there except by some error:
         return None
@@ -24,7 +24,7 @@ from collections import OrderedDict
 from itertools import product
 from math import log2, ceil
 
-from numpy import asarray, squeeze, zeros
+from numpy import arange, asarray, iinfo, squeeze, zeros
 
 
 class DictSpace(spaces.Dict):
@@ -71,12 +71,13 @@ class ActionDictSpace(DictSpace):
             self.base_space = spaces.Discrete
             self.is_discrete = True
             self.tensor_shape = (len(self.assets), len(self.base_actions))
-            self.lookup_table = self._make_lookup_table(
-                base_actions=list(self.base_actions_lookup_table.keys()),
-                num_assets=len(self.assets)
-            )
+            # Env. actions are numbers in positional system with base N = number of base actions,
+            # K = number of assets digits, first asset being most significant one; that is same
+            # ordering `itertools.product` gives, so no lookup table is needed to encode/decode:
+            self.cardinality = self.tensor_shape[-1] ** self.tensor_shape[0]
+            self.place_values = tuple(self.tensor_shape[-1] ** k for k in reversed(range(self.tensor_shape[0])))
+            self._lookup_table = None
             # Infer binary code length (depth):
-            self.cardinality = len(list(self.lookup_table.keys()))
             self.encoded_depth = ceil(log2(self.cardinality))
             self.one_hot_depth = self.cardinality
             spaces_dict = {key: spaces.Discrete(self.tensor_shape[-1]) for key in self.assets}
@@ -94,8 +95,8 @@ class ActionDictSpace(DictSpace):
             self.base_space = spaces.Box
             self.is_discrete = False
             self.tensor_shape = (len(self.assets), 1)
-            self.lookup_table = None
             self.cardinality = None  # ~inf.
+            self.place_values = None
             self.encoded_depth = self.tensor_shape[0]
             self.one_hot_depth = self.tensor_shape[0]
             spaces_dict = {
@@ -185,6 +186,23 @@ class ActionDictSpace(DictSpace):
             one_hot[self._vec_to_cat(vec)] = 1
             return squeeze(one_hot)
 
+    @property
+    def lookup_table(self):
+        """
+        Full table of environment actions as dictionary {category: vector}.
+        Not used by encoding methods and made on first access only, as it holds N**K entries for K assets
+        and N base actions; None for continuous space.
+        """
+        if self.cardinality is None:
+            return None
+
+        if self._lookup_table is None:
+            self._lookup_table = self._make_lookup_table(
+                base_actions=list(self.base_actions_lookup_table.keys()),
+                num_assets=len(self.assets)
+            )
+        return self._lookup_table
+
     @staticmethod
     def _make_lookup_table(base_actions, num_assets):
         """
@@ -285,14 +303,15 @@ class ActionDictSpace(DictSpace):
             int, position in lookup table
 
         Raises:
-            ValueError, if no matches found
+            ValueError, if action vector does not match action space
         """
-        assert self.lookup_table is not None, 'Lookup table not defined for base {}'.format(self.base_space)
+        assert self.cardinality is not None, 'Categorical encoding not defined for base {}'.format(self.base_space)
+
+        digits = [int(digit) for digit in action]
+        if len(digits) != len(self.place_values) or not all(0 <= digit < self.tensor_shape[-1] for digit in digits):
+            raise ValueError('Action vector {} is not in lookup table of this space.'.format(action))
 
-        for key, value in self.lookup_table.items():
-            if list(value) == list(action):
-                return key
-        raise ValueError('Action vector {} is not in lookup table of this space.'.format(action))
+        return sum(digit * place for digit, place in zip(digits, self.place_values))
 
     def _cat_to_vec(self, category):
         """
@@ -301,22 +320,88 @@ class ActionDictSpace(DictSpace):
 
         Args:
             category:   int, encoding
-            table:      lookup table
 
         Returns:
             environment action as numpy array of base asset actions
 
         Raises:
-            ValueError, if no matches found
+            ValueError, if category does not match action space
 
         """
-        assert self.lookup_table is not None, 'Lookup table not defined for base {}'.format(self.base_space)
-        try:
-            return asarray(self.lookup_table[category])
+        assert self.cardinality is not None, 'Categorical encoding not defined for base {}'.format(self.base_space)
 
-        except KeyError:
+        category = int(category)
+        if not 0 <= category < self.cardinality:
             raise ValueError('Category {} does not match action space.'.format(category))
 
+        return asarray([category // place % self.tensor_shape[-1] for place in self.place_values])
+
+    def _batch_place_values(self):
+        assert self.cardinality is not None, 'Categorical encoding not defined for base {}'.format(self.base_space)
+        assert self.cardinality <= iinfo('int64').max, \
+            'Batch encoding: {} categories do not fit int64'.format(self.cardinality)
+
+        return asarray(self.place_values, dtype='int64')
+
+    def _vec_to_cat_batch(self, actions):
+        """
+        Vectorized version of _vec_to_cat().
+
+        Args:
+            actions:    array-like of env. action vectors of shape [..., num_assets]
+
+        Returns:
+            int64 array of categories of shape [...]
+
+        Raises:
+            ValueError, if any of action vectors does not match action space
+        """
+        place_values = self._batch_place_values()
+        actions = asarray(actions, dtype='int64')
+        if actions.shape[-1:] != place_values.shape or actions.min(initial=0) < 0 or \
+                actions.max(initial=0) >= self.tensor_shape[-1]:
+            raise ValueError('Action vectors of shape {} do not match action space.'.format(actions.shape))
+
+        return actions @ place_values
+
+    def _cat_to_vec_batch(self, categories):
+        """
+        Vectorized version of _cat_to_vec().
+
+        Args:
+            categories: array-like of ints of shape [...]
+
+        Returns:
+            int64 array of env. action vectors of shape [..., num_assets]
+
+        Raises:
+            ValueError, if any of categories does not match action space
+        """
+        place_values = self._batch_place_values()
+        categories = asarray(categories, dtype='int64')
+        if categories.min(initial=0) < 0 or categories.max(initial=0) >= self.cardinality:
+            raise ValueError('Categories do not match action space.')
+
+        return categories[..., None] // place_values % self.tensor_shape[-1]
+
+    def _vec_to_one_hot_batch(self, actions):
+        """
+        Vectorized version of _vec_to_one_hot().
+
+        Args:
+            actions:    array-like of env. action vectors of shape [batch_size, num_assets]
+
+        Returns:
+            array of one-hot encodings of shape [batch_size, one_hot_depth]
+        """
+        if self.cardinality is None:
+            return asarray(actions)
+
+        categories = self._vec_to_cat_batch(actions)
+        one_hot = zeros((categories.shape[0], self.one_hot_depth))
+        one_hot[arange(categories.shape[0]), categories] = 1
+        return one_hot
+
 
 class __DictSpace(Space):
     """
@@ -24,9 +24,10 @@ from gym import spaces
 from btgym import DictSpace
 
 import numpy as np
-from collections import deque
 
-from btgym.strategy.utils import norm_value, decayed_result, exp_scale
+from btgym.strategy.utils import norm_value, decayed_result, exp_scale, BrokerStat, make_state_buffers,\
+    AllocationGuard
+from btgym.strategy.features import EpisodeFeatures
 
 
 ############################## Base BTgymStrategy Class ###################
@@ -66,6 +67,15 @@ class BTgymBaseStrategy(bt.Strategy):
     # Possible agent actions;  Note: place 'hold' first! :
     portfolio_actions = ('hold', 'buy', 'sell', 'close')
 
+    # Features computed over whole episode at once, list of specs, see btgym.strategy.features.EpisodeFeatures;
+    # can be set by .set_datalines() as well:
+    precomputed_features = ()
+
+    # If True - get_state() asserts observation composition makes no per-step allocations (see AllocationGuard),
+    # debugging only, as memory tracing makes environment way slower:
+    debug_allocations = False
+    allocation_limit = 1024  # bytes allowed to be allocated per get_state() call in debug mode
+
     params = dict(
         # Observation state shape is dictionary of Gym spaces,
         # at least should contain `raw_state` field.
@@ -262,12 +272,8 @@ class BTgymBaseStrategy(bt.Strategy):
         self.realized_broker_value = self.env.broker.startingcash
         self.episode_result = 0  # not used
 
-        # Service sma to get correct first features values:
-        self.data.dim_sma = btind.SimpleMovingAverage(
-            self.datas[0],
-            period=self.time_dim
-        )
-        self.data.dim_sma.plotinfo.plot = False
+        # Make engine call next() once there is enough data to compose first state:
+        self._set_minperiod()
 
         # self.log.warning('self.p.dir: {}'.format(dir(self.params)))
 
@@ -318,10 +324,17 @@ class BTgymBaseStrategy(bt.Strategy):
 
         # Broker and account related sliding statistics accumulators, globally normalized last `avg_perod` values,
         # so it's a bit more comp. efficient than use of bt.Observers:
-        self.broker_stat = {key: deque(maxlen=self.avg_period) for key in self.broker_datalines}
+        self.broker_stat = BrokerStat(self.broker_datalines, self.avg_period)
 
         # Add custom data Lines if any (convenience wrapper):
         self.set_datalines()
+
+        # Declared features are computed for entire episode here, see .get_features_window():
+        if len(self.precomputed_features) > 0:
+            self.episode_features = EpisodeFeatures(self.precomputed_features, self.datas)
+
+        else:
+            self.episode_features = None
         self.log.debug('Kwargs:\n{}\n'.format(str(kwargs)))
 
         # Define collection dictionary looking for methods for estimating observation state, one method for one mode,
@@ -334,6 +347,19 @@ class BTgymBaseStrategy(bt.Strategy):
             except AttributeError:
                 raise NotImplementedError('Callable get_{}_state.() not found'.format(key))
 
+        # Observation arrays reused every step, state methods fill those in place when possible:
+        self.state_buffers = make_state_buffers(self.p.state_shape)
+        self.state = {key: None for key in self.collection_get_state_methods.keys()}
+
+        if self.debug_allocations:
+            self.allocation_guard = AllocationGuard(
+                self.allocation_limit,
+                name='{}.get_state()'.format(type(self).__name__)
+            )
+
+        else:
+            self.allocation_guard = None
+
         for data in self.datas:
             self.log.debug('data_name: {}'.format(data._name))
 
@@ -366,6 +392,17 @@ class BTgymBaseStrategy(bt.Strategy):
             # Do not repeat action for discrete:
             self.num_action_repeats = 0 
 
+    def _set_minperiod(self):
+        """
+        Adds service indicator delaying first next() call until `time_dim` bars are loaded.
+        """
+        # Service sma to get correct first features values:
+        self.data.dim_sma = btind.SimpleMovingAverage(
+            self.datas[0],
+            period=self.time_dim
+        )
+        self.data.dim_sma.plotinfo.plot = False
+
     def prenext(self):
         self.update_broker_stat()
 
@@ -409,7 +446,7 @@ class BTgymBaseStrategy(bt.Strategy):
 
     def update_broker_stat(self):
         """
-        Updates all sliding broker statistics deques with latest-step values such as:
+        Updates all sliding broker statistics with latest-step values such as:
             - normalized broker value
             - normalized broker cash
             - normalized exposure (position size)
@@ -419,8 +456,9 @@ class BTgymBaseStrategy(bt.Strategy):
         """
         current_value = self.env.broker.get_value()
 
-        for key, method in self.collection_get_broker_stat_methods.items():
-            self.broker_stat[key].append(method(current_value=current_value))
+        self.broker_stat.append(
+            [method(current_value=current_value) for method in self.collection_get_broker_stat_methods.values()]
+        )
 
         # Reset one-time flags:
         self.trade_just_closed = False
@@ -580,6 +618,22 @@ class BTgymBaseStrategy(bt.Strategy):
         """
         pass
 
+    def get_features_window(self, size=None):
+        """
+        Returns precomputed features values for last `size` bars up to current one.
+
+        Args:
+            size:   int, number of bars, default is `time_dim`.
+
+        Returns:
+            view of episode features array of shape [size, num_features], features ordered as declared
+            by `precomputed_features`.
+        """
+        if size is None:
+            size = self.time_dim
+
+        return self.episode_features.window(len(self.data) - 1, size)
+
     def get_raw_state(self):
         """
         Default state observation composer.
@@ -591,8 +645,24 @@ class BTgymBaseStrategy(bt.Strategy):
 
         Note:
             `self.raw_state` is used to render environment `human` mode and should not be modified.
+            If data feed holds episode columns (BTgymArrayData), window is copied to preallocated `raw` state buffer,
+            which is overwritten next step.
 
         """
+        raw_state = self.state_buffers.get('raw')
+        columns = getattr(self.data, 'columns', None)
+        end = len(self.data)
+        if raw_state is not None and columns is not None and raw_state.shape == (self.time_dim, 4)\
+                and self.time_dim <= end:
+            start = end - self.time_dim
+            np.copyto(raw_state[:, 0], columns['open'][start: end])
+            np.copyto(raw_state[:, 1], columns['high'][start: end])
+            np.copyto(raw_state[:, 2], columns['low'][start: end])
+            np.copyto(raw_state[:, 3], columns['close'][start: end])
+            self.raw_state = raw_state
+
+            return self.raw_state
+
         self.raw_state = np.row_stack(
             (
                 np.frombuffer(self.data.open.get(size=self.time_dim)),
@@ -610,14 +680,17 @@ class BTgymBaseStrategy(bt.Strategy):
         Generally, this method should not be modified, implement corresponding get_broker_[mode]() methods.
 
         """
-        x_broker = np.concatenate(
-            [np.asarray(stat)[..., None] for stat in self.broker_stat.values()],
-            axis=-1
-        )
-        return x_broker[:, None, :]
+        window = self.broker_stat.array
+        internal_state = self.state_buffers.get('internal')
+        if internal_state is not None and internal_state.shape == (window.shape[0], 1, window.shape[1]):
+            np.copyto(internal_state[:, 0, :], window)
+            return internal_state
+
+        # Copy ordered [time, stat] window; buffer gets overwritten by next update:
+        return window[:, None, :].copy()
 
     def get_metadata_state(self):
-        self.metadata['timestamp'] = np.asarray(self._get_timestamp())
+        self.metadata['timestamp'][...] = self._get_timestamp()
 
         return self.metadata
 
@@ -665,8 +738,14 @@ class BTgymBaseStrategy(bt.Strategy):
         # Update inner state statistic and compose state: <- moved to .next()
         # self.update_broker_stat()
 
-        self.state = {key: method() for key, method in self.collection_get_state_methods.items()}
-        # Above line is generalisation of, say:
+        if self.allocation_guard is not None:
+            with self.allocation_guard:
+                self._update_state()
+
+        else:
+            self._update_state()
+
+        # Above is generalisation of, say:
         # self.state = {
         #     'external': self.get_external_state(),
         #     'internal': self.get_internal_state(),
@@ -675,6 +754,13 @@ class BTgymBaseStrategy(bt.Strategy):
         # }
         return self.state
 
+    def _update_state(self):
+        """
+        Updates `state` dictionary in place with values returned by get_[mode]_state() methods.
+        """
+        for key, method in self.collection_get_state_methods.items():
+            self.state[key] = method()
+
     def get_reward(self):
         """
         Shapes reward function as normalized single trade realized profit/loss,
@@ -696,7 +782,7 @@ class BTgymBaseStrategy(bt.Strategy):
         # Potential-based shaping function 1:
         # based on potential of averaged profit/loss for current opened trade (unrealized p/l):
         unrealised_pnl = np.asarray(self.broker_stat['unrealized_pnl'])
-        current_pos_duration = self.broker_stat['pos_duration'][-1]
+        current_pos_duration = int(self.broker_stat['pos_duration'][-1])
 
         # We want to estimate potential `fi = gamma*fi_prime - fi` of current opened position,
         # thus need to consider different cases given skip_fame parameter:
@@ -0,0 +1,169 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from scipy.signal import lfilter
+
+
+def rolling_windows(x, period):
+    """
+    Returns:
+        read-only strided view of 1d array `x` of shape [len(x) - period + 1, period], i-th row holding
+        `period` values ending at x[i + period - 1].
+    """
+    x = np.ascontiguousarray(x)
+    num_windows = max(x.shape[0] - period + 1, 0)
+    return as_strided(x, shape=(num_windows, period), strides=(x.strides[0], x.strides[0]), writeable=False)
+
+
+def _pad(values, period, size):
+    """
+    Prepends NaNs for first `period - 1` bars, where indicator is not defined yet.
+    """
+    out = np.full(size, np.nan)
+    out[period - 1:] = values[:max(size - period + 1, 0)]
+    return out
+
+
+def sma(x, period):
+    """
+    Simple moving average, same as backtrader.indicators.SimpleMovingAverage.
+    """
+    # Sums of values centered around first one keep precision for slowly varying prices:
+    shift = x[0] if x.shape[0] > 0 else 0.0
+    cumsum = np.concatenate([[0.0], np.cumsum(x - shift)])
+    return _pad((cumsum[period:] - cumsum[:-period]) / period + shift, period, x.shape[0])
+
+
+def ema(x, period):
+    """
+    Exponential moving average, same as backtrader.indicators.ExponentialMovingAverage:
+    seeded with simple average of first `period` values, smoothing factor is 2 / (1 + period).
+    """
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] < period:
+        return out
+
+    alpha = 2.0 / (1 + period)
+    seed = x[:period].mean()
+    out[period - 1] = seed
+    out[period:] = lfilter([alpha], [1, alpha - 1], x[period:], zi=[(1 - alpha) * seed])[0]
+    return out
+
+
+def std(x, period):
+    """
+    Moving population standard deviation, same as backtrader.indicators.StandardDeviation up to rounding:
+    latter computes it as sqrt(E[x^2] - E[x]^2), which loses about sqrt(eps) * |x| to cancellation.
+    """
+    return _pad(rolling_windows(x, period).std(axis=-1), period, x.shape[0])
+
+
+def rolling_max(x, period):
+    """
+    Moving maximum, same as backtrader.indicators.Highest.
+    """
+    return _pad(rolling_windows(x, period).max(axis=-1), period, x.shape[0])
+
+
+def rolling_min(x, period):
+    """
+    Moving minimum, same as backtrader.indicators.Lowest.
+    """
+    return _pad(rolling_windows(x, period).min(axis=-1), period, x.shape[0])
+
+
+def diff(x, period):
+    """
+    Difference with value `period` bars ago.
+    """
+    out = np.full(x.shape[0], np.nan)
+    out[period:] = x[period:] - x[:-period]
+    return out
+
+
+FEATURES = dict(
+    sma=sma,
+    ema=ema,
+    std=std,
+    max=rolling_max,
+    min=rolling_min,
+    diff=diff,
+)
+
+
+class EpisodeFeatures:
+    """
+    Features computed over whole episode data at once, instead of bar by bar by backtrader indicators.
+    Strategy declares features as list of specs, one per features bank::
+
+        dict(
+            kind='sma',                 # one of: sma, ema, std, max, min, diff;
+            periods=[8, 16, 32],        # one feature per period;
+            line='close',               # [opt] data line to compute features from, default `close`;
+            data=None,                  # [opt] data feed name, default is strategy first data feed;
+        )
+
+    Features values are stored in single array of shape [episode_bars, num_features], ordered as declared;
+    values are NaN while there is not enough bars to compute feature yet.
+    """
+
+    def __init__(self, specs, datas):
+        """
+        Args:
+            specs:  iterable of features specs, see above;
+            datas:  list of strategy data feeds, instances of btgym.datafeed.feed.BTgymArrayData.
+        """
+        feeds = {data._name: data for data in datas}
+        columns = []
+        self.names = []
+        for spec in specs:
+            try:
+                function = FEATURES[spec['kind']]
+
+            except KeyError:
+                raise ValueError(
+                    'Unknown feature kind: {}, expected one of: {}'.format(spec.get('kind'), list(FEATURES.keys()))
+                )
+
+            line = spec.get('line', 'close')
+            feed = datas[0] if spec.get('data') is None else feeds[spec['data']]
+            try:
+                x = feed.datetimes if line == 'datetime' else feed.columns[line]
+
+            except AttributeError:
+                raise TypeError('Expected BTgymArrayData feed, got: {}'.format(type(feed)))
+
+            except KeyError:
+                raise ValueError('Data feed <{}> has no line <{}>'.format(feed._name, line))
+
+            for period in spec['periods']:
+                columns.append(function(x, int(period)))
+                self.names.append('{}_{}_{}'.format(spec['kind'], line, period))
+
+        self.values = np.stack(columns, axis=-1) if columns else np.zeros((len(datas[0].datetimes), 0))
+
+    def window(self, position, size):
+        """
+        Returns:
+            view of features values of `size` bars ending at `position` bar (inclusive), same as
+            indicator.get(size=size) for every feature when strategy is at `position` bar.
+        """
+        return self.values[max(position - size + 1, 0): position + 1]
@@ -0,0 +1,112 @@
+import functools
+import types
+import unittest
+
+import numpy as np
+from gym import spaces
+
+from .base import BTgymBaseStrategy
+from .utils import BrokerStat, AllocationGuard, make_state_buffers
+
+
+class Feed:
+    """
+    Stands for BTgymArrayData feed at given bar.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.position = 0
+
+    def __len__(self):
+        return self.position
+
+
+class StateCompositionTest(unittest.TestCase):
+
+    time_dim = 256
+    avg_period = 64
+
+    def make_strategy(self, guard):
+        rng = np.random.RandomState(0)
+        columns = {name: rng.normal(size=2000) for name in ['open', 'high', 'low', 'close']}
+        datalines = ['cash', 'value', 'exposure']
+        strategy = types.SimpleNamespace(
+            data=Feed(columns),
+            time_dim=self.time_dim,
+            raw_state=None,
+            broker_stat=BrokerStat(datalines, self.avg_period),
+            metadata={'timestamp': np.asarray(0, dtype=np.float64)},
+            state_buffers=make_state_buffers(
+                dict(
+                    raw=spaces.Box(shape=(self.time_dim, 4), low=0, high=1, dtype=np.float32),
+                    internal=spaces.Box(shape=(self.avg_period, 1, len(datalines)), low=-1, high=1),
+                )
+            ),
+            allocation_guard=guard,
+        )
+        strategy._get_timestamp = lambda: float(strategy.data.position)
+        strategy._update_state = functools.partial(BTgymBaseStrategy._update_state, strategy)
+        strategy.collection_get_state_methods = {
+            key: functools.partial(getattr(BTgymBaseStrategy, 'get_{}_state'.format(key)), strategy)
+            for key in ['raw', 'internal', 'metadata']
+        }
+        strategy.state = {key: None for key in strategy.collection_get_state_methods.keys()}
+        return strategy
+
+    def test_state_filled_in_place(self):
+        guard = AllocationGuard(limit=BTgymBaseStrategy.allocation_limit)
+        strategy = self.make_strategy(guard)
+        # Broker statistics window is filled up by the time state gets composed:
+        for _ in range(self.avg_period):
+            strategy.broker_stat.append([0, 0, 0])
+        try:
+            for position in range(self.time_dim, 1000):
+                strategy.data.position = position
+                strategy.broker_stat.append([position, -position, 1])
+
+                state = BTgymBaseStrategy.get_state(strategy)
+                self.assertLessEqual(guard.allocated, guard.limit)
+                self.assertIs(state['raw'], strategy.state_buffers['raw'])
+                self.assertIs(state['internal'], strategy.state_buffers['internal'])
+                for i, name in enumerate(['open', 'high', 'low', 'close']):
+                    np.testing.assert_array_equal(
+                        state['raw'][:, i],
+                        strategy.data.columns[name][position - self.time_dim: position]
+                    )
+                self.assertEqual(state['internal'][-1, 0, 0], position)
+                self.assertEqual(state['metadata']['timestamp'], position)
+
+        finally:
+            guard.close()
+
+    def test_allocating_state_detected(self):
+        guard = AllocationGuard(limit=BTgymBaseStrategy.allocation_limit)
+        strategy = self.make_strategy(guard)
+        strategy.collection_get_state_methods['external'] = lambda: np.zeros([self.time_dim, 4])
+        strategy.data.position = self.time_dim
+        try:
+            with self.assertRaises(AssertionError):
+                BTgymBaseStrategy.get_state(strategy)
+
+        finally:
+            guard.close()
+
+
+class RewardTest(unittest.TestCase):
+
+    def test_reward_from_float_statistics(self):
+        strategy = types.SimpleNamespace(
+            broker_stat=BrokerStat(['unrealized_pnl', 'realized_pnl', 'pos_duration'], 16),
+            p=types.SimpleNamespace(skip_frame=4, gamma=1.0, reward_scale=1.0),
+        )
+        for duration in range(1, 11):
+            strategy.broker_stat.append([0.01 * duration, 0, duration])
+            # Position duration is kept as float, yet used to slice unrealized p/l window:
+            reward = BTgymBaseStrategy.get_reward(strategy)
+
+        np.testing.assert_allclose(reward, 10.0 * (0.085 - 0.045))
+
+
+if __name__ == '__main__':
+    unittest.main()
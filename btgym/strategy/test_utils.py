@@ -0,0 +1,97 @@
+import unittest
+from collections import deque
+
+import numpy as np
+from gym import spaces
+
+from btgym import DictSpace
+from .utils import BrokerStat, AllocationGuard, make_state_buffers
+
+
+class BrokerStatTest(unittest.TestCase):
+
+    keys = ('value', 'cash', 'unrealized_pnl')
+
+    def test_matches_deques(self):
+        rng = np.random.RandomState(0)
+        for size in [1, 3, 8]:
+            stat = BrokerStat(self.keys, size)
+            reference = {key: deque(maxlen=size) for key in self.keys}
+            self.assertEqual(stat.array.shape, (0, len(self.keys)))
+
+            for step in range(3 * size + 2):
+                values = rng.normal(size=len(self.keys))
+                stat.append(values if step % 2 else dict(zip(self.keys, values)))
+                for key, value in zip(self.keys, values):
+                    reference[key].append(value)
+
+                with self.subTest(size=size, step=step):
+                    for key in self.keys:
+                        np.testing.assert_array_equal(stat[key], np.asarray(reference[key]))
+                        self.assertEqual(stat[key][-1], reference[key][-1])
+
+                    expected = np.concatenate([np.asarray(v)[..., None] for v in reference.values()], axis=-1)
+                    np.testing.assert_array_equal(stat.array, expected)
+                    self.assertEqual([k for k, _ in stat.items()], list(self.keys))
+
+    def test_zero_filled(self):
+        stat = BrokerStat(self.keys, 4, zero_filled=True)
+        np.testing.assert_array_equal(stat['cash'], np.zeros(4))
+        stat.append([1, 2, 3])
+        stat.append([4, 5, 6])
+        np.testing.assert_array_equal(stat['cash'], [0, 0, 2, 5])
+        np.testing.assert_array_equal(stat.array[-1], [4, 5, 6])
+
+        stat.reset()
+        np.testing.assert_array_equal(stat.array, np.zeros([4, 3]))
+
+    def test_window_is_view(self):
+        stat = BrokerStat(self.keys, 5)
+        for i in range(12):
+            stat.append([i, i, i])
+            self.assertTrue(np.shares_memory(stat.array, stat.buffer))
+            self.assertIs(stat.array, stat.array)
+
+
+class StateBuffersTest(unittest.TestCase):
+
+    def test_buffers_follow_space(self):
+        buffers = make_state_buffers(
+            dict(
+                raw=spaces.Box(shape=(16, 4), low=0, high=1, dtype=np.float32),
+                metadata=DictSpace(
+                    {
+                        'type': spaces.Box(shape=(), low=0, high=1, dtype=np.uint32),
+                        'timestamp': spaces.Box(shape=(), low=0, high=10 ** 10, dtype=np.float64),
+                    }
+                ),
+            )
+        )
+        self.assertEqual(buffers['raw'].shape, (16, 4))
+        self.assertEqual(buffers['raw'].dtype, np.float64)
+        self.assertEqual(buffers['metadata']['type'].shape, ())
+        self.assertEqual(buffers['metadata']['type'].dtype, np.uint32)
+        self.assertEqual(buffers['metadata']['timestamp'].dtype, np.float64)
+
+    def test_allocation_guard(self):
+        source = np.random.RandomState(0).normal(size=[1000, 4])
+        buffer = np.zeros([256, 4])
+        guard = AllocationGuard(limit=1024)
+        try:
+            for end in range(256, 1000):
+                with guard:
+                    np.copyto(buffer, source[end - 256: end])
+
+            np.testing.assert_array_equal(buffer, source[1000 - 256 - 1: 1000 - 1])
+            self.assertLessEqual(guard.allocated, 1024)
+
+            with self.assertRaises(AssertionError):
+                with guard:
+                    buffer = source[-256:].copy()
+
+        finally:
+            guard.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
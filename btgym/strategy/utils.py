@@ -1,3 +1,5 @@
+import tracemalloc
+
 import  numpy as np
 
 
@@ -100,4 +102,188 @@ def discounted_average(x, gamma=1):
     while len(x.shape) < 2:
         x = x[..., None]
     gamma = gamma * np.ones(x.shape)
-    return np.squeeze(np.average(x, weights=(gamma ** np.arange(x.shape[0])[..., None])[::-1], axis=0))
\ No newline at end of file
+    return np.squeeze(np.average(x, weights=(gamma ** np.arange(x.shape[0])[..., None])[::-1], axis=0))
+
+
+class BrokerStat:
+    """
+    Sliding window of last `size` values of several named statistics, kept in single preallocated
+    float ring buffer. Replaces dictionary of `deque(maxlen=size)` accumulators: update writes one row in place
+    and ordered [oldest, ..., latest] window is a slice of buffer, not an array rebuilt from deque every step.
+
+    Every row is written twice, at `i` and `i + size` positions of [2 * size, n_stats] buffer, so last `size` rows
+    are always contiguous and ordered window of any length is a view.
+
+    Supports read-only subset of dictionary interface: `stat[key]` returns ordered window of single statistic,
+    `keys()`, `values()`, `items()`, `in` and iteration over keys work as for dictionary of deques.
+
+    Note:
+        windows returned are views of buffer, they get overwritten by subsequent updates;
+        copy if values should be kept across steps.
+    """
+
+    def __init__(self, keys, size, zero_filled=False):
+        """
+        Args:
+            keys:           iterable of statistics names, defines columns order;
+            size:           int, window length;
+            zero_filled:    bool, if True - window is of full `size` length from the start and filled with zeroes,
+                            as preallocated arrays are; otherwise window grows with every update until `size` is
+                            reached, as deque does.
+        """
+        self.keys_list = list(keys)
+        self.columns = {key: i for i, key in enumerate(self.keys_list)}
+        self.size = int(size)
+        self.zero_filled = zero_filled
+        self.buffer = np.zeros([2 * self.size, len(self.keys_list)], dtype=np.float64)
+        self.position = 0
+        self.length = self.size if zero_filled else 0
+        # Ordered window view, valid until next update:
+        self._array = None
+
+    def reset(self):
+        """
+        Clears all statistics.
+        """
+        self.buffer[:] = 0
+        self.position = 0
+        self.length = self.size if self.zero_filled else 0
+        self._array = None
+
+    def append(self, values):
+        """
+        Adds latest values of all statistics.
+
+        Args:
+            values:     sequence of floats in keys order or dictionary {key: value} holding all keys.
+        """
+        if isinstance(values, dict):
+            values = [values[key] for key in self.keys_list]
+
+        position = self.position
+        self.buffer[position] = values
+        self.buffer[position + self.size] = self.buffer[position]
+        self.position = position + 1 if position + 1 < self.size else 0
+        if self.length < self.size:
+            self.length += 1
+        self._array = None
+
+    @property
+    def array(self):
+        """
+        Returns:
+            [length, n_stats] view of ordered window, latest values last.
+        """
+        if self._array is None:
+            end = self.position + self.size
+            self._array = self.buffer[end - self.length: end]
+
+        return self._array
+
+    def __getitem__(self, key):
+        return self.array[:, self.columns[key]]
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __iter__(self):
+        return iter(self.keys_list)
+
+    def __len__(self):
+        return len(self.keys_list)
+
+    def keys(self):
+        return list(self.keys_list)
+
+    def values(self):
+        array = self.array
+        return [array[:, i] for i in range(len(self.keys_list))]
+
+    def items(self):
+        return list(zip(self.keys_list, self.values()))
+
+
+def make_state_buffers(state_shape):
+    """
+    Preallocates observation arrays to be filled in place by strategy get_[mode]_state() methods.
+
+    Args:
+        state_shape:    [nested] dictionary of gym spaces, e.g. strategy `state_shape` parameter.
+
+    Returns:
+        [nested] dictionary of zero-filled arrays shaped as corresponding spaces; floating point arrays are
+        float64 regardless of space dtype, as state methods compute them (casting to space dtype, if any,
+        is up to transport); None for spaces of undefined shape.
+    """
+    if hasattr(state_shape, 'spaces') and isinstance(state_shape.spaces, dict):
+        state_shape = state_shape.spaces
+
+    if isinstance(state_shape, dict):
+        return {key: make_state_buffers(space) for key, space in state_shape.items()}
+
+    shape = getattr(state_shape, 'shape', None)
+    dtype = getattr(state_shape, 'dtype', None)
+    if shape is None or dtype is None:
+        return None
+
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        dtype = np.dtype(np.float64)
+
+    return np.zeros(shape, dtype=dtype)
+
+
+class AllocationGuard:
+    """
+    Debug helper: context manager asserting that code section allocates no more than `limit` bytes,
+    as traced by `tracemalloc`. Peak memory is measured, so temporary arrays freed within the section count too.
+
+    Starts tracing on first use if it is not on already; tracing slows down execution notably
+    and is meant for debugging and tests only.
+    """
+
+    def __init__(self, limit=1024, name='code section'):
+        """
+        Args:
+            limit:  int, bytes allowed to be allocated within section, e.g. for few short-lived scalars and views;
+            name:   str, section name to report.
+        """
+        self.limit = limit
+        self.name = name
+        self.allocated = 0
+        self.started_tracing = False
+        self._start_size = 0
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+
+        self._start_size = tracemalloc.get_traced_memory()[0]
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        size, peak = tracemalloc.get_traced_memory()
+        if not hasattr(tracemalloc, 'reset_peak'):
+            # Peak is not resettable, can check only memory kept allocated:
+            peak = size
+
+        self.allocated = max(size, peak) - self._start_size
+        if exc_type is None and self.allocated > self.limit:
+            raise AssertionError(
+                '{} allocated {} bytes, expected at most {}.'.format(self.name, self.allocated, self.limit)
+            )
+
+        return False
+
+    def close(self):
+        """
+        Stops tracing if it has been started by this instance.
+        """
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
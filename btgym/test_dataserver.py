@@ -0,0 +1,102 @@
+import copy
+import os
+import socket
+import threading
+import unittest
+
+import zmq
+
+from btgym.dataserver import BTgymDataFeedServer
+from btgym.datafeed import BTgymDataset, DataSampleConfig
+
+
+filename = os.path.join(
+    os.path.dirname(__file__), '..', 'examples', 'data', 'test_sine_1min_period256_delta0002.csv'
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ConcurrentDataServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.address = 'tcp://127.0.0.1:{}'.format(free_port())
+        dataset = BTgymDataset(
+            filename=filename,
+            episode_duration={'days': 0, 'hours': 23, 'minutes': 55},
+            time_gap={'days': 0, 'hours': 6},
+            target_period={'days': 1, 'hours': 0, 'minutes': 0},
+        )
+        dataset.csv_cache_dir = None
+        self.server = BTgymDataFeedServer(dataset=dataset, network_address=self.address, num_workers=3)
+        self.server.start()
+        self.context = zmq.Context()
+
+    def tearDown(self):
+        self.request({'ctrl': '_stop'})
+        self.server.join(timeout=10)
+        self.context.destroy()
+
+    def request(self, message):
+        socket = self.context.socket(zmq.REQ)
+        socket.setsockopt(zmq.RCVTIMEO, 20000)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.connect(self.address)
+        try:
+            socket.send_pyobj(message)
+            return socket.recv_pyobj()
+
+        finally:
+            socket.close()
+
+    def test_concurrent_requests(self):
+        self.assertIn('Reset', self.request({'ctrl': '_reset_data', 'kwargs': {}})['ctrl'])
+
+        responses = []
+
+        def client():
+            for _ in range(5):
+                config = copy.deepcopy(DataSampleConfig)
+                responses.append(self.request({'ctrl': '_get_data', 'kwargs': config}))
+                responses.append(self.request({'ctrl': '_get_info'}))
+
+        clients = [threading.Thread(target=client) for _ in range(4)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+
+        samples = [response['sample'] for response in responses if 'sample' in response]
+        infos = [response for response in responses if 'dataset_is_ready' in response]
+        self.assertEqual(len(samples), 20)
+        self.assertEqual(len(infos), 20)
+        self.assertTrue(all(not sample.data.empty for sample in samples))
+        self.assertEqual(len({sample.metadata['sample_num'] for sample in samples}), 20)
+
+        # Global time updates are applied in order:
+        timestamp = samples[0].data.index[-1].timestamp()
+        self.request({'ctrl': '_set_broadcast_message', 'timestamp': timestamp, 'broadcast_message': 'first'})
+        self.request({'ctrl': '_set_broadcast_message', 'timestamp': timestamp + 60, 'broadcast_message': 'second'})
+        response = self.request({'ctrl': '_get_broadcast_message'})
+        self.assertEqual(response['timestamp'], timestamp + 60)
+        self.assertEqual(response['broadcast_message'], 'second')
+
+    def test_failed_request_gets_response(self):
+        self.request({'ctrl': '_reset_data', 'kwargs': {}})
+        config = copy.deepcopy(DataSampleConfig)
+        config['b_alpha'] = -1.0
+        response = self.request({'ctrl': '_get_data', 'kwargs': config})
+        self.assertNotIn('sample', response)
+        self.assertIn('Failed to serve <_get_data>', response['ctrl'])
+
+        # Server keeps serving:
+        response = self.request({'ctrl': '_get_data', 'kwargs': copy.deepcopy(DataSampleConfig)})
+        self.assertFalse(response['sample'].data.empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
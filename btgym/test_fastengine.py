@@ -0,0 +1,369 @@
+import collections
+import os
+import time
+import unittest
+
+import numpy as np
+import backtrader as bt
+from gym import spaces
+from logbook import Logger, WARNING
+
+from btgym.datafeed import BTgymDataset
+from btgym.strategy.base import BTgymBaseStrategy
+from btgym.fastengine import BTgymFastEngine, BTgymFastStrategy, BTgymFastBroker, BTgymFastOrder, _FastLine
+from btgym.server import _BTgymAnalyzer, _BTgymFastAnalyzer
+from btgym.rendering import BTgymNullRendering
+
+# Engine class, strategy class and communication analyzer for every engine compared:
+ENGINES = dict(
+    backtrader=(bt.Cerebro, BTgymBaseStrategy, _BTgymAnalyzer),
+    fast=(BTgymFastEngine, BTgymFastStrategy, _BTgymFastAnalyzer),
+)
+
+EpisodeRun = collections.namedtuple('EpisodeRun', ['responses', 'num_bars', 'run_time'])
+
+
+class ScriptedClient:
+    """
+    Environment side of server socket for running episodes without environment: serves actions from script,
+    requests episode termination when script is over and records responses. Stands for both socket and
+    wire codec of strategy/environment communication analyzer.
+    """
+
+    def __init__(self, actions):
+        """
+
+        Args:
+            actions:    iterable of actions, dictionaries of {asset_name: action_name}.
+        """
+        self.actions = iter(actions)
+        self.responses = []
+
+    def recv(self, socket):
+        try:
+            return {'action': dict(next(self.actions))}
+
+        except StopIteration:
+            return {'ctrl': '_done'}
+
+    def send_response(self, socket, response):
+        self.responses.append(response)
+
+    def send_pyobj(self, obj, flags=0):
+        pass
+
+
+def random_actions(num_steps, asset_name='default_asset', probs=(.7, .1, .1, .1), seed=0):
+    """
+    Returns:
+        list of `num_steps` actions for single asset, drawn from BTgymBaseStrategy portfolio actions
+        with given probabilities.
+    """
+    rng = np.random.RandomState(seed)
+    names = rng.choice(BTgymBaseStrategy.portfolio_actions, size=num_steps, p=probs)
+
+    return [{asset_name: str(name)} for name in names]
+
+
+def make_strategy_kwargs(episode, time_dim=BTgymBaseStrategy.time_dim, **kwargs):
+    """
+    Composes strategy parameters the way BTgymEnv and BTgymServer do, with `internal` observation
+    (broker statistics) added to default ones.
+
+    Args:
+        episode:    episode sample;
+        time_dim:   raw observation time embedding;
+        **kwargs:   any other strategy parameters.
+
+    Returns:
+        dictionary of strategy kwargs.
+    """
+    asset_name = episode.data_name
+    state_shape = dict(dict(BTgymBaseStrategy.params._gettuple())['state_shape'])
+    state_shape['raw'] = spaces.Box(low=0, high=10, shape=(time_dim, 4), dtype=np.float32)
+    state_shape['internal'] = spaces.Box(
+        low=-100,
+        high=100,
+        shape=(BTgymBaseStrategy.avg_period, 1, 10),
+        dtype=np.float32
+    )
+    strategy_kwargs = dict(
+        state_shape=state_shape,
+        asset_names=[asset_name],
+        metadata=episode.metadata,
+        initial_portfolio_action={asset_name: 'hold'},
+    )
+    strategy_kwargs.update(kwargs)
+
+    return strategy_kwargs
+
+
+def run_scripted_episode(
+        engine,
+        episode,
+        actions,
+        start_cash=100.0,
+        commission=0.001,
+        leverage=1.0,
+        stake=10,
+        log=None,
+        **kwargs
+):
+    """
+    Runs episode with given engine, setting it up the same way BTgymEnv and BTgymServer do.
+
+    Args:
+        engine:         str, key of ENGINES: `backtrader` or `fast`;
+        episode:        episode sample, see btgym.datafeed;
+        actions:        iterable of agent actions, episode gets terminated when it is over;
+        start_cash:     broker starting cash;
+        commission:     broker commission;
+        leverage:       broker leverage;
+        stake:          order size;
+        log:            logbook.Logger instance;
+        **kwargs:       strategy parameters, see make_strategy_kwargs().
+
+    Returns:
+        EpisodeRun tuple of environment responses list, number of bars run and engine run time in seconds.
+    """
+    engine_class, strategy_class, analyzer_class = ENGINES[engine]
+    cerebro = engine_class()
+    cerebro.addstrategy(strategy_class, **make_strategy_kwargs(episode, **kwargs))
+    cerebro.broker.setcash(start_cash)
+    cerebro.broker.setcommission(commission=commission, leverage=leverage)
+    cerebro.addsizer(bt.sizers.SizerFix, stake=stake)
+    cerebro.addanalyzer(analyzer_class, _name='_env_analyzer')
+    if isinstance(cerebro, bt.Cerebro):
+        cerebro.addobserver(bt.observers.DrawDown)
+
+    client = ScriptedClient(actions)
+    cerebro._socket = client
+    cerebro._wire_codec = client
+    cerebro._data_socket = None
+    cerebro._broadcast_socket = None
+    cerebro._log = log or Logger('EngineParity', level=WARNING)
+    cerebro._render = BTgymNullRendering()
+    cerebro._obs_ring = None
+    # Responses are kept, while strategy refills observation buffers every step:
+    cerebro._copy_state = True
+    cerebro._step_profile = None
+    cerebro._get_data = None
+    cerebro._get_info = None
+    cerebro._reset_time = time.time()
+
+    cerebro.broker.set_shortcash(False)
+    for key, stream in episode.to_btfeed().items():
+        cerebro.adddata(stream, name=key)
+
+    start = time.time()
+    strategy = cerebro.run(stdstats=True, preload=False, oldbuysell=True)[0]
+
+    return EpisodeRun(client.responses, len(strategy.data), time.time() - start)
+
+
+def _flatten(value, prefix):
+    if isinstance(value, dict):
+        fields = dict()
+        for key, item in value.items():
+            fields.update(_flatten(item, '{}/{}'.format(prefix, key)))
+
+        return fields
+
+    return {prefix: value}
+
+
+def _response_fields(response):
+    state, reward, done, info = response
+    fields = _flatten(state, 'state')
+    fields.update(_flatten(info[-1], 'info'))
+    fields['reward'] = reward
+    fields['done'] = done
+
+    return fields
+
+
+def compare_responses(responses, other_responses):
+    """
+    Compares two sequences of <o, r, d, i> environment responses step by step.
+
+    Returns:
+        dictionary of discrepancies: `num_steps` - difference in number of responses; largest absolute
+        difference for every numeric field (observation arrays, reward, numeric info values); number of steps
+        field values differ at for non-numeric fields (e.g. broker message, time, action).
+    """
+    report = {'num_steps': abs(len(responses) - len(other_responses))}
+    for response, other_response in zip(responses, other_responses):
+        fields = _response_fields(response)
+        other_fields = _response_fields(other_response)
+        for key in set(fields.keys()) | set(other_fields.keys()):
+            if key not in fields or key not in other_fields:
+                report[key] = report.get(key, 0) + 1
+                continue
+
+            value = fields[key]
+            other_value = other_fields[key]
+            try:
+                diff = np.asarray(value, dtype=np.float64) - np.asarray(other_value, dtype=np.float64)
+                report[key] = max(report.get(key, 0.0), float(np.max(np.abs(diff), initial=0.0)))
+
+            except (TypeError, ValueError):
+                report[key] = report.get(key, 0) + int(not np.array_equal(value, other_value))
+
+    return report
+
+
+filename = os.path.join(os.path.dirname(__file__), '..', 'examples', 'data', 'DAT_ASCII_EURUSD_M1_201701.csv')
+
+
+class FeedStub:
+
+    def __init__(self, price):
+        self.close = [price]
+
+
+class FastBrokerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.broker = BTgymFastBroker()
+        self.broker.setcash(100.0)
+        self.broker.setcommission(commission=0.001)
+        self.broker.set_shortcash(False)
+        self.data = FeedStub(1.0)
+
+    def statuses(self):
+        notifs, self.broker.notifs = self.broker.notifs, []
+        return [order.getstatusname() for order in notifs]
+
+    def test_round_trip(self):
+        self.broker.buy(None, self.data, 10)
+        self.broker.next(1.1, 1.2)
+        self.assertEqual(self.statuses(), ['Submitted', 'Accepted', 'Completed'])
+        self.assertEqual(self.broker.position.size, 10)
+        self.assertAlmostEqual(self.broker.getcash(), 100.0 - 11.0 - 0.011)
+        self.assertAlmostEqual(self.broker.getvalue(), 100.0 - 0.011 + 1.0)
+
+        self.broker.sell(None, self.data, 10)
+        self.broker.next(1.3, 1.4)
+        self.assertEqual(self.statuses(), ['Submitted', 'Accepted', 'Completed'])
+        self.assertEqual(self.broker.position.size, 0)
+        self.assertAlmostEqual(self.broker.getcash(), 100.0 - 0.011 + 2.0 - 0.013)
+        self.assertEqual(self.broker.getvalue(), self.broker.getcash())
+        self.assertEqual([execution[:3] for execution in self.broker.executions], [(0, 10, 1.1), (-10, 0, 1.3)])
+
+    def test_short_position_value(self):
+        self.broker.sell(None, self.data, 10)
+        self.broker.next(1.0, 0.9)
+        self.assertEqual(self.broker.position.size, -10)
+        # Short adds value as price goes down:
+        self.assertAlmostEqual(self.broker.getvalue(), 100.0 - 0.01 + 1.0)
+
+    def test_margin(self):
+        self.broker.buy(None, self.data, 60)
+        self.broker.buy(None, self.data, 60)
+        self.broker.next(1.0, 1.0)
+        self.assertEqual(self.statuses(), ['Submitted', 'Submitted', 'Accepted', 'Margin', 'Completed'])
+        self.assertEqual(self.broker.position.size, 60)
+
+        # Accepted order can not be opened at worse open price:
+        self.broker.set_checksubmit(False)
+        self.broker.buy(None, self.data, 39)
+        self.broker.next(1.1, 1.1)
+        self.assertEqual(self.statuses(), ['Accepted', 'Margin'])
+        self.assertEqual(self.broker.position.size, 60)
+
+    def test_actual_leverage(self):
+        self.broker.setcommission(commission=0.0, leverage=10.0)
+        self.assertEqual(self.broker.get_leverage(), 1.0)
+        self.broker.buy(None, self.data, 100)
+        self.broker.next(1.0, 1.1)
+        # Position value over unlevered one, as BackBroker reports:
+        self.assertAlmostEqual(self.broker.get_leverage(), 110.0 / (100.0 / 10 + 10.0))
+
+        self.broker.sell(None, self.data, 100)
+        self.broker.next(1.1, 1.1)
+        self.assertEqual(self.broker.get_leverage(), 0.0)
+
+    def test_lines(self):
+        line = _FastLine()
+        with self.assertRaises(IndexError):
+            _ = line[0]
+
+        line.extend([1.0, 2.0, 3.0])
+        self.assertEqual(line[0], 3.0)
+        self.assertEqual(line[-2], 1.0)
+        self.assertEqual(BTgymFastOrder(1, None, -5, 1.0).getstatusname(), 'Created')
+
+
+class FastStrategyParamsTest(unittest.TestCase):
+
+    def test_params_extended_by_subclass(self):
+        class Strategy(BTgymFastStrategy):
+            params = dict(skip_frame=4, custom_param=1)
+
+        class SubStrategy(Strategy):
+            params = dict(custom_param=2)
+
+        params = dict(SubStrategy.params._gettuple())
+        self.assertEqual(params['custom_param'], 2)
+        self.assertEqual(params['skip_frame'], 4)
+        self.assertEqual(params['gamma'], dict(BTgymFastStrategy.params._gettuple())['gamma'])
+        self.assertNotIn('custom_param', dict(BTgymFastStrategy.params._gettuple()))
+
+
+class EngineParityTest(unittest.TestCase):
+    """
+    Runs same scripted episodes of bundled EURUSD data by backtrader and fast engines,
+    expects same environment responses.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        np.random.seed(0)
+        dataset = BTgymDataset(filename=filename)
+        dataset.csv_cache_dir = None
+        dataset.reset()
+        trial = dataset.sample(get_new=True, sample_type=0)
+        trial.reset()
+        cls.episode = trial.sample(get_new=True, sample_type=0)
+
+    def assert_parity(self, actions, **kwargs):
+        expected = run_scripted_episode('backtrader', self.episode, actions, **kwargs)
+        result = run_scripted_episode('fast', self.episode, actions, **kwargs)
+
+        self.assertGreater(len(expected.responses), 10)
+        self.assertEqual(result.num_bars, expected.num_bars)
+        for key, value in compare_responses(expected.responses, result.responses).items():
+            self.assertLessEqual(value, 1e-9, msg='<{}> mismatch: {}'.format(key, value))
+
+        return [response[-1][-1]['broker_message'] for response in expected.responses]
+
+    def test_end_of_data(self):
+        messages = self.assert_parity(random_actions(10000, self.episode.data_name, seed=0))
+        self.assertTrue(any('SELL executed' in message for message in messages))
+        self.assertIn('END OF DATA', messages[-1])
+
+    def test_skip_frame(self):
+        self.assert_parity(random_actions(10000, self.episode.data_name, seed=1), skip_frame=5, time_dim=30)
+
+    def test_margin_calls(self):
+        messages = self.assert_parity(
+            random_actions(500, self.episode.data_name, probs=(.4, .3, .2, .1), seed=2),
+            stake=60,
+        )
+        self.assertTrue(any('Margin' in message for message in messages))
+
+    def test_leverage_and_stop_out(self):
+        messages = self.assert_parity(
+            random_actions(10000, self.episode.data_name, probs=(.4, .3, .3, .0), seed=3),
+            stake=500,
+            leverage=10.0,
+            drawdown_call=5.0,
+        )
+        self.assertIn('DRAWDOWN CALL', messages[-1])
+
+    def test_done_requested(self):
+        self.assert_parity(random_actions(100, self.episode.data_name, seed=4))
+
+
+if __name__ == '__main__':
+    unittest.main()
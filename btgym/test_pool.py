@@ -0,0 +1,111 @@
+import os
+import socket
+import unittest
+
+from btgym.pool import BTgymServerPool
+from btgym.envs.base import BTgymEnv
+
+
+filename = os.path.join(os.path.dirname(__file__), '..', 'examples', 'data', 'DAT_ASCII_EURUSD_M1_201701.csv')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class DummyServer:
+    """
+    Minimal server: reports readiness and returns at once or fails, as configured.
+    """
+    def __init__(self, ready_event=None, fail=False):
+        self.ready_event = ready_event
+        self.fail = fail
+        self.log_handler = None
+
+    def run(self):
+        if self.fail:
+            raise RuntimeError('Dummy server failure.')
+        self.ready_event.set()
+
+
+class BTgymServerPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = BTgymServerPool(num_workers=1, warmup_pyplot=False)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_worker_is_reused(self):
+        lease = self.pool.lease(DummyServer)
+        pid = lease.pid
+        lease.join(5)
+        self.assertTrue(lease.ready)
+        self.assertEqual(lease.exitcode, 0)
+        self.assertFalse(lease.is_alive())
+
+        lease = self.pool.lease(DummyServer)
+        self.assertEqual(lease.pid, pid)
+        lease.join(5)
+        self.assertEqual(len(self.pool.idle), 1)
+
+    def test_failed_worker_is_dropped(self):
+        lease = self.pool.lease(DummyServer, fail=True)
+        self.assertFalse(lease.wait_ready(5))
+        self.assertEqual(lease.exitcode, 1)
+        self.assertEqual(len(self.pool.idle), 0)
+
+        lease = self.pool.lease(DummyServer)
+        lease.join(5)
+        self.assertTrue(lease.ready)
+        self.assertEqual(len(self.pool.idle), 1)
+
+    def test_grows_when_busy(self):
+        first = self.pool.lease(DummyServer)
+        second = self.pool.lease(DummyServer)
+        self.assertNotEqual(first.pid, second.pid)
+        first.join(5)
+        second.join(5)
+        self.assertEqual(len(self.pool.idle), 2)
+
+
+class PooledEnvTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = BTgymServerPool(num_workers=2, warmup_pyplot=False)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def make_env(self):
+        return BTgymEnv(
+            filename=filename,
+            port=free_port(),
+            data_port=free_port(),
+            episode_duration={'days': 0, 'hours': 23, 'minutes': 55},
+            render_enabled=False,
+            server_pool=self.pool,
+        )
+
+    def test_closed_env_releases_workers(self):
+        env = self.make_env()
+        env.reset()
+        pids = {env.server.pid, env.data_server.pid}
+        env.close()
+        self.assertEqual(len(self.pool.busy), 0)
+        self.assertEqual(len(self.pool.idle), 2)
+
+        env = self.make_env()
+        try:
+            env.reset()
+            self.assertEqual({env.server.pid, env.data_server.pid}, pids)
+
+        finally:
+            env.close()
+        self.assertEqual(len(self.pool.busy), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+
+from btgym.profiling import StepLatencyProfile
+
+
+class StepLatencyProfileTest(unittest.TestCase):
+
+    def test_laps(self):
+        profile = StepLatencyProfile()
+        # No lap recorded before first mark:
+        profile.lap('engine')
+        self.assertEqual(profile.samples, {})
+
+        for _ in range(10):
+            profile.mark()
+            profile.lap('get_state')
+            profile.lap('send')
+
+        stat = profile.get_stat()
+        self.assertEqual(set(stat.keys()), {'get_state', 'send'})
+        self.assertEqual(stat['send']['count'], 10)
+        self.assertEqual(stat['send']['histogram'].sum(), 10)
+        self.assertEqual(len(stat['send']['histogram']), len(stat['send']['bin_edges']) - 1)
+        self.assertTrue(0 <= stat['send']['p50'] <= stat['send']['p99'] <= stat['send']['max'])
+        np.testing.assert_allclose(stat['send']['total'], stat['send']['mean'] * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
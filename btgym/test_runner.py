@@ -0,0 +1,225 @@
+import asyncio
+import contextlib
+import datetime
+import threading
+import unittest
+
+import numpy as np
+
+try:
+    import tensorflow
+
+except ImportError:
+    raise unittest.SkipTest('Runners require tensorflow.')
+
+from btgym.algorithms.runner.base import BaseEnvRunnerFn, EnvRunnerLogic
+from btgym.algorithms.runner.aio import AsyncEnvRunnerFn, AsyncRunner, AsyncRunnerLoop
+
+
+class DummyActionSpace:
+
+    @staticmethod
+    def encode(action):
+        return np.asarray([action], dtype=np.float32)
+
+
+class DummyEnv:
+    """
+    Deterministic environment: episodes of `episode_length` steps, reward equals step number.
+    """
+    render_modes = ['human', 'episode']
+    action_space = DummyActionSpace()
+
+    def __init__(self, episode_length=3):
+        self.episode_length = episode_length
+        self.step_num = 0
+        self.episode = 0
+        self.threads = {}
+
+    def state(self):
+        return {
+            'external': np.full((2, 1, 1), self.step_num, dtype=np.float32),
+            'metadata': {'type': 0, 'episode': self.episode},
+        }
+
+    @staticmethod
+    def get_initial_action():
+        return 0
+
+    def reset(self, **kwargs):
+        self.step_num = 0
+        self.episode += 1
+        return self.state()
+
+    def step(self, action):
+        self.step_num += 1
+        terminal = self.step_num >= self.episode_length
+        info = [{'broker_value': 100.0 + self.step_num, 'action': action}]
+        return self.state(), np.asarray(float(self.step_num)), terminal, info
+
+    async def areset(self, **kwargs):
+        return self.reset(**kwargs)
+
+    async def astep(self, action):
+        return self.step(action)
+
+    def get_stat(self):
+        self.threads['get_stat'] = threading.current_thread()
+        return {'runtime': datetime.timedelta(seconds=1), 'length': self.step_num}
+
+    def render(self, mode):
+        self.threads['render'] = threading.current_thread()
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+class DummyPolicy:
+    """
+    Stateless policy, always acts `1`.
+    """
+    callback = {}
+    inc_episode = 'inc_episode'
+
+    @staticmethod
+    def get_sample_config():
+        return {'mode': 'train'}
+
+    @staticmethod
+    def get_initial_features(state, context=None):
+        return np.zeros(1)
+
+    @staticmethod
+    def act(state, context, last_action, last_reward):
+        action = {'environment': 1, 'one_hot': np.asarray([0, 1]), 'encoded': np.asarray([1.0])}
+        return action, None, np.asarray([0.5]), context
+
+    @staticmethod
+    def get_value(state, context, last_action, last_reward):
+        return 0.5
+
+
+class DummySession:
+
+    def __init__(self):
+        self.episodes = 0
+
+    def run(self, fetches):
+        self.episodes += 1
+
+    @staticmethod
+    def as_default():
+        return contextlib.suppress()
+
+
+def runner_args(env, sess=None, rollout_length=5):
+    return [
+        sess or DummySession(),
+        env,
+        DummyPolicy(),
+        0,  # task
+        rollout_length,
+        None,  # summary_writer
+        1,  # episode_summary_freq
+        1,  # env_render_freq
+        False,  # atari_test
+        None,  # ep_summary
+        None,  # memory_config
+        None,  # log
+    ]
+
+
+def collect(rollouts):
+    return [
+        (data['on_policy']['reward'], data['on_policy']['terminal'], data['ep_summary'] is not None)
+        for data in rollouts
+    ]
+
+
+class EnvRunnerLogicTest(unittest.TestCase):
+
+    def test_requests(self):
+        env = DummyEnv(episode_length=3)
+        runner = EnvRunnerLogic(*runner_args(env))
+
+        self.assertEqual(next(runner), ('reset', {'mode': 'train'}))
+        request, value = runner.send(env.reset())
+        requests = []
+        while request != 'data':
+            requests.append(request)
+            if request == 'step':
+                self.assertEqual(value, 1)
+                request, value = runner.send(env.step(value))
+
+            elif request == 'get_stat':
+                self.assertIsNone(value)
+                request, value = runner.send(env.get_stat())
+
+            elif request == 'render':
+                self.assertEqual(value, env.render_modes)
+                request, value = runner.send({mode: env.render(mode)[None, :] for mode in value})
+
+            else:
+                self.assertEqual(value, {'mode': 'train'})
+                request, value = runner.send(env.reset(**value))
+
+        # Rollout is cut short by terminal step, followed by episode statistic, rendering and new episode:
+        self.assertEqual(requests, ['step', 'step', 'step', 'get_stat', 'render', 'reset'])
+        self.assertEqual(value['on_policy'].size, 3)
+        self.assertEqual(value['on_policy']['terminal'], [False, False, True])
+        self.assertEqual(value['ep_summary']['final_value'], 103.0)
+        self.assertEqual(value['ep_summary']['steps'], 3)
+        self.assertEqual(set(value['render_summary'].keys()), set(env.render_modes))
+        self.assertEqual(value['render_summary']['human'].shape, (1, 4, 4, 3))
+
+
+class AsyncRunnerTest(unittest.TestCase):
+
+    def test_same_rollouts_as_base_runner(self):
+        num_rollouts = 5
+        base_runner = BaseEnvRunnerFn(*runner_args(DummyEnv(episode_length=7)))
+        expected = collect([next(base_runner) for _ in range(num_rollouts)])
+
+        async def run():
+            runner = AsyncEnvRunnerFn(*runner_args(DummyEnv(episode_length=7)))
+            try:
+                return [await runner.__anext__() for _ in range(num_rollouts)]
+
+            finally:
+                await runner.aclose()
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(collect(loop.run_until_complete(run())), expected)
+
+        finally:
+            loop.close()
+
+    def test_rollouts_queued(self):
+        env = DummyEnv(episode_length=4)
+        runner = AsyncRunner(
+            env=env,
+            policy=DummyPolicy(),
+            task=0,
+            rollout_length=3,
+            episode_summary_freq=1,
+            env_render_freq=1,
+            test=False,
+            ep_summary=None,
+        )
+        sess = DummySession()
+        runner.start_runner(sess, None)
+        rollouts = [runner.queue.get(timeout=10) for _ in range(4)]
+        self.assertTrue(runner.is_alive())
+        runner.future.cancel()
+
+        # Episode of 4 steps is split into rollouts of 3 and 1:
+        self.assertEqual([data['on_policy'].size for data in rollouts], [3, 1, 3, 1])
+        self.assertGreaterEqual(sess.episodes, 2)
+
+        # Blocking calls are kept off event loop thread:
+        loop_thread = AsyncRunnerLoop.instance
+        self.assertIsNot(env.threads['get_stat'], loop_thread)
+        self.assertIsNot(env.threads['render'], loop_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
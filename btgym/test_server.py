@@ -0,0 +1,133 @@
+import os
+import unittest
+
+import numpy as np
+import backtrader as bt
+from logbook import Logger
+
+from btgym.datafeed import BTgymDataset
+from btgym.server import BTgymEngineFactory, BTgymServer
+
+
+filename = os.path.join(os.path.dirname(__file__), '..', 'examples', 'data', 'DAT_ASCII_EURUSD_M1_201701.csv')
+
+
+class DummyStrategy(bt.Strategy):
+    params = dict(
+        initial_action={'default_asset': 'hold'},
+        skip_frame=1,
+    )
+
+
+class DummyAnalyzer(bt.Analyzer):
+    pass
+
+
+class BTgymEngineFactoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.template = bt.Cerebro(stdstats=False)
+        self.template.addstrategy(DummyStrategy, skip_frame=10, initial_action={'default_asset': 'hold'})
+        self.template.broker.setcash(1000)
+        self.template.broker.setcommission(0.001)
+        self.template.addsizer(bt.sizers.SizerFix, stake=5)
+        self.template.addobserver(bt.observers.DrawDown)
+
+    def test_engine_matches_template(self):
+        factory = BTgymEngineFactory(
+            self.template,
+            observers=[bt.observers.DrawDown, bt.observers.Value],
+            analyzers=[(DummyAnalyzer, dict(_name='dummy'))],
+        )
+        cerebro = factory.make()
+
+        self.assertIsInstance(cerebro, bt.Cerebro)
+        self.assertFalse(cerebro.p.stdstats)
+        self.assertEqual(cerebro.strats[0][0][0], DummyStrategy)
+        self.assertEqual(cerebro.strats[0][0][2]['skip_frame'], 10)
+        self.assertEqual(cerebro.broker.getcash(), 1000)
+        self.assertIs(cerebro.broker.cerebro, cerebro)
+        self.assertEqual(cerebro.broker.comminfo[None].p.commission, 0.001)
+        self.assertEqual(cerebro.sizers, self.template.sizers)
+        self.assertEqual([observer[1] for observer in cerebro.observers], [bt.observers.DrawDown, bt.observers.Value])
+        self.assertEqual(cerebro.analyzers, [(DummyAnalyzer, (), dict(_name='dummy'))])
+
+    def test_engines_are_independent(self):
+        factory = BTgymEngineFactory(self.template)
+        first = factory.make()
+        first.strats[0][0][2]['trial_stat'] = 'episode specific'
+        first.strats[0][0][2]['initial_action']['_skip_this'] = True
+        first.broker.setcash(1)
+        first.addobserver(bt.observers.Value)
+
+        second = factory.make()
+        self.assertNotIn('trial_stat', second.strats[0][0][2])
+        self.assertNotIn('_skip_this', second.strats[0][0][2]['initial_action'])
+        self.assertEqual(second.broker.getcash(), 1000)
+        self.assertEqual(len(second.observers), 1)
+        self.assertNotIn('trial_stat', self.template.strats[0][0][2])
+
+
+class EpisodePrefetchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        np.random.seed(0)
+        cls.dataset = BTgymDataset(filename=filename)
+        cls.dataset.csv_cache_dir = None
+        cls.dataset.reset()
+
+    def setUp(self):
+        self.server = BTgymServer(prefetch_episodes=True)
+        self.server.log = Logger('test')
+        self.server.trial_sample = self.dataset.sample(get_new=True, sample_type=0)
+        self.server.trial_sample.reset()
+        self.server.trial_stat = self.server.trial_sample.describe()
+        self.server.dataset_stat = self.dataset.describe()
+        self.reset_kwargs = {'trial_config': {'get_new': False}, 'episode_config': {'sample_type': 0}}
+
+    def test_prefetched_episode_used_if_valid(self):
+        trial = self.server.trial_sample
+        sample_num = trial.sample_num
+        prefetch = self.server.start_prefetch(self.reset_kwargs, 100.0, None)
+        episode_data = self.server.get_prefetched_episode(prefetch, self.reset_kwargs, 100.0, None)
+
+        self.assertIsNotNone(episode_data)
+        self.assertEqual(episode_data['episode_sample'].metadata['sample_num'], sample_num)
+        # Sampled from trial copy, current trial is not advanced until prefetched episode is used:
+        self.assertIsNot(episode_data['trial_sample'], trial)
+        self.assertEqual(episode_data['trial_sample'].sample_num, sample_num + 1)
+        self.assertEqual(trial.sample_num, sample_num)
+
+    def test_discarded_prefetch_leaves_no_trace(self):
+        other_kwargs = {'trial_config': {'get_new': False}, 'episode_config': {'sample_type': 1}}
+        for args in [(other_kwargs, 100.0, None), (self.reset_kwargs, 160.0, None), (self.reset_kwargs, 100.0, 'msg')]:
+            with self.subTest(args=args):
+                sample_num = self.server.trial_sample.sample_num
+                prefetch = self.server.start_prefetch(self.reset_kwargs, 100.0, None)
+                self.assertIsNone(self.server.get_prefetched_episode(prefetch, *args))
+                self.assertEqual(self.server.trial_sample.sample_num, sample_num)
+
+                episode_data = self.server.prepare_episode(*args)
+                self.assertIs(episode_data['trial_sample'], self.server.trial_sample)
+                self.assertEqual(episode_data['episode_sample'].metadata['sample_num'], sample_num)
+                self.assertEqual(self.server.trial_sample.sample_num, sample_num + 1)
+
+    def test_new_trial_not_prefetched(self):
+        # Server is not connected to data_server: any request would fail.
+        for kwargs in [{}, {'trial_config': {'get_new': True}}]:
+            self.assertIsNone(self.server.start_prefetch(kwargs, 100.0, None))
+
+        self.server.trial_sample = None
+        self.assertIsNone(self.server.start_prefetch(self.reset_kwargs, 100.0, None))
+
+    def test_failure_reported(self):
+        bad_kwargs = {'trial_config': {'get_new': False}, 'episode_config': {'b_alpha': -1.0}}
+        prefetch = self.server.start_prefetch(bad_kwargs, 100.0, None)
+        prefetch['thread'].join()
+        self.assertIsInstance(prefetch['error'], AssertionError)
+        self.assertIsNone(self.server.get_prefetched_episode(prefetch, bad_kwargs, 100.0, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
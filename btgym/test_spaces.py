@@ -0,0 +1,70 @@
+import unittest
+from itertools import product
+
+import numpy as np
+
+from btgym.spaces import ActionDictSpace
+
+
+class ActionDictSpaceEncodingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.space = ActionDictSpace(assets=['c', 'a', 'b'], base_actions=['hold', 'buy', 'sell', 'close'])
+
+    def test_matches_cartesian_product(self):
+        reference = list(product(range(4), repeat=3))
+        self.assertEqual(self.space.cardinality, len(reference))
+        self.assertEqual(self.space.encoded_depth, 6)
+        for cat, vec in enumerate(reference):
+            self.assertEqual(self.space._vec_to_cat(vec), cat)
+            self.assertEqual(list(self.space._cat_to_vec(cat)), list(vec))
+
+        self.assertEqual(dict(enumerate(reference)), self.space.lookup_table)
+
+    def test_round_trips(self):
+        for cat in range(self.space.cardinality):
+            action = self.space._vec_to_action(self.space._cat_to_vec(cat))
+            self.assertEqual(self.space.decode(self.space.encode(action)), action)
+            self.assertEqual(np.argmax(self.space.one_hot_encode(action)), cat)
+
+    def test_out_of_space(self):
+        for vec in [(0, 0), (0, 0, 4), (0, -1, 0)]:
+            with self.assertRaises(ValueError):
+                self.space._vec_to_cat(vec)
+
+        for cat in [-1, self.space.cardinality]:
+            with self.assertRaises(ValueError):
+                self.space._cat_to_vec(cat)
+
+    def test_batch(self):
+        categories = np.arange(self.space.cardinality).reshape(8, 8)
+        vectors = self.space._cat_to_vec_batch(categories)
+        self.assertEqual(vectors.shape, (8, 8, 3))
+        np.testing.assert_array_equal(self.space._vec_to_cat_batch(vectors), categories)
+        np.testing.assert_array_equal(vectors[2, 5], self.space._cat_to_vec(21))
+
+        one_hot = self.space._vec_to_one_hot_batch(vectors[0])
+        np.testing.assert_array_equal(one_hot, np.stack([self.space._vec_to_one_hot(vec) for vec in vectors[0]]))
+
+        with self.assertRaises(ValueError):
+            self.space._vec_to_cat_batch([[0, 4, 0]])
+
+        with self.assertRaises(ValueError):
+            self.space._cat_to_vec_batch([self.space.cardinality])
+
+    def test_many_assets(self):
+        space = ActionDictSpace(assets=['asset_{}'.format(i) for i in range(30)], base_actions=range(4))
+        self.assertEqual(space.cardinality, 4 ** 30)
+        self.assertEqual(space.encoded_depth, 60)
+        vec = [3] * 15 + [0] * 14 + [1]
+        self.assertEqual(space._vec_to_cat(vec), 4 ** 30 - 4 ** 15 + 1)
+        self.assertEqual(list(space._cat_to_vec(space._vec_to_cat(vec))), vec)
+
+    def test_continuous(self):
+        space = ActionDictSpace(assets=['a', 'b'])
+        self.assertIsNone(space.lookup_table)
+        self.assertIsNone(space.cardinality)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import unittest
+import multiprocessing
+import threading
+import asyncio
+
+import zmq
+import zmq.asyncio
+import numpy as np
+from gym import spaces
+
+from btgym.spaces import DictSpace, ActionDictSpace
+from btgym.transport import SharedObservationRing, InProcessContext, BinaryWireCodec, make_wire_codec
+
+
+observation_space = DictSpace(
+    {
+        'external': spaces.Box(low=-10, high=10, shape=(8, 1, 3), dtype=np.float32),
+        'internal': spaces.Box(low=-10, high=10, shape=(8, 1, 5), dtype=np.float64),
+        'metadata': DictSpace(
+            {
+                'type': spaces.Box(shape=(), low=0, high=1, dtype=np.uint32),
+                'timestamp': spaces.Box(shape=(), low=0, high=np.finfo(np.float64).max, dtype=np.float64),
+            }
+        )
+    }
+)
+
+
+def make_state(value):
+    return {
+        'external': np.full((8, 1, 3), value),
+        'internal': np.full((8, 1, 5), value),
+        'metadata': {'type': np.asarray(1), 'timestamp': np.asarray(1e9 + value)}
+    }
+
+
+class SharedObservationRingTest(unittest.TestCase):
+
+    def test_write_read_roundtrip(self):
+        ring = SharedObservationRing(observation_space, num_slots=3)
+        slots = [ring.write(make_state(i)) for i in range(4)]
+        self.assertEqual(slots, [0, 1, 2, 0])
+
+        state = ring.read(slots[-1])
+        self.assertTrue(observation_space.contains(state))
+        self.assertEqual(state['external'].dtype, np.float32)
+        np.testing.assert_array_equal(state['internal'], make_state(3)['internal'])
+        self.assertEqual(state['metadata']['timestamp'], 1e9 + 3)
+
+    def test_remote_side_shares_memory(self):
+        ring = SharedObservationRing(observation_space, num_slots=2)
+        view = ring.read(0)
+        writer = multiprocessing.Process(target=ring.write, args=(make_state(5),))
+        writer.start()
+        writer.join()
+        np.testing.assert_array_equal(view['external'], np.full((8, 1, 3), 5))
+
+    def test_shape_mismatch_fails(self):
+        ring = SharedObservationRing(observation_space)
+        state = make_state(0)
+        state['external'] = np.zeros((8, 3))
+        with self.assertRaises(ValueError):
+            ring.write(state)
+
+
+class InProcessSocketTest(unittest.TestCase):
+
+    def test_req_rep_exchange(self):
+        address = 'tcp://127.0.0.1:65001'
+        server_context = InProcessContext()
+        client_context = InProcessContext()
+
+        def serve():
+            socket = server_context.socket(zmq.REP)
+            socket.bind(address)
+            for _ in range(2):
+                message = socket.recv_pyobj()
+                socket.send_pyobj({'echo': message})
+
+        server = threading.Thread(target=serve, daemon=True)
+        server.start()
+
+        client = client_context.socket(zmq.REQ)
+        client.setsockopt(zmq.SNDTIMEO, 1000)
+        client.setsockopt(zmq.RCVTIMEO, 1000)
+        client.connect(address)
+
+        array = np.zeros(3)
+        message = {'ctrl': '_getstat', 'data': array}
+        client.send_pyobj(message)
+        message['ctrl'] = 'changed'
+        response = client.recv_pyobj()
+        self.assertEqual(response['echo']['ctrl'], '_getstat')
+        self.assertIs(response['echo']['data'], array)
+
+        client.send_pyobj(1)
+        self.assertEqual(client.recv_pyobj(), {'echo': 1})
+        server.join(1)
+
+        with self.assertRaises(zmq.Again):
+            client.recv_pyobj()
+
+        server_context.destroy()
+        client_context.destroy()
+
+    def test_push_pull_non_blocking(self):
+        context = InProcessContext()
+        pull = context.socket(zmq.PULL)
+        push = context.socket(zmq.PUSH)
+        push.connect('tcp://127.0.0.1:{}'.format(pull.bind_to_random_port('tcp://127.0.0.1')))
+
+        with self.assertRaises(zmq.Again):
+            pull.recv_pyobj(flags=zmq.NOBLOCK)
+
+        for i in range(3):
+            push.send_pyobj({'timestamp': i}, flags=zmq.NOBLOCK)
+        self.assertEqual([pull.recv_pyobj(flags=zmq.NOBLOCK)['timestamp'] for _ in range(3)], [0, 1, 2])
+
+        pull.close()
+        orphan = context.socket(zmq.PUSH)
+        orphan.connect('tcp://127.0.0.1:1')
+        with self.assertRaises(zmq.Again):
+            orphan.send_pyobj('lost', flags=zmq.NOBLOCK)
+
+        context.destroy()
+
+
+class BinaryWireCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.context = zmq.Context()
+        self.client = self.context.socket(zmq.PAIR)
+        self.server = self.context.socket(zmq.PAIR)
+        self.server.bind('inproc://codec_test')
+        self.client.connect('inproc://codec_test')
+
+    def tearDown(self):
+        self.context.destroy()
+
+    def test_discrete_action_and_response(self):
+        action_space = ActionDictSpace(base_actions=[0, 1, 2, 3], assets=['default_asset'])
+        client_codec = BinaryWireCodec(
+            observation_space,
+            action_space,
+            action_names={'default_asset': ('hold', 'buy', 'sell', 'close')},
+        )
+        server_codec = make_wire_codec(client_codec.get_spec())
+
+        client_codec.send(self.client, {'action': {'default_asset': 'sell'}})
+        self.assertEqual(server_codec.recv(self.server), {'action': {'default_asset': 'sell'}})
+
+        info = [{'step': 1, 'broker_message': '-'}]
+        server_codec.send_response(self.server, (make_state(3), -0.5, True, info))
+        state, reward, is_done, received_info = client_codec.recv(self.client)
+        self.assertTrue(observation_space.contains(state))
+        np.testing.assert_array_equal(state['external'], np.full((8, 1, 3), 3))
+        self.assertEqual(state['metadata']['timestamp'], 1e9 + 3)
+        self.assertEqual((reward, is_done, received_info), (-0.5, True, info))
+
+    def test_continuous_action(self):
+        action_space = ActionDictSpace(assets=['cash', 'asset'])
+        client_codec = BinaryWireCodec(observation_space, action_space)
+        server_codec = make_wire_codec(client_codec.get_spec())
+
+        client_codec.send(self.client, {'action': {'cash': np.array([0.25]), 'asset': np.array([0.75])}})
+        action = server_codec.recv(self.server)['action']
+        np.testing.assert_array_equal(action['asset'], np.array([0.75], dtype=np.float32))
+        np.testing.assert_array_equal(action['cash'], np.array([0.25], dtype=np.float32))
+
+    def test_pickle_fallback(self):
+        codec = BinaryWireCodec(observation_space, ActionDictSpace(assets=['asset']))
+        for message in [{'ctrl': '_done'}, {'actions': [0, 1]}, 'Exiting.']:
+            codec.send(self.client, message)
+            self.assertEqual(codec.recv(self.server), message)
+
+        codec.send_response(self.server, (make_state(0), np.zeros(2), False, []))
+        self.assertEqual(codec.recv(self.client)[1].shape, (2,))
+
+    def test_asyncio_socket(self):
+        action_space = ActionDictSpace(base_actions=[0, 1, 2, 3], assets=['default_asset'])
+        client_codec = BinaryWireCodec(observation_space, action_space)
+        server_codec = make_wire_codec(client_codec.get_spec())
+        loop = asyncio.new_event_loop()
+
+        async def exchange():
+            client = zmq.asyncio.Socket(self.client)
+            await client_codec.asend(client, {'action': {'default_asset': 2}})
+            self.assertEqual(server_codec.recv(self.server), {'action': {'default_asset': 2}})
+
+            server_codec.send_response(self.server, (make_state(1), 0.5, False, []))
+            state, reward, is_done, info = await client_codec.arecv(client)
+            np.testing.assert_array_equal(state['internal'], np.full((8, 1, 5), 1))
+            self.assertEqual((reward, is_done, info), (0.5, False, []))
+
+            await client_codec.asend(client, {'ctrl': '_done'})
+            self.assertEqual(server_codec.recv(self.server), {'ctrl': '_done'})
+
+        try:
+            loop.run_until_complete(exchange())
+
+        finally:
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
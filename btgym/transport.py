@@ -0,0 +1,617 @@
+###############################################################################
+#
+# Copyright (C) 2017-19 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import ctypes
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import struct
+import threading
+from collections import OrderedDict
+
+import zmq
+import numpy as np
+from gym import spaces
+
+
+def get_space_layout(space, _path=()):
+    """
+    Flattens [nested] dictionary observation space to list of fixed-size leaves.
+
+    Args:
+        space:  gym.spaces.Dict, btgym.spaces.DictSpace or dictionary of gym spaces.
+
+    Returns:
+        list of tuples (<key path as tuple of str>, <shape>, <numpy dtype>) ordered by key path.
+
+    Raises:
+        ValueError, if space contains leaf which size can not be inferred.
+    """
+    if isinstance(space, spaces.Dict):
+        space = space.spaces
+
+    if isinstance(space, dict):
+        layout = []
+        for key in sorted(space.keys()):
+            layout += get_space_layout(space[key], _path + (key,))
+        return layout
+
+    elif isinstance(space, spaces.Box):
+        return [(_path, tuple(space.shape), np.dtype(space.dtype))]
+
+    elif isinstance(space, spaces.Discrete):
+        return [(_path, (), np.dtype(np.int64))]
+
+    else:
+        raise ValueError('Can not infer fixed memory layout for space <{}> at key <{}>.'.format(space, _path))
+
+
+def _nested_get(struct, path):
+    for key in path:
+        struct = struct[key]
+    return struct
+
+
+def _nested_set(struct, path, value):
+    for key in path[:-1]:
+        struct = struct.setdefault(key, {})
+    struct[path[-1]] = value
+
+
+def stack_observations(observations, layout=None):
+    """
+    Stacks list of [nested] dictionary observations along new first (batch) dimension.
+
+    Args:
+        observations:   list of observations of same structure;
+        layout:         observation space layout as returned by get_space_layout(), if given - only arrays
+                        listed get stacked, cast to layout dtypes, same way shm and binary transports do.
+
+    Returns:
+        [nested] dictionary of arrays.
+    """
+    if layout is not None:
+        stacked = {}
+        for path, _, dtype in layout:
+            _nested_set(
+                stacked,
+                path,
+                np.stack([np.asarray(_nested_get(obs, path), dtype=dtype) for obs in observations], axis=0)
+            )
+        return stacked
+
+    if isinstance(observations[0], dict):
+        return {key: stack_observations([obs[key] for obs in observations]) for key in observations[0].keys()}
+
+    else:
+        return np.stack([np.asarray(obs) for obs in observations], axis=0)
+
+
+def copy_observation(observation):
+    """
+    Copies arrays of [nested] dictionary observation, e.g. one composed in strategy state buffers,
+    which get refilled next step.
+
+    Args:
+        observation:    [nested] dictionary of arrays.
+
+    Returns:
+        [nested] dictionary of array copies.
+    """
+    if isinstance(observation, dict):
+        return {key: copy_observation(value) for key, value in observation.items()}
+
+    elif isinstance(observation, np.ndarray):
+        return observation.copy()
+
+    else:
+        return observation
+
+
+class SharedObservationRing:
+    """
+    Preallocated shared memory ring buffer holding environment observations.
+    Every ring slot is laid out according to environment observation space, so server side writes
+    observation tensors directly to slot memory and passes only slot index through the network, while
+    environment side reads observation as numpy arrays sharing that memory (no copying, no pickling).
+
+    Note:
+        - instance should be created before server process is started and passed to it, so both processes
+          map the same memory;
+        - since REQ/REP exchange is strictly sequential, observation views returned by `read()` stay valid until
+          ring wraps around, i.e. for `num_slots - 1` subsequent environment steps; copy arrays explicitly
+          if longer history is required.
+    """
+
+    def __init__(self, observation_space, num_slots=8, alignment=64):
+        """
+
+        Args:
+            observation_space:  environment observation space (DictSpace);
+            num_slots:          int, ring length;
+            alignment:          int, bytes, every array start offset is aligned to.
+        """
+        assert num_slots > 1, 'Expected at least two ring slots, got: {}'.format(num_slots)
+        self.layout = []
+        offset = 0
+        for path, shape, dtype in get_space_layout(observation_space):
+            self.layout.append((path, shape, dtype, offset))
+            nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            offset += int(np.ceil(nbytes / alignment) * alignment) if nbytes > 0 else alignment
+
+        self.slot_size = offset
+        self.num_slots = num_slots
+        self.cursor = 0
+        self.buffer = multiprocessing.RawArray(ctypes.c_byte, self.slot_size * self.num_slots)
+        self._views = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_views'] = None
+        return state
+
+    def _get_views(self):
+        """
+        Maps every slot of shared buffer to set of numpy arrays (once per process).
+        """
+        if self._views is None:
+            memory = np.frombuffer(self.buffer, dtype=np.uint8)
+            self._views = []
+            for slot in range(self.num_slots):
+                start = slot * self.slot_size
+                slot_views = []
+                for path, shape, dtype, offset in self.layout:
+                    size = int(np.prod(shape, dtype=np.int64))
+                    view = memory[start + offset: start + offset + size * dtype.itemsize].view(dtype).reshape(shape)
+                    slot_views.append((path, view))
+                self._views.append(slot_views)
+
+        return self._views
+
+    def write(self, state):
+        """
+        Copies observation to next vacant slot. Server side.
+
+        Args:
+            state:  [nested] dictionary of arrays matching observation space.
+
+        Returns:
+            int, slot index observation has been written to.
+        """
+        slot = self.cursor
+        for path, view in self._get_views()[slot]:
+            value = np.asarray(_nested_get(state, path))
+            if value.shape != view.shape:
+                raise ValueError(
+                    'Observation <{}> shape mismatch: expected {}, got {}. Hint: wrong Strategy.get_state()?'.
+                    format('/'.join(path), view.shape, value.shape)
+                )
+            np.copyto(view, value, casting='unsafe')
+
+        self.cursor = (slot + 1) % self.num_slots
+        return slot
+
+    def read(self, slot):
+        """
+        Returns observation held by slot. Environment side.
+
+        Args:
+            slot:   int, slot index.
+
+        Returns:
+            [nested] dictionary of numpy arrays sharing slot memory.
+        """
+        state = {}
+        for path, view in self._get_views()[slot]:
+            _nested_set(state, path, view)
+
+        return state
+
+
+class PickleWireCodec:
+    """
+    Default environment/server messages codec: every message is pickled as a whole.
+    """
+    name = 'pickle'
+
+    def get_spec(self):
+        """
+        Returns:
+            codec specification to pass to other side at '_reset', None for default codec.
+        """
+        return None
+
+    def send(self, socket, message, flags=0):
+        return socket.send_pyobj(message, flags=flags)
+
+    def recv(self, socket, flags=0):
+        return socket.recv_pyobj(flags=flags)
+
+    def send_response(self, socket, response, flags=0):
+        socket.send_pyobj(response, flags=flags)
+
+    async def asend(self, socket, message, flags=0):
+        """
+        Sends message via zmq.asyncio socket.
+        """
+        await self.send(socket, message, flags=flags)
+
+    async def arecv(self, socket, flags=0):
+        """
+        Receives message via zmq.asyncio socket.
+        """
+        return await socket.recv_pyobj(flags=flags)
+
+
+class BinaryWireCodec(PickleWireCodec):
+    """
+    Compact binary codec for per-step environment/server messages, negotiated at '_reset'.
+
+    Per-step messages are sent as ZMQ frames carrying raw array buffers laid out according to
+    observation and action spaces:
+
+        action:     [MAGIC <action vector>];
+        response:   [MAGIC <reward: float64, done: bool, info>, <observation arrays>].
+
+    Info lists are of arbitrary content and still pickled, following fixed size reward/done header;
+    any other message (control signals, `step_many` batches, statistics) falls back to pickle.
+    Both kinds of messages are told apart by first frame prefix.
+    """
+    name = 'binary'
+    magic = b'\xffBTGYM\x01'
+    header = struct.Struct('<d?')
+
+    def __init__(self, observation_space=None, action_space=None, action_names=None, layout=None):
+        """
+
+        Args:
+            observation_space:  environment observation space (DictSpace);
+            action_space:       environment action space (ActionDictSpace or DictSpace);
+            action_names:       dictionary {action key: tuple of server actions names} for discrete actions
+                                sent by names, e.g. BTgymEnv.server_actions; None if actions are sent as indices;
+            layout:             tuple (observation layout, action layout) as returned by get_space_layout(),
+                                used instead of spaces if given.
+        """
+        if layout is None:
+            layout = get_space_layout(observation_space), get_space_layout(action_space)
+
+        self.observation_layout, self.action_layout = layout
+        self.action_names = action_names
+
+        # All observation arrays go to single frame, 8 bytes aligned:
+        self.observation_offsets = []
+        offset = 0
+        for path, shape, dtype in self.observation_layout:
+            size = int(np.prod(shape, dtype=np.int64))
+            self.observation_offsets.append((path, shape, dtype, size, offset))
+            offset += int(np.ceil(size * dtype.itemsize / 8) * 8)
+        self.observation_size = offset
+        self.observation_views = None
+        self.observation_buffer = None
+
+        self.action_dtype = np.dtype(
+            [('/'.join(path), dtype, shape) for path, shape, dtype in self.action_layout]
+        )
+        self.action_record = np.zeros((), dtype=self.action_dtype)
+        # Discrete actions names to indices and back:
+        self.action_lookup = {}
+        if action_names is not None:
+            for path, _, _ in self.action_layout:
+                names = action_names.get(path[-1]) if len(path) == 1 else None
+                if names is not None:
+                    self.action_lookup[path] = (tuple(names), {name: i for i, name in enumerate(names)})
+
+    def get_spec(self):
+        return dict(
+            name=self.name,
+            layout=(self.observation_layout, self.action_layout),
+            action_names=self.action_names,
+        )
+
+    def send(self, socket, message, flags=0):
+        if type(message) is not dict or len(message) != 1 or 'action' not in message:
+            return socket.send_pyobj(message, flags=flags)
+
+        action = self.action_record
+        try:
+            for path, _, _ in self.action_layout:
+                value = _nested_get(message['action'], path)
+                if path in self.action_lookup and isinstance(value, str):
+                    value = self.action_lookup[path][-1][value]
+                action['/'.join(path)] = value
+
+        except (KeyError, TypeError, ValueError):
+            return socket.send_pyobj(message, flags=flags)
+
+        return socket.send(self.magic + action.tobytes(), flags=flags)
+
+    def send_response(self, socket, response, flags=0):
+        state, reward, is_done, info = response
+        try:
+            header = self.header.pack(reward, is_done)
+
+        except (struct.error, TypeError):
+            # Non-scalar reward:
+            return socket.send_pyobj(response, flags=flags)
+
+        # Frame gets copied by zmq on sending, buffer can be reused:
+        if self.observation_buffer is None:
+            self.observation_buffer = bytearray(self.observation_size)
+            self.observation_views = [
+                (path, np.ndarray(shape, dtype=dtype, buffer=self.observation_buffer, offset=offset))
+                for path, shape, dtype, size, offset in self.observation_offsets
+            ]
+
+        for path, view in self.observation_views:
+            value = np.asarray(_nested_get(state, path))
+            if value.shape != view.shape:
+                raise ValueError(
+                    'Observation <{}> shape mismatch: expected {}, got {}. Hint: wrong Strategy.get_state()?'.
+                    format('/'.join(path), view.shape, value.shape)
+                )
+            np.copyto(view, value, casting='unsafe')
+
+        socket.send_multipart(
+            [self.magic + header + pickle.dumps(info, pickle.HIGHEST_PROTOCOL), self.observation_buffer],
+            flags=flags,
+        )
+
+    def recv(self, socket, flags=0):
+        return self.decode(socket.recv_multipart(flags=flags))
+
+    async def arecv(self, socket, flags=0):
+        return self.decode(await socket.recv_multipart(flags=flags))
+
+    def decode(self, frames):
+        """
+        Restores message from received frames.
+        """
+        if not frames[0].startswith(self.magic):
+            return pickle.loads(frames[0])
+
+        if len(frames) == 1:
+            # Action:
+            action = np.frombuffer(frames[0], dtype=self.action_dtype, offset=len(self.magic))[0]
+            message = {}
+            for path, _, _ in self.action_layout:
+                value = action['/'.join(path)]
+                if path in self.action_lookup:
+                    value = self.action_lookup[path][0][value]
+                _nested_set(message, path, value)
+
+            return {'action': message}
+
+        else:
+            # Environment response:
+            reward, is_done = self.header.unpack_from(frames[0], len(self.magic))
+            info = pickle.loads(frames[0][len(self.magic) + self.header.size:])
+            # Single copy to get writeable arrays:
+            buffer = bytearray(frames[1])
+            state = {}
+            for path, shape, dtype, size, offset in self.observation_offsets:
+                _nested_set(state, path, np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset))
+
+            return state, reward, is_done, info
+
+
+def make_wire_codec(spec=None):
+    """
+    Makes messages codec from specification received at '_reset'.
+
+    Args:
+        spec:   dictionary as returned by codec get_spec() method or None
+
+    Returns:
+        codec instance
+    """
+    if spec is None:
+        return PickleWireCodec()
+
+    spec = dict(spec)
+    name = spec.pop('name')
+    if name == BinaryWireCodec.name:
+        return BinaryWireCodec(**spec)
+
+    else:
+        raise ValueError('Unknown wire codec: <{}>.'.format(name))
+
+
+def _copy_containers(obj):
+    """
+    Copies dictionaries, lists and tuples structure of message, leaves (arrays, dataframes etc.) are shared.
+    """
+    if type(obj) in (dict, OrderedDict):
+        return type(obj)((key, _copy_containers(value)) for key, value in obj.items())
+
+    elif type(obj) in (list, tuple):
+        return type(obj)(_copy_containers(value) for value in obj)
+
+    else:
+        return obj
+
+
+class InProcessContext:
+    """
+    Minimal in-process stand-in for zmq.Context: makes REQ/REP and PUSH/PULL sockets connected via thread-safe
+    queues. Used to run BTgymServer and BTgymDataFeedServer as threads of environment process (no ZMQ, no pickling).
+    """
+    _endpoints = dict()  # process-wide registry of bound REP and PULL sockets: {address: socket}
+    _endpoints_lock = threading.Condition()
+    _random_ports = itertools.count(49152)
+
+    def __init__(self):
+        self.closed = False
+        self._sockets = []
+
+    def socket(self, socket_type):
+        assert socket_type in [zmq.REQ, zmq.REP, zmq.PUSH, zmq.PULL],\
+            'Only REQ/REP and PUSH/PULL in-process sockets are supported.'
+        socket = InProcessSocket(self, socket_type)
+        self._sockets.append(socket)
+        return socket
+
+    def destroy(self, linger=None):
+        for socket in self._sockets:
+            socket.close()
+        self.closed = True
+
+    term = destroy
+
+
+class InProcessSocket:
+    """
+    Minimal in-process stand-in for zmq REQ/REP or PUSH/PULL socket.
+    Messages are passed by reference; dictionaries, lists and tuples are copied on send so mutating
+    them later on does not affect message already sent.
+    Several REQ [PUSH] sockets can be connected to one REP [PULL] socket, as with ZMQ.
+    Only zmq.NOBLOCK flag is supported.
+    """
+
+    def __init__(self, context, socket_type):
+        self.context = context
+        self.socket_type = socket_type
+        self.closed = False
+        self.address = None
+        self.options = {zmq.RCVTIMEO: -1, zmq.SNDTIMEO: -1}
+        self._inbox = queue.Queue()
+        self._peer = None
+        self._reply_to = None
+
+    def setsockopt(self, option, value):
+        self.options[option] = value
+
+    def _timeout(self, option):
+        return None if self.options.get(option, -1) < 0 else self.options[option] / 1000
+
+    def bind(self, address):
+        with InProcessContext._endpoints_lock:
+            InProcessContext._endpoints[address] = self
+            InProcessContext._endpoints_lock.notify_all()
+        self.address = address
+
+    def bind_to_random_port(self, addr):
+        with InProcessContext._endpoints_lock:
+            port = next(InProcessContext._random_ports)
+            while '{}:{}'.format(addr, port) in InProcessContext._endpoints:
+                port = next(InProcessContext._random_ports)
+            self.bind('{}:{}'.format(addr, port))
+
+        return port
+
+    def connect(self, address):
+        # Peer gets resolved on first send, REP side may be not bound yet:
+        self.address = address
+        self._peer = None
+
+    def _get_peer(self, flags=0):
+        if self._peer is None or self._peer.closed:
+            with InProcessContext._endpoints_lock:
+                is_bound = InProcessContext._endpoints_lock.wait_for(
+                    lambda: self.address in InProcessContext._endpoints,
+                    timeout=0 if flags & zmq.NOBLOCK else self._timeout(zmq.SNDTIMEO),
+                )
+                if not is_bound:
+                    raise zmq.Again()
+                self._peer = InProcessContext._endpoints[self.address]
+        return self._peer
+
+    def send_pyobj(self, obj, flags=0):
+        if self.closed:
+            raise zmq.ZMQError(zmq.ENOTSOCK)
+
+        message = _copy_containers(obj)
+        if self.socket_type == zmq.REQ:
+            self._get_peer(flags)._inbox.put((self._inbox, message))
+
+        elif self.socket_type == zmq.PUSH:
+            self._get_peer(flags)._inbox.put((None, message))
+
+        else:
+            reply_to, self._reply_to = self._reply_to, None
+            reply_to.put((None, message))
+
+    def recv_pyobj(self, flags=0):
+        if self.closed:
+            raise zmq.ZMQError(zmq.ENOTSOCK)
+        try:
+            if flags & zmq.NOBLOCK:
+                reply_to, message = self._inbox.get_nowait()
+
+            else:
+                reply_to, message = self._inbox.get(timeout=self._timeout(zmq.RCVTIMEO))
+
+        except queue.Empty:
+            raise zmq.Again()
+
+        if self.socket_type == zmq.REP:
+            self._reply_to = reply_to
+
+        return message
+
+    def close(self, linger=None):
+        if self.socket_type in [zmq.REP, zmq.PULL] and self.address is not None:
+            with InProcessContext._endpoints_lock:
+                if InProcessContext._endpoints.get(self.address) is self:
+                    InProcessContext._endpoints.pop(self.address)
+        self.closed = True
+
+
+class InProcessRunner(threading.Thread):
+    """
+    Executes server process class `run()` body as daemon thread of current process.
+    Mimics part of multiprocessing.Process interface used by environment.
+    """
+
+    def __init__(self, server):
+        """
+
+        Args:
+            server:     BTgymServer or BTgymDataFeedServer instance, not started.
+        """
+        super(InProcessRunner, self).__init__(target=server.run, name=type(server).__name__, daemon=True)
+        self.server = server
+        self.exitcode = None
+        self.pid = os.getpid()
+
+    def run(self):
+        try:
+            super(InProcessRunner, self).run()
+            self.exitcode = 0
+
+        except BaseException:
+            self.exitcode = 1
+            raise
+
+    def terminate(self):
+        """
+        Threads can not be killed, asks server to exit instead: puts `_done` (ends running episode, if any) and
+        `_stop` requests directly to server socket inbox, replies are discarded. Does not wait for server to exit.
+        """
+        if not self.is_alive():
+            return
+
+        with InProcessContext._endpoints_lock:
+            socket = InProcessContext._endpoints.get(self.server.network_address)
+
+        if socket is not None:
+            replies = queue.Queue()
+            for ctrl in ['_done', '_stop']:
+                socket._inbox.put((replies, {'ctrl': ctrl}))
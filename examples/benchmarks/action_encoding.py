@@ -0,0 +1,74 @@
+"""
+ActionDictSpace discrete action encoding cost vs. number of assets: Cartesian product lookup table scan
+(former implementation) vs. mixed-radix arithmetic, one action at a time and in batches.
+
+Table is only made and scanned up to `--max_table_assets` as it holds N**K entries.
+
+Usage::
+
+    python action_encoding.py [--min_assets 2] [--max_assets 12] [--max_table_assets 7] [--num_actions 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from btgym.spaces import ActionDictSpace
+
+BASE_ACTIONS = ('hold', 'buy', 'sell', 'close')
+
+
+def table_vec_to_cat(table, action):
+    for key, value in table.items():
+        if list(value) == list(action):
+            return key
+
+
+def usec_per_action(func, actions):
+    start = time.time()
+    for action in actions:
+        func(action)
+
+    return (time.time() - start) / len(actions) * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min_assets', type=int, default=2)
+    parser.add_argument('--max_assets', type=int, default=12)
+    parser.add_argument('--max_table_assets', type=int, default=7)
+    parser.add_argument('--num_actions', type=int, default=1000)
+    args = parser.parse_args()
+
+    print('{} base actions, {} random actions per run, microseconds per action:'.format(
+        len(BASE_ACTIONS), args.num_actions)
+    )
+    print('{:>7} {:>12} {:>10} {:>12} {:>12} {:>12} {:>12}'.format(
+        'assets', 'cardinality', 'table, s', 'table scan', 'vec_to_cat', 'cat_to_vec', 'batch'
+    ))
+    rng = np.random.RandomState(0)
+    for num_assets in range(args.min_assets, args.max_assets + 1):
+        space = ActionDictSpace(assets=['asset_{}'.format(i) for i in range(num_assets)], base_actions=BASE_ACTIONS)
+        vectors = rng.randint(0, len(BASE_ACTIONS), size=(args.num_actions, num_assets))
+        categories = space._vec_to_cat_batch(vectors)
+
+        if num_assets <= args.max_table_assets:
+            start = time.time()
+            table = space._make_lookup_table(range(len(BASE_ACTIONS)), num_assets)
+            table_time = '{:10.3f}'.format(time.time() - start)
+            scan_time = '{:12.1f}'.format(usec_per_action(lambda vec: table_vec_to_cat(table, vec), vectors))
+            del table
+
+        else:
+            table_time, scan_time = '{:>10}'.format('-'), '{:>12}'.format('-')
+
+        encode_time = usec_per_action(space._vec_to_cat, vectors)
+        decode_time = usec_per_action(space._cat_to_vec, categories)
+
+        start = time.time()
+        np.testing.assert_array_equal(space._cat_to_vec_batch(space._vec_to_cat_batch(vectors)), vectors)
+        batch_time = (time.time() - start) / args.num_actions * 1e6
+
+        print('{:7d} {:12d} {} {} {:12.2f} {:12.2f} {:12.3f}'.format(
+            num_assets, space.cardinality, table_time, scan_time, encode_time, decode_time, batch_time
+        ))
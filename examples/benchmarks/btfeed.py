@@ -0,0 +1,55 @@
+"""
+Backtrader engine bar throughput with btfeeds.PandasDirectData vs. array-backed BTgymArrayData feed.
+
+Runs full-month M1 episode through cerebro with no-op strategy, `preload=False` as BTgymServer does,
+and reports bars per second for both feeds, including feed construction time.
+
+Usage::
+
+    python btfeed.py [--filename ../data/DAT_ASCII_EURUSD_M1_201701.csv] [--repeat 3]
+"""
+import argparse
+import time
+
+import backtrader as bt
+import backtrader.feeds as btfeeds
+
+from btgym.datafeed.base import BTgymBaseData
+from btgym.datafeed.feed import BTgymArrayData
+
+DATA_FILE = '../data/DAT_ASCII_EURUSD_M1_201701.csv'
+
+
+class NoOpStrategy(bt.Strategy):
+
+    def next(self):
+        pass
+
+
+def run(feed_class, dataframe):
+    start = time.time()
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.addstrategy(NoOpStrategy)
+    cerebro.adddata(
+        feed_class(dataname=dataframe, timeframe=bt.TimeFrame.Minutes, volume=-1, openinterest=-1),
+        name='base_asset'
+    )
+    cerebro.run(preload=False)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filename', default=DATA_FILE)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data = BTgymBaseData(filename=args.filename)
+    data.read_csv()
+    num_bars = data.data.shape[0]
+
+    print('{} bars from <{}>'.format(num_bars, args.filename))
+    print('{:>18} {:>10} {:>12}'.format('feed', 'run, s', 'bars/s'))
+    for feed_class in [btfeeds.PandasDirectData, BTgymArrayData]:
+        seconds = min(run(feed_class, data.data) for _ in range(args.repeat))
+        print('{:>18} {:10.3f} {:12.0f}'.format(feed_class.__name__, seconds, num_bars / seconds))
@@ -0,0 +1,51 @@
+"""
+Dataset load time: parsing CSV files (cold cache) vs. loading parsed columnar cache (warm cache).
+
+Usage::
+
+    python csv_cache.py [--filename ../data/DAT_ASCII_EURUSD_M1_201701.csv ../data/DAT_ASCII_EURUSD_M1_201702.csv]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from btgym.datafeed.base import BTgymBaseData
+
+DATA_FILES = [
+    '../data/DAT_ASCII_EURUSD_M1_201701.csv',
+    '../data/DAT_ASCII_EURUSD_M1_201702.csv',
+    '../data/DAT_ASCII_EURUSD_M1_201703.csv',
+    '../data/DAT_ASCII_EURUSD_M1_201704.csv',
+    '../data/DAT_ASCII_EURUSD_M1_201705.csv',
+    '../data/DAT_ASCII_EURUSD_M1_201706.csv',
+]
+
+
+def load(filenames, cache_dir):
+    data = BTgymBaseData(filename=filenames)
+    data.csv_cache_dir = cache_dir
+    start = time.time()
+    data.read_csv()
+    return time.time() - start, data.data.shape[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filename', nargs='+', default=DATA_FILES)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        no_cache = min(load(args.filename, None)[0] for _ in range(args.repeat))
+        cold, num_records = load(args.filename, cache_dir)
+        warm = min(load(args.filename, cache_dir)[0] for _ in range(args.repeat))
+
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print('{} records from {} files'.format(num_records, len(args.filename)))
+    print('{:>22} {:>10}'.format('mode', 'load, s'))
+    for mode, seconds in [('no cache', no_cache), ('cold cache (+write)', cold), ('warm cache', warm)]:
+        print('{:>22} {:10.3f}'.format(mode, seconds))
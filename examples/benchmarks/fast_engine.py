@@ -0,0 +1,56 @@
+"""
+Episode simulation rate: backtrader Cerebro vs. btgym.fastengine.BTgymFastEngine.
+
+Runs same episodes of EURUSD M1 data with random agent actions through both engines, setting those up
+as BTgymServer does, checks responses match and reports bars per second.
+
+Usage::
+
+    python fast_engine.py [--filename ../data/DAT_ASCII_EURUSD_M1_201701.csv] [--episodes 5] [--skip_frame 1]
+"""
+import argparse
+
+import numpy as np
+
+from btgym.datafeed import BTgymDataset
+from btgym.test_fastengine import random_actions, run_scripted_episode, compare_responses
+
+DATA_FILE = '../data/DAT_ASCII_EURUSD_M1_201701.csv'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filename', default=DATA_FILE)
+    parser.add_argument('--episodes', type=int, default=5)
+    parser.add_argument('--skip_frame', type=int, default=1)
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    dataset = BTgymDataset(filename=args.filename, episode_duration={'days': 2, 'hours': 23, 'minutes': 55})
+    dataset.reset()
+
+    totals = {engine: [0, 0.0] for engine in ['backtrader', 'fast']}
+    max_diff = 0.0
+    for episode_num in range(args.episodes):
+        trial = dataset.sample(get_new=True, sample_type=0)
+        trial.reset()
+        episode = trial.sample(get_new=True, sample_type=0)
+        actions = random_actions(episode.data.shape[0], episode.data_name, seed=episode_num)
+
+        runs = {}
+        for engine in totals.keys():
+            runs[engine] = run_scripted_episode(engine, episode, actions, skip_frame=args.skip_frame)
+            totals[engine][0] += runs[engine].num_bars
+            totals[engine][1] += runs[engine].run_time
+
+        report = compare_responses(runs['backtrader'].responses, runs['fast'].responses)
+        max_diff = max([max_diff] + list(report.values()))
+
+    print('{} episodes from <{}>, skip_frame: {}, max. response discrepancy: {}'.format(
+        args.episodes, args.filename, args.skip_frame, max_diff)
+    )
+    print('{:>12} {:>10} {:>10} {:>12} {:>10}'.format('engine', 'bars', 'run, s', 'bars/sec', 'speedup'))
+    base_rate = totals['backtrader'][0] / totals['backtrader'][1]
+    for engine, (num_bars, run_time) in totals.items():
+        rate = num_bars / run_time
+        print('{:>12} {:10d} {:10.2f} {:12.1f} {:10.1f}'.format(engine, num_bars, run_time, rate, rate / base_rate))
@@ -0,0 +1,76 @@
+"""
+Strategy features cost: bank of backtrader SMA indicators sliced every step vs.
+same features precomputed for whole episode by btgym.strategy.features.EpisodeFeatures.
+
+Runs full-month M1 episode through cerebro, `preload=False` as BTgymServer does, with strategy
+fetching [time_dim, num_features] features window on every bar, and reports total run time and time per bar.
+
+Usage::
+
+    python features.py [--filename ../data/DAT_ASCII_EURUSD_M1_201701.csv] [--time_dim 30] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+import backtrader as bt
+import backtrader.indicators as btind
+
+from btgym.datafeed.base import BTgymBaseData
+from btgym.datafeed.feed import BTgymArrayData
+from btgym.strategy.features import EpisodeFeatures
+
+DATA_FILE = '../data/DAT_ASCII_EURUSD_M1_201701.csv'
+PERIODS = [2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class IndicatorStrategy(bt.Strategy):
+    params = dict(time_dim=30)
+
+    def __init__(self):
+        self.features = [btind.SimpleMovingAverage(self.datas[0], period=period) for period in PERIODS]
+        self.addminperiod(max(PERIODS) + self.p.time_dim)
+
+    def next(self):
+        np.stack([feature.get(size=self.p.time_dim) for feature in self.features], axis=-1)
+
+
+class PrecomputedStrategy(bt.Strategy):
+    params = dict(time_dim=30)
+
+    def __init__(self):
+        self.features = EpisodeFeatures([dict(kind='sma', periods=PERIODS)], self.datas)
+        self.addminperiod(max(PERIODS) + self.p.time_dim)
+
+    def next(self):
+        self.features.window(len(self.data) - 1, self.p.time_dim)
+
+
+def run(strategy_class, dataframe, time_dim):
+    start = time.time()
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.addstrategy(strategy_class, time_dim=time_dim)
+    cerebro.adddata(
+        BTgymArrayData(dataname=dataframe, timeframe=bt.TimeFrame.Minutes, volume=-1, openinterest=-1),
+        name='base_asset'
+    )
+    cerebro.run(preload=False)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filename', default=DATA_FILE)
+    parser.add_argument('--time_dim', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data = BTgymBaseData(filename=args.filename)
+    data.read_csv()
+    num_bars = data.data.shape[0]
+
+    print('{} bars from <{}>, {} SMA features, window: {}'.format(num_bars, args.filename, len(PERIODS), args.time_dim))
+    print('{:>20} {:>10} {:>12}'.format('strategy', 'run, s', 'us/bar'))
+    for strategy_class in [IndicatorStrategy, PrecomputedStrategy]:
+        seconds = min(run(strategy_class, data.data, args.time_dim) for _ in range(args.repeat))
+        print('{:>20} {:10.3f} {:12.1f}'.format(strategy_class.__name__, seconds, seconds / num_bars * 1e6))
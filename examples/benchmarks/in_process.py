@@ -0,0 +1,50 @@
+"""
+Environment start-up time and step rate: server/data_server subprocesses over ZMQ vs. in-process mode.
+
+Usage::
+
+    python in_process.py [--steps 2000]
+"""
+import argparse
+import time
+
+from btgym import BTgymEnv
+
+DATA_FILE = '../data/DAT_ASCII_EURUSD_M1_201703.csv'
+
+ENV_KWARGS = dict(
+    filename=DATA_FILE,
+    episode_duration={'days': 2, 'hours': 23, 'minutes': 55},
+    render_enabled=False,
+)
+
+
+def run(in_process, num_steps, port):
+    start = time.time()
+    env = BTgymEnv(port=port, data_port=port - 1, in_process=in_process, **ENV_KWARGS)
+    try:
+        env.reset()
+        startup = time.time() - start
+        start = time.time()
+        for _ in range(num_steps):
+            _, _, done, _ = env.step(0)
+            if done:
+                env.reset()
+        return startup, num_steps / (time.time() - start)
+
+    finally:
+        env.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {
+        'subprocess': run(False, args.steps, port=5600),
+        'in_process': run(True, args.steps, port=5700),
+    }
+    print('{:>12} {:>12} {:>12}'.format('mode', 'startup, s', 'steps/sec'))
+    for mode, (startup, rate) in results.items():
+        print('{:>12} {:12.2f} {:12.1f}'.format(mode, startup, rate))
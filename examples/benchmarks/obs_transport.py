@@ -0,0 +1,78 @@
+"""
+Environment throughput with pickled vs. shared memory observation transport.
+
+Runs same episodes with `obs_transport='pickle'` and `obs_transport='shm'` for a strategy emitting wide
+`external` observation tensor and reports steps per second for both.
+
+Usage::
+
+    python obs_transport.py [--width 256] [--steps 2000]
+"""
+import argparse
+import time
+
+import numpy as np
+from gym import spaces
+
+from btgym import BTgymEnv, BTgymBaseStrategy
+
+DATA_FILE = '../data/DAT_ASCII_EURUSD_M1_201703.csv'
+
+
+TIME_DIM = 128
+
+
+class WideStateStrategy(BTgymBaseStrategy):
+    """
+    Emits `external` observation of shape [time_dim, 1, width].
+    """
+    def get_external_state(self):
+        x = np.frombuffer(self.data.close.get(size=self.time_dim))
+        return np.tile(x[:, None, None], (1, 1, self.p.state_shape['external'].shape[-1]))
+
+
+def run(transport, width, num_steps, port):
+    state_shape = {
+        'raw': spaces.Box(shape=(TIME_DIM, 4), low=0, high=0, dtype=np.float32),
+        'external': spaces.Box(shape=(TIME_DIM, 1, width), low=-1e3, high=1e3, dtype=np.float32),
+        'metadata': BTgymBaseStrategy.params.state_shape['metadata'],
+    }
+    env = BTgymEnv(
+        filename=DATA_FILE,
+        strategy=WideStateStrategy,
+        state_shape=state_shape,
+        episode_duration={'days': 2, 'hours': 23, 'minutes': 55},
+        render_enabled=False,
+        obs_transport=transport,
+        port=port,
+        data_port=port + 1,
+    )
+    try:
+        steps = 0
+        start = time.time()
+        while steps < num_steps:
+            env.reset()
+            done = False
+            while not done and steps < num_steps:
+                _, _, done, _ = env.step(0)
+                steps += 1
+        return steps / (time.time() - start)
+
+    finally:
+        env.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=256)
+    parser.add_argument('--steps', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    for i, transport in enumerate(['pickle', 'shm']):
+        results[transport] = run(transport, args.width, args.steps, port=5600 + 10 * i)
+
+    print('external tensor: {} x 1 x {}'.format(TIME_DIM, args.width))
+    for transport, sps in results.items():
+        print('{:>8}: {:8.1f} steps/sec'.format(transport, sps))
+    print('speedup: {:.2f}x'.format(results['shm'] / results['pickle']))
@@ -0,0 +1,67 @@
+"""
+Start-up time for N environments: fresh server/data_server subprocesses vs. leasing warm BTgymServerPool workers.
+Pool forking time is reported separately, as it is paid once per worker process.
+
+Usage::
+
+    python server_pool.py [--num_envs 8]
+"""
+import argparse
+import time
+
+from btgym import BTgymEnv, BTgymServerPool
+
+DATA_FILE = '../data/DAT_ASCII_EURUSD_M1_201703.csv'
+
+ENV_KWARGS = dict(
+    filename=DATA_FILE,
+    episode_duration={'days': 2, 'hours': 23, 'minutes': 55},
+    render_enabled=False,
+)
+
+
+def run(num_envs, port, server_pool=None):
+    start = time.time()
+    envs = []
+    try:
+        for i in range(num_envs):
+            envs.append(
+                BTgymEnv(
+                    port=port + i,
+                    data_port=port - 1,
+                    data_master=(i == 0),
+                    server_pool=server_pool,
+                    **ENV_KWARGS
+                )
+            )
+        for env in envs:
+            env.reset()
+        return time.time() - start
+
+    finally:
+        for env in reversed(envs):
+            env.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_envs', type=int, default=8)
+    args = parser.parse_args()
+
+    results = {'subprocess': run(args.num_envs, port=5800)}
+
+    start = time.time()
+    pool = BTgymServerPool(num_workers=args.num_envs + 1)
+    fork_time = time.time() - start
+    try:
+        results['pool'] = run(args.num_envs, port=5900, server_pool=pool)
+        # Same workers, second lease:
+        results['pool, reused'] = run(args.num_envs, port=5900, server_pool=pool)
+
+    finally:
+        pool.close()
+
+    print('pool of {} workers forked in {:.2f} s'.format(args.num_envs + 1, fork_time))
+    print('{:>14} {:>14}'.format('mode', 'startup, s'))
+    for mode, startup in results.items():
+        print('{:>14} {:14.2f}'.format(mode, startup))
@@ -0,0 +1,67 @@
+"""
+Batched step wall time: N environments stepped one after another vs. BTgymVecEnv.
+
+Usage::
+
+    python vec_env.py [--num_envs 8] [--steps 500]
+"""
+import argparse
+import time
+
+from btgym import BTgymEnv, BTgymVecEnv
+
+DATA_FILE = '../data/DAT_ASCII_EURUSD_M1_201703.csv'
+
+ENV_KWARGS = dict(
+    filename=DATA_FILE,
+    episode_duration={'days': 2, 'hours': 23, 'minutes': 55},
+    render_enabled=False,
+)
+
+
+def run_sequential(num_envs, num_steps, port):
+    envs = [
+        BTgymEnv(port=port + i, data_port=port - 1, data_master=(i == 0), **ENV_KWARGS) for i in range(num_envs)
+    ]
+    try:
+        for env in envs:
+            env.reset()
+        start = time.time()
+        for _ in range(num_steps):
+            for env in envs:
+                _, _, done, _ = env.step(0)
+                if done:
+                    env.reset()
+        return (time.time() - start) / num_steps
+
+    finally:
+        for env in reversed(envs):
+            env.close()
+
+
+def run_vectorized(num_envs, num_steps, port):
+    vec_env = BTgymVecEnv(num_envs=num_envs, port=port, data_port=port - 1, **ENV_KWARGS)
+    try:
+        vec_env.reset()
+        start = time.time()
+        for _ in range(num_steps):
+            vec_env.step([0] * num_envs)
+        return (time.time() - start) / num_steps
+
+    finally:
+        vec_env.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_envs', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=500)
+    args = parser.parse_args()
+
+    sequential = run_sequential(args.num_envs, args.steps, port=5600)
+    vectorized = run_vectorized(args.num_envs, args.steps, port=5700)
+
+    print('{} environments, ms per batched step:'.format(args.num_envs))
+    print('sequential: {:8.3f}'.format(sequential * 1e3))
+    print('vectorized: {:8.3f}'.format(vectorized * 1e3))
+    print('speedup: {:.2f}x'.format(sequential / vectorized))
@@ -0,0 +1,166 @@
+"""
+Per-step message exchange cost of pickle vs. binary wire codec: bytes on the wire, microseconds
+per <action, (o, r, d, i)> round trip over loopback REQ/REP sockets with server side running in its own
+process, and codec-only microseconds (encoding and decoding both messages over inproc sockets, single thread).
+
+Usage::
+
+    python wire_codec.py [--steps 10000] [--width 4 32 512]
+"""
+import argparse
+import datetime
+import multiprocessing
+import pickle
+import time
+
+import zmq
+import numpy as np
+from gym import spaces
+
+from btgym.spaces import DictSpace, ActionDictSpace
+from btgym.transport import PickleWireCodec, BinaryWireCodec, make_wire_codec
+
+ADDRESS = 'tcp://127.0.0.1:5590'
+SERVER_ACTIONS = {'default_asset': ('hold', 'buy', 'sell', 'close')}
+
+
+def make_spaces(width):
+    observation_space = DictSpace(
+        {
+            'raw': spaces.Box(low=-100, high=100, shape=(width, 4), dtype=np.float32),
+            'internal': spaces.Box(low=-100, high=100, shape=(width, 1, 5), dtype=np.float32),
+            'metadata': DictSpace(
+                {
+                    'type': spaces.Box(shape=(), low=0, high=1, dtype=np.uint32),
+                    'trial_num': spaces.Box(shape=(), low=0, high=10 ** 10, dtype=np.uint32),
+                    'timestamp': spaces.Box(shape=(), low=0, high=np.finfo(np.float64).max, dtype=np.float64),
+                }
+            )
+        }
+    )
+    action_space = ActionDictSpace(base_actions=[0, 1, 2, 3], assets=['default_asset'])
+    return observation_space, action_space
+
+
+def make_response(width, step):
+    state = {
+        'raw': np.random.rand(width, 4).astype(np.float32),
+        'internal': np.random.rand(width, 1, 5).astype(np.float32),
+        'metadata': {'type': np.asarray(0), 'trial_num': np.asarray(1), 'timestamp': np.asarray(1e9 + step)},
+    }
+    info = [
+        dict(
+            step=step,
+            time=datetime.datetime(2017, 3, 1),
+            action={'default_asset': 'hold'},
+            broker_message='-',
+            broker_cash=100.0,
+            broker_value=100.0,
+            drawdown=0.0,
+            max_drawdown=0.0,
+        )
+    ]
+    return state, 0.01, False, info
+
+
+class CountingSocket:
+    """
+    Socket wrapper summing up bytes sent.
+    """
+    def __init__(self, socket):
+        self.socket = socket
+        self.bytes_sent = 0
+
+    def send_pyobj(self, obj, flags=0):
+        self.send(pickle.dumps(obj, pickle.DEFAULT_PROTOCOL), flags=flags)
+
+    def send(self, frame, flags=0, **kwargs):
+        self.bytes_sent += len(frame)
+        self.socket.send(frame, flags=flags, **kwargs)
+
+    def send_multipart(self, frames, flags=0, **kwargs):
+        self.bytes_sent += sum(memoryview(frame).nbytes for frame in frames)
+        self.socket.send_multipart(frames, flags=flags, **kwargs)
+
+    def __getattr__(self, item):
+        return getattr(self.socket, item)
+
+
+def serve(codec_spec, width, num_steps, result):
+    context = zmq.Context()
+    codec = make_wire_codec(codec_spec)
+    socket = CountingSocket(context.socket(zmq.REP))
+    socket.bind(ADDRESS)
+    responses = [make_response(width, step) for step in range(16)]
+    for step in range(num_steps):
+        codec.recv(socket)
+        codec.send_response(socket, responses[step % 16])
+    socket.close()
+    context.term()
+    result.put(socket.bytes_sent)
+
+
+def run(codec, width, num_steps):
+    server_bytes = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(codec.get_spec(), width, num_steps, server_bytes))
+    server.start()
+    context = zmq.Context()
+    socket = CountingSocket(context.socket(zmq.REQ))
+    socket.connect(ADDRESS)
+
+    message = {'action': {'default_asset': 'hold'}}
+    start = time.time()
+    for _ in range(num_steps):
+        codec.send(socket, message)
+        codec.recv(socket)
+    elapsed = time.time() - start
+
+    num_bytes = socket.bytes_sent + server_bytes.get()
+    server.join()
+    socket.close()
+    context.term()
+    return num_bytes / num_steps, elapsed / num_steps
+
+
+def run_inproc(codec, width, num_steps):
+    context = zmq.Context()
+    client = context.socket(zmq.PAIR)
+    server = context.socket(zmq.PAIR)
+    server.bind('inproc://codec')
+    client.connect('inproc://codec')
+    server_codec = make_wire_codec(codec.get_spec())
+    responses = [make_response(width, step) for step in range(16)]
+
+    message = {'action': {'default_asset': 'hold'}}
+    start = time.time()
+    for step in range(num_steps):
+        codec.send(client, message)
+        server_codec.recv(server)
+        server_codec.send_response(server, responses[step % 16])
+        codec.recv(client)
+    elapsed = time.time() - start
+
+    context.destroy()
+    return elapsed / num_steps
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type=int, default=10000)
+    parser.add_argument('--width', type=int, nargs='+', default=[4, 32, 512])
+    args = parser.parse_args()
+
+    print('{:>6} {:>8} {:>12} {:>10} {:>12}'.format('width', 'codec', 'bytes/step', 'us/step', 'codec us'))
+    for width in args.width:
+        observation_space, action_space = make_spaces(width)
+        codecs = [
+            PickleWireCodec(),
+            BinaryWireCodec(observation_space, action_space, action_names=SERVER_ACTIONS),
+        ]
+        for codec in codecs:
+            num_bytes, seconds = run(codec, width, args.steps)
+            codec_seconds = run_inproc(codec, width, args.steps)
+            print(
+                '{:>6} {:>8} {:12.0f} {:10.1f} {:12.1f}'.
+                format(width, codec.name, num_bytes, seconds * 1e6, codec_seconds * 1e6)
+            )